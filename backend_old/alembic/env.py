@@ -19,7 +19,10 @@ from app.core.config import settings
 from app.models.user import User
 from app.models.order import Order, BillingHistory
 from app.models.setting import Setting
-from app.models.tracking_history import TrackingHistory
+from app.models.tracking_history import TrackingHistory, TrackingDailySummary
+from app.models.tracking_event import TrackingEvent, TrackedObject
+from app.models.rate_limit import RateLimitBucket
+from app.models.reconciliation import ReconciliationBatch, ReconciliationItem
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
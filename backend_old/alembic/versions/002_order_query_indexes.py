@@ -0,0 +1,50 @@
+"""Indexes for the order query paths
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns) of the plain indexes
+INDEXES = [
+    ('ix_orders_collector_status_created', 'orders', ['collector_id', 'status', 'created_at']),
+    ('ix_orders_seller_created', 'orders', ['seller_id', 'created_at']),
+    ('ix_orders_status_created', 'orders', ['status', 'created_at']),
+    ('ix_orders_created_at', 'orders', ['created_at']),
+    ('ix_orders_customer_phone', 'orders', ['customer_phone']),
+    ('ix_orders_tracking_code', 'orders', ['tracking_code']),
+    ('ix_billing_history_order_id', 'billing_history', ['order_id']),
+]
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY doesn't block writes but can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+        op.create_index(
+            'ix_orders_duplicates', 'orders', ['id'],
+            unique=False,
+            postgresql_where=sa.text('is_duplicate = true'),
+            sqlite_where=sa.text('is_duplicate = 1'),
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_orders_duplicates', table_name='orders', postgresql_concurrently=True, if_exists=True)
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,60 @@
+"""Exact money columns
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+# (table, column, nullable) of every amount of money
+MONEY_COLUMNS = [
+    ('orders', 'total_amount', False),
+    ('orders', 'paid_amount', True),
+    ('billing_history', 'amount', False),
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        # SQLite has no exact decimal type: amounts become integer cents
+        for table, column, nullable in MONEY_COLUMNS:
+            op.execute(f'UPDATE {table} SET {column} = CAST(ROUND({column} * 100) AS INTEGER)')
+            with op.batch_alter_table(table) as batch:
+                batch.alter_column(column, type_=sa.BigInteger(), existing_nullable=nullable)
+        return
+
+    for table, column, nullable in MONEY_COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=sa.Numeric(12, 2),
+            existing_type=sa.Float(),
+            existing_nullable=nullable,
+            postgresql_using=f'ROUND({column}::numeric, 2)'
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for table, column, nullable in MONEY_COLUMNS:
+            with op.batch_alter_table(table) as batch:
+                batch.alter_column(column, type_=sa.Float(), existing_nullable=nullable)
+            op.execute(f'UPDATE {table} SET {column} = {column} / 100.0')
+        return
+
+    for table, column, nullable in MONEY_COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=sa.Float(),
+            existing_type=sa.Numeric(12, 2),
+            existing_nullable=nullable,
+            postgresql_using=f'{column}::double precision'
+        )
@@ -0,0 +1,26 @@
+"""Idempotency key of billing entries
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('billing_history', sa.Column('idempotency_key', sa.String(), nullable=True))
+    # NULLs don't collide, so payments without a key are unaffected
+    op.create_index('ix_billing_history_idempotency_key', 'billing_history', ['idempotency_key'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_billing_history_idempotency_key', table_name='billing_history')
+    op.drop_column('billing_history', 'idempotency_key')
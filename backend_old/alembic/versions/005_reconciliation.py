@@ -0,0 +1,73 @@
+"""Statement reconciliation batches and review queue
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Same storage as the other money columns (see 003)
+    money = sa.BigInteger() if op.get_bind().dialect.name == 'sqlite' else sa.Numeric(12, 2)
+
+    op.create_table(
+        'reconciliationbatch',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(), nullable=True),
+        sa.Column('format', sa.String(), nullable=False),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('lines', sa.Integer(), nullable=False),
+        sa.Column('matched', sa.Integer(), nullable=False),
+        sa.Column('already_posted', sa.Integer(), nullable=False),
+        sa.Column('unmatched', sa.Integer(), nullable=False),
+        sa.Column('skipped', sa.Integer(), nullable=False),
+        sa.Column('posted_amount', money, nullable=False),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_reconciliationbatch_id'), 'reconciliationbatch', ['id'], unique=False)
+
+    op.create_table(
+        'reconciliationitem',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('batch_id', sa.Integer(), nullable=False),
+        sa.Column('line_number', sa.Integer(), nullable=False),
+        sa.Column('transaction_id', sa.String(), nullable=False),
+        sa.Column('posted_at', sa.DateTime(), nullable=True),
+        sa.Column('amount', money, nullable=False),
+        sa.Column('payer_name', sa.String(), nullable=True),
+        sa.Column('payer_phone', sa.String(), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('reason', sa.String(), nullable=False),
+        sa.Column('status', sa.Enum('PENDING', 'RESOLVED', 'IGNORED', name='reconciliationitemstatus'), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=True),
+        sa.Column('resolved_by', sa.Integer(), nullable=True),
+        sa.Column('resolved_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['batch_id'], ['reconciliationbatch.id'], ),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+        sa.ForeignKeyConstraint(['resolved_by'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('transaction_id')
+    )
+    op.create_index(op.f('ix_reconciliationitem_id'), 'reconciliationitem', ['id'], unique=False)
+    op.create_index('ix_reconciliationitem_status_id', 'reconciliationitem', ['status', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_reconciliationitem_status_id', table_name='reconciliationitem')
+    op.drop_index(op.f('ix_reconciliationitem_id'), table_name='reconciliationitem')
+    op.drop_table('reconciliationitem')
+    op.drop_index(op.f('ix_reconciliationbatch_id'), table_name='reconciliationbatch')
+    op.drop_table('reconciliationbatch')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP TYPE reconciliationitemstatus')
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.api_v1.endpoints import auth, orders, webhook, users, tracking, settings, nutra
+from app.api.api_v1.endpoints import auth, orders, webhook, users, tracking, settings, nutra, reconciliation
 
 api_router = APIRouter()
 
@@ -9,4 +9,5 @@ api_router.include_router(orders.router, prefix="/orders", tags=["orders"])
 api_router.include_router(webhook.router, prefix="/webhook", tags=["webhook"])
 api_router.include_router(tracking.router, prefix="/tracking", tags=["tracking"])
 api_router.include_router(settings.router, prefix="/settings", tags=["settings"])
-api_router.include_router(nutra.router, prefix="/nutra", tags=["nutra"])
\ No newline at end of file
+api_router.include_router(nutra.router, prefix="/nutra", tags=["nutra"])
+api_router.include_router(reconciliation.router, prefix="/reconciliation", tags=["reconciliation"])
\ No newline at end of file
@@ -1,22 +1,32 @@
+import csv
+import io
 from typing import List, Optional, Any, Dict
-from fastapi import APIRouter, Depends, HTTPException, Query, Path, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Body, UploadFile, File, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_db, get_read_db, get_current_user, get_current_supervisor
+from app.core.etag import conditional_response
 from app.models.user import User
 from app.models.nutra_product import (
-    NutraProduct, Kit, KitProduct, Distributor, 
+    NutraProduct, ProductVariation, Kit, KitProduct, Distributor,
     DistributorOrder, DistributorOrderItem, StockHistory,
     KitSale, ProductType, OrderStatus, StockChangeReason
 )
 from app.schemas.nutra import (
     Product, ProductCreate, ProductUpdate,
-    Kit, KitCreate, KitUpdate,
-    Distributor, DistributorCreate, DistributorUpdate,
+    CatalogItem, CatalogSyncRequest, CatalogSyncSummary,
+    Kit as KitSchema, KitCreate, KitUpdate,
+    Distributor as DistributorSchema, DistributorCreate, DistributorUpdate,
     Order, OrderCreate, OrderUpdate,
-    StockHistory, StockHistoryCreate,
-    KitSale, KitSaleCreate,
-    ProductStockStatus, SalesAnalytics, InventorySummary
+    StockHistory as StockHistorySchema, StockHistoryCreate, StockHistoryPage,
+    KitSale as KitSaleSchema, KitSaleCreate,
+    ProductStockStatus, SalesAnalytics, InventorySummary, ReplenishmentSuggestion
 )
+from app.services.kit_catalog import kit_catalog
+from app.services.inventory import inventory_service
+from app.services.replenishment import replenishment_service
+from app.services.catalog_sync import catalog_sync_service
 from datetime import datetime, timedelta
 from sqlalchemy import func, desc
 
@@ -48,6 +58,8 @@ def create_product(
     """
     Create a new product.
     """
+    if db.query(NutraProduct.id).filter(NutraProduct.name == product.name).first():
+        raise HTTPException(status_code=400, detail="A product with this name already exists")
     db_product = NutraProduct(**product.dict())
     db.add(db_product)
     db.commit()
@@ -96,6 +108,10 @@ def update_product(
         raise HTTPException(status_code=404, detail="Product not found")
     
     update_data = product_update.dict(exclude_unset=True)
+    if update_data.get("name") and db.query(NutraProduct.id).filter(
+        NutraProduct.name == update_data["name"], NutraProduct.id != product_id
+    ).first():
+        raise HTTPException(status_code=400, detail="A product with this name already exists")
     for field, value in update_data.items():
         setattr(db_product, field, value)
     
@@ -120,8 +136,49 @@ def delete_product(
     db.commit()
     return {"message": "Product deactivated successfully"}
 
+# Catalog sync endpoints
+@router.post("/products/sync", response_model=CatalogSyncSummary)
+def sync_catalog(
+    sync_request: CatalogSyncRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Create or update products and variations from a supplier catalog.
+    Variations are matched by SKU; stock is only set for new variations.
+    """
+    summary = catalog_sync_service.sync(db, sync_request.items, current_user.id)
+    kit_catalog.invalidate()
+    return summary
+
+@router.post("/products/sync/upload", response_model=CatalogSyncSummary)
+def sync_catalog_file(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Create or update products and variations from a CSV catalog file.
+    Columns: product_name, sku, type, cost, sale_price and optionally
+    minimum_stock, current_stock, description, active.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(file.file, encoding="utf-8-sig"))
+    items = []
+    for line, row in enumerate(reader, start=2):
+        try:
+            items.append(CatalogItem(**{key: value for key, value in row.items() if key and value not in (None, "")}))
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=422,
+                detail={"line": line, "errors": e.errors(include_url=False, include_context=False, include_input=False)}
+            )
+    
+    summary = catalog_sync_service.sync(db, items, current_user.id)
+    kit_catalog.invalidate()
+    return summary
+
 # Stock adjustment endpoint
-@router.post("/products/{product_id}/adjust-stock", response_model=StockHistory)
+@router.post("/products/{product_id}/adjust-stock", response_model=StockHistorySchema)
 def adjust_stock(
     product_id: int = Path(...),
     stock_change: StockHistoryCreate = Body(...),
@@ -129,20 +186,23 @@ def adjust_stock(
     current_user: User = Depends(get_current_user)
 ):
     """
-    Adjust the stock of a product.
+    Adjust the stock of a product variation.
     """
-    db_product = db.query(NutraProduct).filter(NutraProduct.id == product_id).first()
-    if not db_product:
-        raise HTTPException(status_code=404, detail="Product not found")
+    db_variation = db.query(ProductVariation).filter(
+        ProductVariation.id == stock_change.variation_id,
+        ProductVariation.product_id == product_id
+    ).first()
+    if not db_variation:
+        raise HTTPException(status_code=404, detail="Product variation not found")
     
-    # Update product stock
-    db_product.current_stock += stock_change.change_amount
-    if db_product.current_stock < 0:
+    # Update variation stock
+    db_variation.current_stock += stock_change.change_amount
+    if db_variation.current_stock < 0:
         raise HTTPException(status_code=400, detail="Stock cannot be negative")
     
     # Create stock history entry
     stock_history = StockHistory(
-        product_id=product_id,
+        variation_id=db_variation.id,
         user_id=current_user.id,
         change_amount=stock_change.change_amount,
         reason=stock_change.reason,
@@ -157,30 +217,120 @@ def adjust_stock(
     
     return stock_history
 
-@router.get("/products/{product_id}/stock-history", response_model=List[StockHistory])
-def get_stock_history(
+# Stock history endpoints
+@router.get("/products/{product_id}/stock-history", response_model=StockHistoryPage)
+def get_product_stock_history(
     product_id: int = Path(...),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
-    skip: int = 0,
-    limit: int = 100
+    cursor: Optional[str] = Query(None, description="Cursor returned with the previous page"),
+    limit: int = Query(100, ge=1, le=1000)
 ):
     """
-    Get stock history for a product.
+    Get stock history for all variations of a product.
     """
     product = db.query(NutraProduct).filter(NutraProduct.id == product_id).first()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    history = db.query(StockHistory).filter(
-        StockHistory.product_id == product_id
-    ).order_by(desc(StockHistory.created_at)).offset(skip).limit(limit).all()
+    try:
+        items, next_cursor = inventory_service.get_stock_history_page(
+            db, cursor=cursor, limit=limit, product_id=product_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return history
+    return StockHistoryPage(items=items, next_cursor=next_cursor)
+
+@router.get("/stock-history", response_model=StockHistoryPage)
+def get_stock_history(
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+    variation_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+    reason: Optional[StockChangeReason] = None,
+    reference_type: Optional[str] = None,
+    reference_id: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    cursor: Optional[str] = Query(None, description="Cursor returned with the previous page"),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """
+    Get stock history, newest first, with keyset pagination.
+    """
+    try:
+        items, next_cursor = inventory_service.get_stock_history_page(
+            db,
+            cursor=cursor,
+            limit=limit,
+            variation_id=variation_id,
+            product_id=product_id,
+            reason=reason,
+            reference_type=reference_type,
+            reference_id=reference_id,
+            start_date=start_date,
+            end_date=end_date
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return StockHistoryPage(items=items, next_cursor=next_cursor)
+
+@router.get("/stock-history/export")
+def export_stock_history(
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+    variation_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+    reason: Optional[StockChangeReason] = None,
+    reference_type: Optional[str] = None,
+    reference_id: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+):
+    """
+    Export stock history as CSV, streamed row by row.
+    """
+    query = inventory_service.query_stock_history(
+        db,
+        variation_id=variation_id,
+        product_id=product_id,
+        reason=reason,
+        reference_type=reference_type,
+        reference_id=reference_id,
+        start_date=start_date,
+        end_date=end_date
+    )
+    columns = ["id", "variation_id", "user_id", "change_amount", "reason", "reference_type", "reference_id", "notes", "created_at"]
+    
+    def generate_rows():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for count, entry in enumerate(query.yield_per(1000), start=1):
+            writer.writerow([
+                entry.id, entry.variation_id, entry.user_id, entry.change_amount, entry.reason.value,
+                entry.reference_type, entry.reference_id, entry.notes, entry.created_at.isoformat()
+            ])
+            # Flush in chunks to keep memory flat
+            if count % 1000 == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        yield buffer.getvalue()
+    
+    return StreamingResponse(
+        generate_rows(),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=stock_history.csv"}
+    )
 
 # Kit endpoints
-@router.get("/kits", response_model=List[Kit])
+@router.get("/kits", response_model=List[KitSchema])
 def get_kits(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
     skip: int = 0,
@@ -189,13 +339,17 @@ def get_kits(
 ):
     """
     Get all kits.
+    Answers 304 to a matching If-None-Match while the catalog and the stock of its kits are unchanged.
     """
-    query = db.query(Kit)
-    if active_only:
-        query = query.filter(Kit.active == True)
-    return query.offset(skip).limit(limit).all()
+    not_modified = conditional_response(
+        request, response, "kits", skip, limit, active_only,
+        kit_catalog.get_kits_version(db, skip=skip, limit=limit, active_only=active_only)
+    )
+    if not_modified:
+        return not_modified
+    return kit_catalog.list_kits(db, skip=skip, limit=limit, active_only=active_only)
 
-@router.post("/kits", response_model=Kit)
+@router.post("/kits", response_model=KitSchema)
 def create_kit(
     kit: KitCreate,
     db: Session = Depends(get_db),
@@ -211,24 +365,23 @@ def create_kit(
         active=kit.active
     )
     db.add(db_kit)
-    db.commit()
-    db.refresh(db_kit)
+    db.flush()
     
     # Add products to kit
     for product_item in kit.products:
         kit_product = KitProduct(
             kit_id=db_kit.id,
-            product_id=product_item["product_id"],
+            variation_id=product_item["variation_id"],
             quantity=product_item["quantity"]
         )
         db.add(kit_product)
     
     db.commit()
-    db.refresh(db_kit)
+    kit_catalog.invalidate()
     
-    return db_kit
+    return kit_catalog.get_kit(db, db_kit.id)
 
-@router.get("/kits/{kit_id}", response_model=Kit)
+@router.get("/kits/{kit_id}", response_model=KitSchema)
 def get_kit(
     kit_id: int = Path(...),
     db: Session = Depends(get_db),
@@ -237,12 +390,12 @@ def get_kit(
     """
     Get a specific kit by ID.
     """
-    kit = db.query(Kit).filter(Kit.id == kit_id).first()
+    kit = kit_catalog.get_kit(db, kit_id)
     if not kit:
         raise HTTPException(status_code=404, detail="Kit not found")
     return kit
 
-@router.put("/kits/{kit_id}", response_model=Kit)
+@router.put("/kits/{kit_id}", response_model=KitSchema)
 def update_kit(
     kit_id: int = Path(...),
     kit_update: KitUpdate = Body(...),
@@ -270,14 +423,17 @@ def update_kit(
         for product_item in kit_update.products:
             kit_product = KitProduct(
                 kit_id=kit_id,
-                product_id=product_item["product_id"],
+                variation_id=product_item["variation_id"],
                 quantity=product_item["quantity"]
             )
             db.add(kit_product)
     
+    # Bump the kit version so other workers drop their cached catalog
+    db_kit.updated_at = datetime.utcnow()
     db.commit()
-    db.refresh(db_kit)
-    return db_kit
+    kit_catalog.invalidate()
+    
+    return kit_catalog.get_kit(db, kit_id)
 
 @router.delete("/kits/{kit_id}")
 def delete_kit(
@@ -293,11 +449,13 @@ def delete_kit(
         raise HTTPException(status_code=404, detail="Kit not found")
     
     db_kit.active = False
+    db_kit.updated_at = datetime.utcnow()
     db.commit()
+    kit_catalog.invalidate()
     return {"message": "Kit deactivated successfully"}
 
 # Kit sales endpoints
-@router.post("/kit-sales", response_model=KitSale)
+@router.post("/kit-sales", response_model=KitSaleSchema)
 def create_kit_sale(
     kit_sale: KitSaleCreate,
     db: Session = Depends(get_db),
@@ -306,24 +464,37 @@ def create_kit_sale(
     """
     Record a kit sale and deduct stock.
     """
-    # Get kit and its products
-    kit = db.query(Kit).filter(Kit.id == kit_sale.kit_id).first()
+    # Get kit and its resolved composition
+    catalog = kit_catalog.get_catalog(db)
+    kit = catalog.kits.get(kit_sale.kit_id)
     if not kit:
         raise HTTPException(status_code=404, detail="Kit not found")
     
-    kit_products = db.query(KitProduct).filter(KitProduct.kit_id == kit_sale.kit_id).all()
-    if not kit_products:
+    composition = catalog.compositions[kit.id]
+    if not composition:
         raise HTTPException(status_code=400, detail="Kit has no products")
     
+    # Lock the current stock of every variation in the kit at once
+    variations = {
+        variation.id: variation
+        for variation in db.query(ProductVariation)
+        .filter(ProductVariation.id.in_(composition.keys()))
+        .with_for_update()
+        .all()
+    }
+    
     # Check if there's enough stock for all products
-    for kit_product in kit_products:
-        product = db.query(NutraProduct).filter(NutraProduct.id == kit_product.product_id).first()
-        required_quantity = kit_product.quantity * kit_sale.quantity
+    for variation_id, quantity in composition.items():
+        variation = variations.get(variation_id)
+        required_quantity = quantity * kit_sale.quantity
+        available = variation.current_stock if variation else 0
         
-        if product.current_stock < required_quantity:
+        if available < required_quantity:
+            product = catalog.variations.get(variation_id)
+            product_name = product.product.name if product and product.product else f"#{variation_id}"
             raise HTTPException(
                 status_code=400, 
-                detail=f"Not enough stock for product {product.name}. Required: {required_quantity}, Available: {product.current_stock}"
+                detail=f"Not enough stock for product {product_name}. Required: {required_quantity}, Available: {available}"
             )
     
     # Create kit sale record
@@ -336,20 +507,18 @@ def create_kit_sale(
         notes=kit_sale.notes
     )
     db.add(db_kit_sale)
-    db.commit()
-    db.refresh(db_kit_sale)
+    db.flush()
     
-    # Deduct stock for each product in the kit
-    for kit_product in kit_products:
-        product = db.query(NutraProduct).filter(NutraProduct.id == kit_product.product_id).first()
-        deduction_amount = kit_product.quantity * kit_sale.quantity
+    # Deduct stock for each variation in the kit
+    for variation_id, quantity in composition.items():
+        deduction_amount = quantity * kit_sale.quantity
         
-        # Update product stock
-        product.current_stock -= deduction_amount
+        # Update variation stock
+        variations[variation_id].current_stock -= deduction_amount
         
         # Create stock history entry
         stock_history = StockHistory(
-            product_id=kit_product.product_id,
+            variation_id=variation_id,
             user_id=current_user.id,
             change_amount=-deduction_amount,
             reason=StockChangeReason.KIT_SALE,
@@ -360,11 +529,12 @@ def create_kit_sale(
         db.add(stock_history)
     
     db.commit()
+    db.refresh(db_kit_sale)
     return db_kit_sale
 
-@router.get("/kit-sales", response_model=List[KitSale])
+@router.get("/kit-sales", response_model=List[KitSaleSchema])
 def get_kit_sales(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
     skip: int = 0,
     limit: int = 100,
@@ -384,7 +554,7 @@ def get_kit_sales(
     return query.order_by(desc(KitSale.sale_date)).offset(skip).limit(limit).all()
 
 # Distributor endpoints
-@router.get("/distributors", response_model=List[Distributor])
+@router.get("/distributors", response_model=List[DistributorSchema])
 def get_distributors(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -400,7 +570,7 @@ def get_distributors(
         query = query.filter(Distributor.active == True)
     return query.offset(skip).limit(limit).all()
 
-@router.post("/distributors", response_model=Distributor)
+@router.post("/distributors", response_model=DistributorSchema)
 def create_distributor(
     distributor: DistributorCreate,
     db: Session = Depends(get_db),
@@ -415,7 +585,7 @@ def create_distributor(
     db.refresh(db_distributor)
     return db_distributor
 
-@router.get("/distributors/{distributor_id}", response_model=Distributor)
+@router.get("/distributors/{distributor_id}", response_model=DistributorSchema)
 def get_distributor(
     distributor_id: int = Path(...),
     db: Session = Depends(get_db),
@@ -429,7 +599,7 @@ def get_distributor(
         raise HTTPException(status_code=404, detail="Distributor not found")
     return distributor
 
-@router.put("/distributors/{distributor_id}", response_model=Distributor)
+@router.put("/distributors/{distributor_id}", response_model=DistributorSchema)
 def update_distributor(
     distributor_id: int = Path(...),
     distributor_update: DistributorUpdate = Body(...),
@@ -505,14 +675,13 @@ def create_order(
         status=OrderStatus.PENDENTE
     )
     db.add(db_order)
-    db.commit()
-    db.refresh(db_order)
+    db.flush()
     
     # Add order items
     for item in order.items:
         order_item = DistributorOrderItem(
             order_id=db_order.id,
-            product_id=item.product_id,
+            variation_id=item.variation_id,
             quantity=item.quantity
         )
         db.add(order_item)
@@ -550,11 +719,14 @@ def update_order(
     if not db_order:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    # Check if status is being updated to COMPLETO
-    old_status = db_order.status
-    
     # Update basic order info
     update_data = order_update.dict(exclude={"items"}, exclude_unset=True)
+    
+    # Completing the order is handled by the receiving service, which adds stock
+    receive = update_data.get("status") == OrderStatus.COMPLETO
+    if receive:
+        del update_data["status"]
+    
     for field, value in update_data.items():
         setattr(db_order, field, value)
     
@@ -567,37 +739,16 @@ def update_order(
         for item in order_update.items:
             order_item = DistributorOrderItem(
                 order_id=order_id,
-                product_id=item.product_id,
+                variation_id=item.variation_id,
                 quantity=item.quantity
             )
             db.add(order_item)
     
-    db.commit()
-    db.refresh(db_order)
-    
-    # If status changed to COMPLETO, add stock
-    if old_status != OrderStatus.COMPLETO and db_order.status == OrderStatus.COMPLETO:
-        order_items = db.query(DistributorOrderItem).filter(DistributorOrderItem.order_id == order_id).all()
-        
-        for item in order_items:
-            product = db.query(NutraProduct).filter(NutraProduct.id == item.product_id).first()
-            
-            # Update product stock
-            product.current_stock += item.quantity
-            
-            # Create stock history entry
-            stock_history = StockHistory(
-                product_id=item.product_id,
-                user_id=current_user.id,
-                change_amount=item.quantity,
-                reason=StockChangeReason.ORDER_RECEIVED,
-                reference_type="order",
-                reference_id=order_id,
-                notes=f"Order received from distributor #{db_order.distributor_id}"
-            )
-            db.add(stock_history)
-        
+    if receive:
+        inventory_service.receive_distributor_order(db, db_order, current_user.id)
+    else:
         db.commit()
+    db.refresh(db_order)
     
     return db_order
 
@@ -617,32 +768,8 @@ def complete_order(
     if db_order.status == OrderStatus.COMPLETO:
         raise HTTPException(status_code=400, detail="Order is already complete")
     
-    # Update order status
-    db_order.status = OrderStatus.COMPLETO
-    db.commit()
-    
-    # Add stock for each product in the order
-    order_items = db.query(DistributorOrderItem).filter(DistributorOrderItem.order_id == order_id).all()
-    
-    for item in order_items:
-        product = db.query(NutraProduct).filter(NutraProduct.id == item.product_id).first()
-        
-        # Update product stock
-        product.current_stock += item.quantity
-        
-        # Create stock history entry
-        stock_history = StockHistory(
-            product_id=item.product_id,
-            user_id=current_user.id,
-            change_amount=item.quantity,
-            reason=StockChangeReason.ORDER_RECEIVED,
-            reference_type="order",
-            reference_id=order_id,
-            notes=f"Order received from distributor #{db_order.distributor_id}"
-        )
-        db.add(stock_history)
-    
-    db.commit()
+    # Update order status and add stock for every item in one transaction
+    inventory_service.receive_distributor_order(db, db_order, current_user.id)
     db.refresh(db_order)
     
     return db_order
@@ -650,7 +777,7 @@ def complete_order(
 # Analytics endpoints
 @router.get("/analytics/low-stock", response_model=List[ProductStockStatus])
 def get_low_stock_products(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
     threshold_percentage: float = 100.0  # Default to show products at or below minimum stock
 ):
@@ -683,56 +810,95 @@ def get_low_stock_products(
     
     return sorted(low_stock_products, key=lambda x: x.percentage)
 
+@router.get("/analytics/replenishment", response_model=List[ReplenishmentSuggestion])
+def get_replenishment_suggestions(
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+    reorder_only: bool = True,
+    skip: int = 0,
+    limit: int = 100
+):
+    """
+    Get stock-out forecasts and suggested order quantities, soonest stock-out first.
+    """
+    forecasts = replenishment_service.get_forecasts(db, reorder_only=reorder_only, skip=skip, limit=limit)
+    
+    return [
+        ReplenishmentSuggestion(
+            variation_id=forecast.variation_id,
+            product_name=forecast.variation.product.name,
+            type=forecast.variation.type,
+            current_stock=forecast.variation.current_stock,
+            minimum_stock=forecast.variation.minimum_stock,
+            daily_velocity=forecast.daily_velocity,
+            days_until_stockout=forecast.days_until_stockout,
+            suggested_quantity=forecast.suggested_quantity,
+            computed_at=forecast.computed_at
+        )
+        for forecast in forecasts
+    ]
+
+@router.post("/analytics/replenishment/refresh")
+def refresh_replenishment_forecasts(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_supervisor)
+):
+    """
+    Recompute replenishment forecasts from the latest kit sales.
+    Only admins and supervisors can run it: it rebuilds every forecast.
+    """
+    count = replenishment_service.refresh(db)
+    return {"message": f"Forecasts refreshed for {count} variations", "count": count}
+
 @router.get("/analytics/sales", response_model=SalesAnalytics)
 def get_sales_analytics(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
+    primary: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
     days: int = 30
 ):
     """
     Get sales analytics for the specified number of days.
+    Sales are read from a replica, the kit catalog from the user lookup's primary
+    session so that replica lag doesn't keep reloading the shared catalog.
     """
     start_date = datetime.utcnow() - timedelta(days=days)
     
-    # Get kit sales in the period
-    kit_sales = db.query(KitSale).filter(KitSale.sale_date >= start_date).all()
+    # Aggregate kit sales in the period per kit
+    kit_sales = db.query(
+        KitSale.kit_id,
+        func.count(KitSale.id),
+        func.sum(KitSale.quantity)
+    ).filter(KitSale.sale_date >= start_date).group_by(KitSale.kit_id).all()
+    
+    catalog = kit_catalog.get_catalog(primary)
     
-    total_sales = len(kit_sales)
+    total_sales = 0
     total_revenue = 0.0
     products_sold = {}
     kits_sold = {}
     
-    for sale in kit_sales:
-        kit = db.query(Kit).filter(Kit.id == sale.kit_id).first()
+    for kit_id, sale_count, kit_quantity in kit_sales:
+        total_sales += sale_count
+        kit = catalog.kits.get(kit_id)
         if not kit:
             continue
         
         # Count kit
-        kit_name = kit.name
-        if kit_name in kits_sold:
-            kits_sold[kit_name] += sale.quantity
-        else:
-            kits_sold[kit_name] = sale.quantity
+        kits_sold[kit.name] = kits_sold.get(kit.name, 0) + kit_quantity
         
-        # Get kit products
-        kit_products = db.query(KitProduct).filter(KitProduct.kit_id == sale.kit_id).all()
-        
-        for kit_product in kit_products:
-            product = db.query(NutraProduct).filter(NutraProduct.id == kit_product.product_id).first()
-            if not product:
+        for variation_id, quantity in catalog.compositions[kit_id].items():
+            variation = catalog.variations.get(variation_id)
+            if not variation or not variation.product:
                 continue
             
             # Count product
-            product_name = product.name
-            product_quantity = kit_product.quantity * sale.quantity
-            
-            if product_name in products_sold:
-                products_sold[product_name] += product_quantity
-            else:
-                products_sold[product_name] = product_quantity
+            product_name = variation.product.name
+            product_quantity = quantity * kit_quantity
+            products_sold[product_name] = products_sold.get(product_name, 0) + product_quantity
             
             # Add to revenue
-            total_revenue += product.sale_price * product_quantity
+            total_revenue += variation.sale_price * product_quantity
     
     return SalesAnalytics(
         total_sales=total_sales,
@@ -743,7 +909,7 @@ def get_sales_analytics(
 
 @router.get("/analytics/inventory", response_model=InventorySummary)
 def get_inventory_summary(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
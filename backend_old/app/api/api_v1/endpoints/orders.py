@@ -1,20 +1,24 @@
-from fastapi import APIRouter, Depends, Query, Path, Body
+from fastapi import APIRouter, Depends, Query, Path, Body, Header, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-from app.api.deps import get_current_active_user, get_current_supervisor
+from app.api.deps import get_current_active_user, get_current_supervisor, get_read_db
 from app.db.session import get_db
 from app.models.user import UserRole
 from app.models.order import OrderStatus
 from app.schemas.order import Order, OrderUpdate, BillingHistoryCreate
 from app.services.order import order_service
-from app.core.errors import NotFoundError, AuthorizationError
+from app.services.payments import IdempotencyConflict
+from app.core.errors import NotFoundError, AuthorizationError, ConflictError
+from app.core.etag import conditional_response
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Order], summary="Get all orders", description="Get a list of orders. Results are filtered based on user role.")
 def get_orders(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_active_user),
     status: OrderStatus = Query(None, description="Filter orders by status")
 ):
@@ -25,8 +29,26 @@ def get_orders(
     - Collector: Only orders assigned to the collector
     - Seller: Only orders created by the seller
 
+    The response carries an ETag; a request with a matching If-None-Match
+    gets a 304 while the list is unchanged.
+
     - **status**: Optional filter by order status
     """
+    if current_user.role == UserRole.COLLECTOR:
+        scope = {"collector_id": current_user.id}
+    elif current_user.role == UserRole.SELLER:
+        scope = {"seller_id": current_user.id}
+    elif status:
+        scope = {"status": status}
+    else:
+        scope = {}
+
+    not_modified = conditional_response(
+        request, response, "orders", sorted(scope.items()), order_service.get_orders_version(db, **scope)
+    )
+    if not_modified:
+        return not_modified
+
     if current_user.role == UserRole.COLLECTOR:
         return order_service.get_orders_by_collector(db, current_user.id)
     elif current_user.role == UserRole.SELLER:
@@ -91,6 +113,7 @@ def update_order(
 def add_billing_history(
     order_id: int = Path(..., description="The ID of the order", gt=0),
     billing: BillingHistoryCreate = Body(..., description="Billing history data"),
+    idempotency_key: Optional[str] = Header(None, max_length=255, description="Retries with the same key apply the payment once"),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
@@ -103,6 +126,7 @@ def add_billing_history(
 
     - **order_id**: The ID of the order
     - **billing**: Billing history data including amount and optional notes
+    - **Idempotency-Key**: Optional header; a retried request with the same key is not applied twice
     """
     order = order_service.get_order(db, order_id)
     if not order:
@@ -112,12 +136,16 @@ def add_billing_history(
         raise AuthorizationError()
 
     billing.order_id = order_id
-    order_service.add_billing_history(db, billing, current_user.id)
+    billing.idempotency_key = idempotency_key or billing.idempotency_key
+    try:
+        order_service.add_billing_history(db, billing, current_user.id)
+    except IdempotencyConflict as e:
+        raise ConflictError(detail=str(e))
     return order_service.get_order(db, order_id)
 
 @router.get("/duplicates", response_model=List[Order], summary="Get duplicate orders", description="Get a list of orders marked as duplicates")
 def get_duplicate_orders(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_supervisor)
 ):
     """Get a list of orders marked as duplicates.
@@ -129,7 +157,7 @@ def get_duplicate_orders(
 @router.get("/search", response_model=List[Order], summary="Search orders", description="Search orders by various criteria (order number, customer name, phone, tracking code)")
 def search_orders(
     query: str = Query(..., description="Search query", min_length=2),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_active_user)
 ):
     """Search orders by various criteria.
@@ -151,7 +179,7 @@ def search_orders(
 
 @router.get("/statistics", response_model=Dict[str, Any], summary="Get order statistics", description="Get statistics about orders, including totals and counts by status")
 def get_order_statistics(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_supervisor),
     start_date: Optional[datetime] = Query(None, description="Filter by start date (ISO format)"),
     end_date: Optional[datetime] = Query(None, description="Filter by end date (ISO format)")
@@ -0,0 +1,94 @@
+import io
+from fastapi import APIRouter, Depends, Query, Path, Body, UploadFile, File
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.api.deps import get_current_supervisor, get_read_db
+from app.db.session import get_db
+from app.models.reconciliation import ReconciliationItemStatus
+from app.schemas.reconciliation import ReconciliationBatch, ReconciliationItem, ReconciliationResolve
+from app.services.payments import IdempotencyConflict
+from app.services.reconciliation import ItemAlreadyReviewed, reconciliation_service
+from app.core.errors import NotFoundError, ConflictError, ValidationError
+
+router = APIRouter()
+
+@router.post("/statements", response_model=ReconciliationBatch, summary="Import statement", description="Import a bank or PIX statement and post the payments it contains")
+def import_statement(
+    file: UploadFile = File(..., description="CSV or OFX statement"),
+    format: Optional[str] = Query(None, pattern="^(csv|ofx)$", description="Statement format; taken from the file extension when omitted"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_supervisor)
+):
+    """Import a bank or PIX statement.
+
+    Credits are matched to open orders by order number, phone or payer name
+    and posted as payments. Lines that match no order, or several, are
+    queued for review. Importing the same statement again posts nothing twice.
+
+    - **file**: CSV (columns such as data, valor, nome, telefone, descricao, id) or OFX statement
+    - **format**: Optional format override (csv or ofx)
+    """
+    fmt = format or ("ofx" if (file.filename or "").lower().endswith(".ofx") else "csv")
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", errors="replace", newline="")
+    try:
+        return reconciliation_service.import_statement(db, stream, fmt, file.filename, current_user.id)
+    except ValueError as e:
+        raise ValidationError(detail=str(e))
+
+@router.get("/review", response_model=List[ReconciliationItem], summary="Get review queue", description="Get statement lines that couldn't be matched to an order")
+def get_review_queue(
+    status: ReconciliationItemStatus = Query(ReconciliationItemStatus.PENDING, description="Filter items by status"),
+    after_id: Optional[int] = Query(None, description="Return items after this ID"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+    current_user = Depends(get_current_supervisor)
+):
+    """Get statement lines waiting for review, oldest first.
+
+    - **status**: Item status, pending by default
+    - **after_id**: ID of the last item of the previous page
+    """
+    return reconciliation_service.get_review_queue(db, status, after_id, limit)
+
+@router.post("/review/{item_id}/resolve", response_model=ReconciliationItem, summary="Resolve review item", description="Post a queued statement line to an order")
+def resolve_review_item(
+    item_id: int = Path(..., description="The ID of the review item", gt=0),
+    resolve: ReconciliationResolve = Body(..., description="Order the line pays"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_supervisor)
+):
+    """Post a queued statement line as a payment to the given order.
+
+    - **item_id**: The ID of the review item
+    - **order_id**: The ID of the order the line pays
+    """
+    item = reconciliation_service.get_item(db, item_id)
+    if not item:
+        raise NotFoundError(detail="Review item not found")
+
+    try:
+        resolved = reconciliation_service.resolve_item(db, item, resolve.order_id, current_user.id)
+    except (ItemAlreadyReviewed, IdempotencyConflict) as e:
+        raise ConflictError(detail=str(e))
+    if not resolved:
+        raise NotFoundError(detail="Order not found")
+    return resolved
+
+@router.post("/review/{item_id}/ignore", response_model=ReconciliationItem, summary="Ignore review item", description="Mark a queued statement line as not being a customer payment")
+def ignore_review_item(
+    item_id: int = Path(..., description="The ID of the review item", gt=0),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_supervisor)
+):
+    """Mark a queued statement line as not being a customer payment.
+
+    - **item_id**: The ID of the review item
+    """
+    item = reconciliation_service.get_item(db, item_id)
+    if not item:
+        raise NotFoundError(detail="Review item not found")
+
+    try:
+        return reconciliation_service.ignore_item(db, item, current_user.id)
+    except ItemAlreadyReviewed as e:
+        raise ConflictError(detail=str(e))
@@ -4,8 +4,11 @@ from sqlalchemy.orm import Session
 from app.api.deps import get_db, get_current_active_superuser
 from app.models.user import User
 from app.models.setting import Setting
-from app.schemas.settings import CorreiosSettings, SettingCreate, SettingUpdate
+from app.schemas.settings import CorreiosSettings, SettingCreate, SettingUpdate, TrackingStatusPhrases
+from app.services.status_classifier import status_classifier
+from app.services.correios_client import correios_client
 from app.core.config import settings as app_settings
+from app.db.session import pool_status
 
 router = APIRouter()
 
@@ -39,9 +42,49 @@ def update_correios_settings(
     """
     Update Correios API settings
     """
-    # Update settings in database
-    Setting.set_setting(db, "correios_api_url", settings_data.apiUrl)
-    Setting.set_setting(db, "correios_api_key", settings_data.apiKey)
-    Setting.set_setting(db, "correios_use_mock", str(settings_data.useMock).lower())
+    # Update settings in database, in a single transaction
+    Setting.set_settings(db, {
+        "correios_api_url": settings_data.apiUrl,
+        "correios_api_key": settings_data.apiKey,
+        "correios_use_mock": str(settings_data.useMock).lower()
+    })
+
+    # Tracking calls in this worker use the new settings right away
+    correios_client.invalidate()
     
     return settings_data
+
+
+@router.get("/tracking-statuses", response_model=TrackingStatusPhrases)
+def get_tracking_status_phrases(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_superuser)
+):
+    """
+    Get the phrases used to classify tracking statuses
+    """
+    status_classifier.load(db)
+    return status_classifier.phrases
+
+
+@router.post("/tracking-statuses", response_model=TrackingStatusPhrases)
+def update_tracking_status_phrases(
+    phrases: TrackingStatusPhrases,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_superuser)
+):
+    """
+    Update the phrases used to classify tracking statuses
+    """
+    status_classifier.save(db, phrases.model_dump())
+    return status_classifier.phrases
+
+
+@router.get("/database-pool", response_model=Dict[str, Any])
+def get_database_pool_status(
+    current_user: User = Depends(get_current_active_superuser)
+):
+    """
+    Get connection pool usage of this worker
+    """
+    return pool_status()
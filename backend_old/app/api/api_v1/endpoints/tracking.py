@@ -1,115 +1,181 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
+import asyncio
+import json
+import logging
+import math
 import time
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Header
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from app.api.deps import get_db, get_current_active_user, get_current_active_superuser
+from app.api.deps import get_db, get_read_db, get_current_active_user, get_current_active_superuser
+from app.core.config import settings
+from app.db.session import SessionLocal
 from app.services.correios_service import correios_service
+from app.services.correios_client import correios_client
+from app.services.tracking_recorder import tracking_recorder
+from app.services.tracking_retention import tracking_retention_service
+from app.services.tracking_store import tracking_store
+from app.services.status_classifier import status_classifier
+from app.services.rate_limiter import RateLimitTimeout, correios_rate_limiter
 from app.models.user import User
-from app.models.setting import Setting
 from app.models.tracking_history import TrackingHistory
-from app.schemas.tracking import TrackingRequest, TrackingResponse, MultiTrackingRequest, ApiStatus, TrackingHistoryResponse
+from app.schemas.tracking import (
+    TrackingRequest, TrackingResponse, MultiTrackingRequest, ApiStatus,
+    TrackingHistoryResponse, TrackingRetentionSummary
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-@router.get("/{tracking_code}", response_model=TrackingResponse)
-def track_package(
-    tracking_code: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
-):
+def _latest_status(result: Dict[str, Any]) -> str:
+    """Status of the most recent event of a tracking result"""
+    if result.get("eventos"):
+        return result["eventos"][0]["status"]
+    return "Sem eventos"
+
+
+def _store_results(db: Session, results: Dict[str, Dict[str, Any]]) -> None:
+    """Persist fresh tracking events; a storage failure must not fail the lookup"""
+    try:
+        tracking_store.record_results(db, results)
+    except Exception:
+        db.rollback()
+        logger.exception(f"Error storing tracking events of {len(results)} codes; they were not saved")
+
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream"
+}
+
+
+def _stream_format(stream: Optional[str], accept: Optional[str]) -> Optional[str]:
+    """Streaming format asked for with ?stream= or the Accept header"""
+    if stream:
+        return stream
+    for name, media_type in STREAM_MEDIA_TYPES.items():
+        if accept and media_type in accept:
+            return name
+    return None
+
+
+async def _stream_tracking(tracking_codes: List[str], user_id: int, fmt: str) -> AsyncIterator[str]:
     """
-    Track a package by its tracking code
+    Track codes concurrently and yield each result as soon as it is ready
+
+    At most TRACKING_STREAM_CONCURRENCY lookups are in flight and new ones
+    start only as results are sent, so memory stays flat however long the
+    batch is. If the client disconnects, the generator is cancelled and no
+    further lookups start.
     """
+    codes = iter(dict.fromkeys(tracking_codes))
+    pending = set()
+    unsaved: Dict[str, Dict[str, Any]] = {}
+    sent = 0
+    db = SessionLocal()
+
+    def launch() -> None:
+        code = next(codes, None)
+        if code is not None:
+            pending.add(asyncio.ensure_future(run_in_threadpool(correios_service.track_package_safe, code)))
+
     try:
-        # Track the package
-        result = correios_service.track_package(tracking_code)
+        for _ in range(max(1, settings.TRACKING_STREAM_CONCURRENCY)):
+            launch()
 
-        # Record tracking history
-        status = "Sem eventos"
-        if result.get("eventos") and result["eventos"]:
-            status = result["eventos"][0]["status"]
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                pending.discard(task)
+                launch()
 
-        TrackingHistory.add_history(
-            db=db,
-            tracking_code=tracking_code,
-            status=status,
-            success=True,
-            user_id=current_user.id,
-            details=None
-        )
+                result = task.result()
+                code = result["codigo"]
+                tracking_recorder.record(
+                    tracking_code=code,
+                    status=_latest_status(result) if not result.get("error") else "Erro: " + result["error"],
+                    success=not result.get("error"),
+                    user_id=user_id,
+                    details=result.get("error")
+                )
+                unsaved[code] = result
+                if len(unsaved) >= settings.TRACKING_STREAM_STORE_BATCH:
+                    await run_in_threadpool(_store_results, db, unsaved)
+                    unsaved = {}
 
-        return result
-    except Exception as e:
-        # Record failed tracking attempt
-        try:
-            TrackingHistory.add_history(
-                db=db,
-                tracking_code=tracking_code,
-                status="Erro: " + str(e),
-                success=False,
-                user_id=current_user.id,
-                details=str(e)
-            )
-        except:
-            # If recording history fails, just log it
-            pass
+                payload = json.dumps(TrackingResponse(**result).model_dump(mode="json"), ensure_ascii=False)
+                sent += 1
+                if fmt == "sse":
+                    yield f"event: result\ndata: {payload}\n\n"
+                else:
+                    yield payload + "\n"
 
-        raise HTTPException(status_code=500, detail=f"Error tracking package: {str(e)}")
+        if unsaved:
+            await run_in_threadpool(_store_results, db, unsaved)
+        if fmt == "sse":
+            yield f"event: end\ndata: {json.dumps({'count': sent})}\n\n"
+    finally:
+        # Client gone or batch finished: stop waiting for lookups still running
+        for task in pending:
+            task.cancel()
+        db.close()
 
 
 @router.post("/batch", response_model=Dict[str, TrackingResponse])
 def track_multiple_packages(
     request: MultiTrackingRequest,
+    stream: Optional[str] = Query(None, pattern="^(ndjson|sse)$", description="Stream results as NDJSON or server-sent events"),
+    accept: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Track multiple packages at once
+
+    With ?stream=ndjson or ?stream=sse (or the matching Accept header) each
+    result is sent as soon as its lookup completes, instead of one object
+    after the whole batch.
     """
+    fmt = _stream_format(stream, accept)
+    if fmt:
+        return StreamingResponse(
+            _stream_tracking(request.tracking_codes, current_user.id, fmt),
+            media_type=STREAM_MEDIA_TYPES[fmt],
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
     try:
         # Track multiple packages
         results = correios_service.track_multiple_packages(request.tracking_codes)
-
-        # Record tracking history for each package
-        for tracking_code, result in results.items():
-            try:
-                status = "Sem eventos"
-                if result.get("eventos") and result["eventos"]:
-                    status = result["eventos"][0]["status"]
-
-                TrackingHistory.add_history(
-                    db=db,
-                    tracking_code=tracking_code,
-                    status=status,
-                    success=True,
-                    user_id=current_user.id,
-                    details=None
-                )
-            except:
-                # If recording history fails, just continue
-                pass
-
-        return results
     except Exception as e:
         # Record failed tracking attempt for each code
         for tracking_code in request.tracking_codes:
-            try:
-                TrackingHistory.add_history(
-                    db=db,
-                    tracking_code=tracking_code,
-                    status="Erro: " + str(e),
-                    success=False,
-                    user_id=current_user.id,
-                    details=str(e)
-                )
-            except:
-                # If recording history fails, just continue
-                pass
-
+            tracking_recorder.record(
+                tracking_code=tracking_code,
+                status="Erro: " + str(e),
+                success=False,
+                user_id=current_user.id,
+                details=str(e)
+            )
         raise HTTPException(status_code=500, detail=f"Error tracking packages: {str(e)}")
 
+    _store_results(db, results)
+
+    # Record tracking history for each package
+    for tracking_code, result in results.items():
+        tracking_recorder.record(
+            tracking_code=tracking_code,
+            status=_latest_status(result),
+            success=True,
+            user_id=current_user.id
+        )
+
+    return results
+
 
 @router.get("/check-critical", response_model=List[TrackingResponse])
 def check_critical_packages(
@@ -122,13 +188,17 @@ def check_critical_packages(
     """
     try:
         results = correios_service.track_multiple_packages(tracking_codes)
+        _store_results(db, results)
+
+        # Pick up phrase lists edited in the settings
+        status_classifier.load(db)
 
         # Filter only critical packages
         critical_packages = []
         for code, info in results.items():
             if info.get("eventos") and info["eventos"]:
                 latest_status = info["eventos"][0]["status"]
-                if correios_service.is_status_critical(latest_status):
+                if status_classifier.is_critical(latest_status):
                     critical_packages.append(info)
 
         return critical_packages
@@ -149,7 +219,7 @@ def check_api_status(
         start_time = time.time()
 
         # Check if we're using mock data
-        use_mock = Setting.get_setting(db, "correios_use_mock", "false").lower() == "true"
+        use_mock = correios_client.get_config(db).use_mock
 
         if use_mock:
             # If using mock data, API is always "online"
@@ -157,7 +227,8 @@ def check_api_status(
                 "status": "online",
                 "message": "Using mock data",
                 "timestamp": datetime.now(),
-                "response_time": 0
+                "response_time": 0,
+                "rate_limit": correios_rate_limiter.stats()
             }
 
         # Try to make a test request to the Correios API
@@ -172,7 +243,8 @@ def check_api_status(
             "status": "online",
             "message": "API is responding normally",
             "timestamp": datetime.now(),
-            "response_time": response_time
+            "response_time": response_time,
+            "rate_limit": correios_rate_limiter.stats()
         }
     except Exception as e:
         # If there's an error, API is offline
@@ -180,18 +252,22 @@ def check_api_status(
             "status": "offline",
             "message": str(e),
             "timestamp": datetime.now(),
-            "response_time": None
+            "response_time": None,
+            "rate_limit": correios_rate_limiter.stats()
         }
 
 
 @router.get("/history", response_model=TrackingHistoryResponse)
 def get_tracking_history(
     limit: int = 50,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Get tracking history for the current user
+
+    Lookups are recorded write-behind, so an entry shows up here up to
+    TRACKING_HISTORY_FLUSH_INTERVAL seconds after its lookup.
     """
     try:
         # Get history from database
@@ -214,6 +290,9 @@ def clear_tracking_history(
     Clear tracking history for the current user
     """
     try:
+        # Queued entries must not reappear after the history is cleared
+        tracking_recorder.flush()
+
         # Clear history from database
         count = TrackingHistory.clear_history(db, user_id=current_user.id)
 
@@ -223,3 +302,72 @@ def clear_tracking_history(
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error clearing tracking history: {str(e)}")
+
+
+@router.post("/history/retention", response_model=TrackingRetentionSummary)
+def purge_tracking_history(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_superuser)
+):
+    """
+    Apply the tracking history retention policy now (superuser only)
+    """
+    try:
+        tracking_recorder.flush()
+        return tracking_retention_service.purge(db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error purging tracking history: {str(e)}")
+
+
+# Declared last so that /{tracking_code} doesn't shadow the fixed paths above
+@router.get("/{tracking_code}", response_model=TrackingResponse)
+def track_package(
+    tracking_code: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Track a package by its tracking code
+    """
+    try:
+        # Track the package
+        result = correios_service.track_package(tracking_code)
+    except RateLimitTimeout as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))})
+    except Exception as e:
+        # Record failed tracking attempt
+        tracking_recorder.record(
+            tracking_code=tracking_code,
+            status="Erro: " + str(e),
+            success=False,
+            user_id=current_user.id,
+            details=str(e)
+        )
+        raise HTTPException(status_code=500, detail=f"Error tracking package: {str(e)}")
+
+    _store_results(db, {tracking_code: result})
+
+    # Record tracking history; the entry is written in the background
+    tracking_recorder.record(
+        tracking_code=tracking_code,
+        status=_latest_status(result),
+        success=True,
+        user_id=current_user.id
+    )
+
+    return result
+
+
+@router.get("/{tracking_code}/events", response_model=TrackingResponse)
+def get_stored_tracking(
+    tracking_code: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get the tracking events stored for a package, without calling the Correios API
+    """
+    result = tracking_store.get_tracking(db, tracking_code)
+    if result is None:
+        raise HTTPException(status_code=404, detail="No stored tracking events for this code")
+    return result
@@ -3,7 +3,8 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.core.security import verify_token
-from app.db.session import get_db
+from app.db.session import SessionLocal, get_db
+from app.db.replicas import replica_router
 from app.models.user import UserRole
 from app.services.user import user_service
 from app.core.errors import AuthenticationError, ValidationError, AuthorizationError
@@ -30,6 +31,9 @@ def get_current_user(
     if user is None:
         raise credentials_exception
 
+    # Lets the session's writes make this user's reads sticky to the primary
+    db.info["user_id"] = user.id
+
     return user
 
 def get_current_active_user(
@@ -39,6 +43,24 @@ def get_current_active_user(
         raise ValidationError(detail="Inactive user")
     return current_user
 
+def get_read_db(
+    current_user = Depends(get_current_user)
+):
+    """
+    Session for read-only endpoints
+
+    Reads from a replica when one is caught up and the user hasn't just
+    written, otherwise from the primary. The user is still looked up on
+    the primary, through get_current_user, so each request also checks
+    out one primary connection and holds it until the request ends.
+    """
+    replica = replica_router.replica_for(current_user.id)
+    db = SessionLocal(bind=replica) if replica is not None else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
 def get_current_active_superuser(
     current_user = Depends(get_current_active_user)
 ):
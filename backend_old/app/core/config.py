@@ -16,6 +16,17 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = "postgres"
     POSTGRES_DB: str = "billing_system"
     SQLALCHEMY_DATABASE_URI: Optional[str] = None
+    DB_POOL_SIZE: int = 5  # Connections kept open per worker process
+    DB_MAX_OVERFLOW: int = 10  # Extra connections opened under load, closed when returned
+    DB_POOL_TIMEOUT: float = 10.0  # Seconds a request waits for a connection before failing
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced (0 keeps them forever)
+    DB_POOL_PRE_PING: bool = False  # Test connections on checkout (one extra round trip each)
+    DB_CONNECT_TIMEOUT: int = 10  # Seconds to open a new connection
+    DB_STATEMENT_TIMEOUT_MS: int = 30000  # Server-side limit per statement on Postgres (0 disables it)
+    DB_REPLICA_URIS: List[str] = []  # Read replicas for reporting and listing endpoints
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0  # Replicas further behind are skipped
+    DB_REPLICA_LAG_CHECK_INTERVAL: float = 5.0  # Seconds between lag checks of a replica
+    DB_READ_YOUR_WRITES_SECONDS: float = 10.0  # A user reads from the primary this long after writing
 
     # Security
     SECRET_KEY: str = "your-secret-key-here"  # Change in production
@@ -29,12 +40,73 @@ class Settings(BaseSettings):
     # Correios API
     CORREIOS_API_URL: str = "https://api.correios.com.br"
     CORREIOS_API_KEY: Optional[str] = None
+    CORREIOS_TIMEOUT: float = 10.0  # Seconds per API request
+    CORREIOS_POOL_SIZE: int = 10  # Pooled connections to the API
+    CORREIOS_SETTINGS_RELOAD_SECONDS: float = 30.0  # How often the settings table is re-read
+    CORREIOS_TOKEN_REFRESH_MARGIN: float = 300.0  # Seconds before expiry a token is renewed
+    CORREIOS_RATE_LIMIT: float = 10.0  # API calls per second per bucket (0 disables the limiter)
+    CORREIOS_RATE_BURST: int = 20  # Calls allowed back to back after an idle period
+    CORREIOS_RATE_LIMIT_BACKEND: str = "local"  # "local" (per process) or "database" (shared by all workers)
+    CORREIOS_RATE_LIMIT_MAX_WAIT: float = 5.0  # Longest a call queues for a slot before failing
+    CORREIOS_BACKEND: str = "correios"  # "correios" (the API) or "simulator" (deterministic, for load tests)
+
+    # Tracking simulator (CORREIOS_BACKEND=simulator)
+    SIMULATOR_LATENCY_MS: float = 0.0  # Median simulated upstream latency
+    SIMULATOR_LATENCY_SIGMA: float = 0.5  # Spread of the log-normal latency distribution
+    SIMULATOR_ERROR_RATE: float = 0.0  # Share of calls that fail
+    SIMULATOR_SEED: str = ""  # Changes the outcome assigned to each code
+
+    # Settings table cache
+    SETTINGS_CACHE_TTL_SECONDS: float = 5.0  # How often cached settings are checked against the version row
+
+    # Streaming /tracking/batch
+    TRACKING_STREAM_CONCURRENCY: int = 8  # Lookups in flight per streamed batch
+    TRACKING_STREAM_STORE_BATCH: int = 50  # Streamed results persisted per transaction
+
+    # Tracking history write-behind
+    TRACKING_HISTORY_BATCH_SIZE: int = 200  # Entries per multi-row insert
+    TRACKING_HISTORY_FLUSH_INTERVAL: float = 1.0  # Seconds between background flushes
+    TRACKING_HISTORY_QUEUE_SIZE: int = 10000  # Entries buffered before producers block
+    TRACKING_HISTORY_ENQUEUE_TIMEOUT: float = 0.5  # Seconds to wait for room before dropping an entry
+
+    # Tracking history retention (0 disables a limit)
+    TRACKING_HISTORY_RETENTION_DAYS: int = 90  # Entries older than this are compacted into daily summaries
+    TRACKING_HISTORY_MAX_PER_USER: int = 5000  # Most recent entries kept per user
+    TRACKING_HISTORY_PURGE_CHUNK_SIZE: int = 1000  # Entries deleted per transaction
+
+    # Replenishment forecasting
+    REPLENISHMENT_WINDOW_DAYS: int = 28  # Days of sales history used for the velocity
+    REPLENISHMENT_SMOOTHING_DAYS: int = 7  # Width of the rolling average
+    REPLENISHMENT_LEAD_TIME_DAYS: int = 7  # Days between ordering and receiving stock
+    REPLENISHMENT_COVERAGE_DAYS: int = 30  # Days of sales an order should cover
+    REPLENISHMENT_RESCAN_DAYS: int = 2  # Trailing days re-aggregated on every refresh, so sales committed late count
+
+    # Statement reconciliation
+    RECONCILIATION_BATCH_SIZE: int = 500  # Statement lines posted per transaction
+    RECONCILIATION_MATCH_BY_AMOUNT: bool = False  # Match on amount due alone when no other key identifies the order
+
+    # Response compression
+    COMPRESSION_MIN_SIZE: int = 1024  # Bodies smaller than this (bytes) are sent uncompressed
+    COMPRESSION_GZIP_LEVEL: int = 6  # 1 (fastest) to 9 (smallest)
+    COMPRESSION_BROTLI_QUALITY: int = 4  # 0 to 11; used when the brotli package is installed
 
     # CORS Settings
     CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:8000"]
 
     # Logging
     LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "text"  # "text" or "json" (one object per line, with the access log fields)
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0  # Share of successful requests logged; errors and slow requests always are
+
+    # Instrumentation
+    METRICS_ENABLED: bool = False  # Serve per-route latency histograms at /metrics; enable only with a token or on an internal network
+    METRICS_TOKEN: str = ""  # Bearer token /metrics requires, when set
+    SLOW_REQUEST_MS: float = 1000.0  # Requests slower than this are logged with their SQL and upstream time
+    SLOW_QUERY_MS: float = 200.0  # Statements slower than this are logged (0 disables it)
+    N_PLUS_ONE_THRESHOLD: int = 10  # Executions of one statement in a request reported as a likely N+1
+    PROFILER_SAMPLE_RATE: float = 0.0  # Share of requests run under the sampling profiler (0 disables it)
+    PROFILER_INTERVAL_MS: float = 5.0  # Time between stack samples
+    PROFILER_OUTPUT_DIR: str = "profiles"  # Folded stacks of profiled slow requests are written here
 
     class Config:
         case_sensitive = True
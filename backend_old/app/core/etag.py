@@ -0,0 +1,56 @@
+import hashlib
+from typing import Any, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Clients may keep the response but must revalidate it; it's per user
+CACHE_CONTROL = "private, no-cache"
+
+
+def weak_etag(*parts: Any) -> str:
+    """Weak ETag of a version stamp, e.g. the scope of a list and its (count, max updated_at)"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches an ETag
+
+    Uses the weak comparison If-None-Match calls for: W/ prefixes are ignored.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+
+def conditional_response(request: Request, response: Response, *version: Any) -> Optional[Response]:
+    """
+    Answer a conditional GET from a version stamp
+
+    Call before loading and serializing the data. When the client's
+    If-None-Match matches, the 304 returned should be sent as is;
+    otherwise the ETag is set on the response and None is returned.
+
+    Args:
+        request: The request
+        response: The response FastAPI will send the data in
+        *version: Everything the response depends on: its scope and a cheap stamp of the data
+
+    Returns:
+        A 304 response, or None if the data has to be sent
+    """
+    etag = weak_etag(*version)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return None
@@ -0,0 +1,438 @@
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.session import pool_status
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bucket upper bounds; durations are in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+SQL_OPERATIONS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+# Innermost frames of threads that are waiting rather than working
+IDLE_FILES = ("threading.py", "selectors.py", "queue.py")
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], le: Optional[str] = None) -> str:
+    pairs = [f"{name}=\"{_escape(value)}\"" for name, value in zip(names, values)]
+    if le is not None:
+        pairs.append(f"le=\"{le}\"")
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Prometheus histogram with fixed buckets, one series per label set"""
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # Per series: count per bucket, then the sum and the total count
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            series = self._series.setdefault(labels, [0] * (len(self.buckets) + 2))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = {labels: list(values) for labels, values in self._series.items()}
+
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for labels, values in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labels, labels, str(bound))} {int(cumulative)}")
+            lines.append(f"{self.name}_bucket{_labels(self.labels, labels, '+Inf')} {int(values[-1])}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {values[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.labels, labels)} {int(values[-1])}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class MetricCounter:
+    """Prometheus counter, one series per label set"""
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str) -> None:
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = dict(self._series)
+
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(snapshot.items()):
+            lines.append(f"{self.name}{_labels(self.labels, labels)} {value}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class MetricsRegistry:
+    """
+    Request, SQL and upstream metrics of this process.
+
+    Each worker process keeps its own registry; Prometheus scrapes every
+    worker and sums the series.
+    """
+
+    def __init__(self):
+        self.request_duration = Histogram(
+            "http_request_duration_seconds", "Time to serve a request",
+            ("method", "route", "status")
+        )
+        self.request_queries = Histogram(
+            "http_request_queries", "SQL statements executed by a request",
+            ("method", "route"), QUERY_COUNT_BUCKETS
+        )
+        self.request_query_duration = Histogram(
+            "http_request_query_duration_seconds", "Time a request spent in SQL statements",
+            ("method", "route")
+        )
+        self.request_upstream_duration = Histogram(
+            "http_request_upstream_duration_seconds", "Time a request spent waiting on an upstream service",
+            ("method", "route", "service")
+        )
+        self.n_plus_one = MetricCounter(
+            "http_request_n_plus_one_total", "Requests that repeated one SQL statement past the N+1 threshold",
+            ("method", "route")
+        )
+        self.query_duration = Histogram(
+            "db_query_duration_seconds", "Time of a single SQL statement",
+            ("operation",), QUERY_BUCKETS
+        )
+        self.upstream_duration = Histogram(
+            "upstream_request_duration_seconds", "Time of a call to an upstream service",
+            ("service", "operation", "outcome")
+        )
+        self._metrics = (
+            self.request_duration, self.request_queries, self.request_query_duration,
+            self.request_upstream_duration, self.n_plus_one, self.query_duration, self.upstream_duration
+        )
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format"""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        lines.extend(self._pool_lines())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        for metric in self._metrics:
+            metric.reset()
+
+    @staticmethod
+    def _pool_lines() -> List[str]:
+        status = pool_status()
+        lines = []
+        for key, kind, description in (
+            ("checked_out", "gauge", "Connections in use"),
+            ("overflow", "gauge", "Connections open beyond the pool size"),
+            ("checkouts", "counter", "Connections handed out by the pool"),
+            ("timeouts", "counter", "Checkouts that timed out waiting for a connection")
+        ):
+            if key in status:
+                name = f"db_pool_{key}" + ("_total" if kind == "counter" else "")
+                lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}", f"{name} {status[key]}"]
+        return lines
+
+
+class RequestStats:
+    """SQL and upstream time spent while serving one request"""
+
+    def __init__(self):
+        # Sync endpoints and their helper threads share the request's stats
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.query_time = 0.0
+        self.statements: Counter = Counter()
+        self.upstream: Dict[str, float] = {}
+
+    def record_query(self, statement: str, elapsed: float) -> None:
+        with self._lock:
+            self.queries += 1
+            self.query_time += elapsed
+            self.statements[statement] += 1
+
+    def record_upstream(self, service: str, elapsed: float) -> None:
+        with self._lock:
+            self.upstream[service] = self.upstream.get(service, 0.0) + elapsed
+
+    def repeated_statements(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statements executed at least `threshold` times, the usual sign of an N+1 pattern"""
+        with self._lock:
+            return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    """Stats of the request being served, if any"""
+    return _current_request.get()
+
+
+def _shorten(statement: str, limit: int = 300) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + "..."
+
+
+def _operation(statement: str) -> str:
+    words = statement.lstrip().split(None, 1)
+    operation = words[0].upper() if words else ""
+    return operation if operation in SQL_OPERATIONS else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._instrumentation_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_instrumentation_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+
+    metrics.query_duration.observe(elapsed, _operation(statement))
+    stats = _current_request.get()
+    if stats is not None:
+        stats.record_query(statement, elapsed)
+    if settings.SLOW_QUERY_MS and elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        logger.warning(f"Slow query ({elapsed * 1000:.1f} ms): {_shorten(statement)}")
+
+
+@contextmanager
+def upstream_timer(service: str, operation: str) -> Iterator[None]:
+    """
+    Time a call to an upstream service
+
+    The time goes to the upstream histogram and to the current request's
+    stats, so a slow request shows how much of it was spent waiting.
+
+    Args:
+        service: Upstream service name, e.g. "correios"
+        operation: Kind of call, e.g. "track"
+    """
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.upstream_duration.observe(elapsed, service, operation, outcome)
+        stats = _current_request.get()
+        if stats is not None:
+            stats.record_upstream(service, elapsed)
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stack of every thread at a fixed interval.
+
+    Samples are aggregated as folded stacks ("outer;inner count"), the
+    input format of flamegraph.pl and speedscope. Idle threads and other
+    profilers are left out; requests served at the same time as the
+    profiled one do show up, since threads aren't tied to requests.
+    """
+
+    _sampler_threads: Set[int] = set()
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        """Stop sampling and return the folded stacks with their sample counts"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.samples
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        self._sampler_threads.add(own)
+        try:
+            while not self._stop.wait(self.interval):
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id in self._sampler_threads:
+                        continue
+                    stack = self.fold(frame)
+                    if stack:
+                        self.samples[stack] += 1
+        finally:
+            self._sampler_threads.discard(own)
+
+    @staticmethod
+    def fold(frame) -> Optional[str]:
+        """Folded stack of a frame, outermost call first; None for idle threads"""
+        if os.path.basename(frame.f_code.co_filename) in IDLE_FILES:
+            return None
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+
+def write_profile(samples: Counter, method: str, path: str, elapsed: float) -> Optional[str]:
+    """
+    Save the folded stacks of a profiled request
+
+    Args:
+        samples: Folded stacks and their sample counts
+        method: HTTP method of the request
+        path: Path of the request
+        elapsed: Request duration in seconds
+
+    Returns:
+        The file written, or None if there were no samples
+    """
+    if not samples:
+        return None
+    os.makedirs(settings.PROFILER_OUTPUT_DIR, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", path).strip("-") or "root"
+    filename = os.path.join(
+        settings.PROFILER_OUTPUT_DIR,
+        f"{datetime.utcnow():%Y%m%d-%H%M%S-%f}-{method}-{slug}-{int(elapsed * 1000)}ms.folded"
+    )
+    with open(filename, "w") as output:
+        for stack, count in samples.most_common():
+            output.write(f"{stack} {count}\n")
+    return filename
+
+
+class InstrumentationMiddleware:
+    """
+    ASGI middleware that measures every HTTP request.
+
+    Records the request's latency, SQL statement count and time, and
+    upstream time in per-route histograms; RequestLoggingMiddleware puts
+    that breakdown in the access record of slow requests. A statement
+    repeated past N_PLUS_ONE_THRESHOLD times in one request is reported
+    as a likely N+1 query. A share of requests (PROFILER_SAMPLE_RATE)
+    runs under the sampling profiler, and the profiles of the slow ones
+    are written to PROFILER_OUTPUT_DIR.
+    """
+
+    def __init__(self, app, registry: Optional[MetricsRegistry] = None):
+        self.app = app
+        self.registry = registry or metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        profiler = None
+        if settings.PROFILER_SAMPLE_RATE > 0 and random.random() < settings.PROFILER_SAMPLE_RATE:
+            profiler = SamplingProfiler(settings.PROFILER_INTERVAL_MS / 1000)
+            profiler.start()
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_request.reset(token)
+            # Joining the sampler thread and writing the profile block, so both run off the event loop
+            samples = await run_in_threadpool(profiler.stop) if profiler is not None else None
+            slow = self._report(scope, status_code, elapsed, stats)
+            if slow and samples is not None:
+                profile = await run_in_threadpool(write_profile, samples, scope["method"], scope["path"], elapsed)
+                if profile:
+                    logger.warning(f"Profile of {scope['method']} {scope['path']} written to {profile}")
+
+    def _report(self, scope, status_code: int, elapsed: float, stats: RequestStats) -> bool:
+        """Record the request's metrics; returns whether it was slow"""
+        method = scope["method"]
+        # The route template keeps the label set bounded, unlike the raw path
+        route = getattr(scope.get("route"), "path", None) or "unmatched"
+
+        self.registry.request_duration.observe(elapsed, method, route, str(status_code))
+        self.registry.request_queries.observe(stats.queries, method, route)
+        self.registry.request_query_duration.observe(stats.query_time, method, route)
+        for service, upstream_time in stats.upstream.items():
+            self.registry.request_upstream_duration.observe(upstream_time, method, route, service)
+
+        repeated = stats.repeated_statements(settings.N_PLUS_ONE_THRESHOLD)
+        if repeated:
+            self.registry.n_plus_one.inc(method, route)
+            for statement, count in repeated:
+                logger.warning(f"Possible N+1 query in {method} {route}: {count} executions of {_shorten(statement)}")
+
+        # RequestLoggingMiddleware logs slow requests, with this breakdown, in their access record
+        return elapsed * 1000 >= settings.SLOW_REQUEST_MS
+
+
+# Create a singleton instance
+metrics = MetricsRegistry()
+
+# Every engine, including replicas and the async engines' sync core
+event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,71 @@
+import atexit
+import json
+import logging
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, TextIO
+
+from app.core.config import settings
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+_listener: Optional[QueueListener] = None
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves all formatting to the listener thread.
+
+    The stock handler formats the message (and any traceback) before
+    queueing it, on the thread that logged. Here the record is queued
+    as is, so a log call on the request path costs a queue put.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with the fields passed in `extra={"fields": ...}`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(stream: Optional[TextIO] = None) -> None:
+    """
+    Send log records through a queue to a background writer
+
+    Records are formatted (as text, or JSON with LOG_FORMAT=json) and
+    written by a QueueListener thread, off the request path. Calling it
+    again has no effect.
+
+    Args:
+        stream: Where the records are written (stderr by default)
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(stream)
+    output.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+
+    records: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    _listener = QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    # Drain what's queued when the process exits
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, settings.LOG_LEVEL))
+    root.addHandler(DeferredQueueHandler(records))
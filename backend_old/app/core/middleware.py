@@ -1,49 +1,95 @@
+import random
 import time
 import logging
-from fastapi import Request, Response
+from typing import Optional
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
 from starlette.responses import JSONResponse
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.instrumentation import InstrumentationMiddleware, current_request_stats
 
 logger = logging.getLogger(__name__)
+access_logger = logging.getLogger("app.access")
+
+class RequestLoggingMiddleware:
+    """
+    ASGI middleware for access logging, timing and error capture.
+
+    Writes one access log record per request once the response is sent,
+    with the method, path, status and duration as structured fields.
+    Successful requests are sampled at ACCESS_LOG_SAMPLE_RATE; errors and
+    slow requests are always logged. Under InstrumentationMiddleware the
+    record also carries the request's SQL and upstream time. The response
+    passes through untouched apart from an X-Process-Time header, so
+    streaming responses stream.
+    """
+
+    def __init__(self, app, sample_rate: Optional[float] = None):
+        self.app = app
+        self.sample_rate = settings.ACCESS_LOG_SAMPLE_RATE if sample_rate is None else sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        response_started = False
+
+        async def send_with_timing(message):
+            nonlocal status_code, response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = message["status"]
+                MutableHeaders(scope=message)["X-Process-Time"] = str(time.perf_counter() - start)
+            await send(message)
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware for logging requests and responses"""
-    
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        
-        # Log request
-        logger.info(f"Request: {request.method} {request.url.path}")
-        
-        # Process request
         try:
-            response = await call_next(request)
-            process_time = time.time() - start_time
-            
-            # Log response
-            logger.info(
-                f"Response: {request.method} {request.url.path} - Status: {response.status_code} - Time: {process_time:.3f}s"
-            )
-            
-            # Add processing time header
-            response.headers["X-Process-Time"] = str(process_time)
-            return response
-        except Exception as e:
-            process_time = time.time() - start_time
-            logger.error(
-                f"Error: {request.method} {request.url.path} - Error: {str(e)} - Time: {process_time:.3f}s"
-            )
-            return JSONResponse(
+            await self.app(scope, receive, send_with_timing)
+        except Exception:
+            logger.exception("Unhandled error in %s %s", scope["method"], scope["path"])
+            if response_started:
+                # Part of the response is out; the server closes the connection
+                raise
+            await JSONResponse(
                 status_code=500,
-                content={"detail": "Internal server error"}
-            )
+                content={"detail": "Internal server error", "error_code": "server_error"}
+            )(scope, receive, send_with_timing)
+        finally:
+            self._log(scope, status_code, time.perf_counter() - start)
+
+    def _log(self, scope, status_code: int, duration: float) -> None:
+        slow = duration * 1000 >= settings.SLOW_REQUEST_MS
+        if status_code < 500 and not slow and (self.sample_rate <= 0 or random.random() >= self.sample_rate):
+            return
+
+        level = logging.ERROR if status_code >= 500 else logging.WARNING if slow else logging.INFO
+        client = scope.get("client")
+        fields = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status_code,
+            "duration_ms": round(duration * 1000, 3),
+            "client": client[0] if client else None,
+            "sampled": status_code < 500 and not slow
+        }
+        stats = current_request_stats()
+        if stats is not None:
+            fields["sql_queries"] = stats.queries
+            fields["sql_ms"] = round(stats.query_time * 1000, 3)
+            fields["upstream_ms"] = {service: round(elapsed * 1000, 3) for service, elapsed in stats.upstream.items()}
+        # Arguments are merged into the message by the log writer thread
+        access_logger.log(
+            level, "%s %s %d %.1fms", scope["method"], scope["path"], status_code, duration * 1000,
+            extra={"fields": fields}
+        )
 
 
 def setup_middlewares(app):
     """Setup middlewares for the application"""
-    
+
     # CORS middleware
     app.add_middleware(
         CORSMiddleware,
@@ -52,6 +98,12 @@ def setup_middlewares(app):
         allow_methods=["*"],
         allow_headers=["*"],
     )
-    
+
+    # Compress large responses; inside the logging and timing middlewares so they include it
+    app.add_middleware(CompressionMiddleware)
+
     # Request logging middleware
     app.add_middleware(RequestLoggingMiddleware)
+
+    # Latency histograms, SQL and upstream time per request; outermost so it times the whole stack
+    app.add_middleware(InstrumentationMiddleware)
@@ -0,0 +1,90 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Annotated, Any, Optional, Union
+from pydantic import BeforeValidator, PlainSerializer
+from sqlalchemy.types import BigInteger, Numeric, TypeDecorator
+
+CENT = Decimal("0.01")
+
+MoneyInput = Union[Decimal, float, int, str]
+
+
+def to_money(value: MoneyInput) -> Decimal:
+    """
+    Convert an amount to an exact two-place Decimal
+
+    Floats go through their shortest repr, so 0.1 becomes 0.10 rather
+    than 0.1000000000000000055511151231257827.
+
+    Args:
+        value: Amount in reais
+
+    Returns:
+        The amount rounded half-up to the cent
+    """
+    if isinstance(value, float):
+        value = repr(value)
+    return Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def to_cents(value: MoneyInput) -> int:
+    """Amount in whole cents"""
+    return int(to_money(value) * 100)
+
+
+def from_cents(cents: int) -> Decimal:
+    """Amount in reais of a number of cents"""
+    return (Decimal(int(cents)) / 100).quantize(CENT)
+
+
+class Money(TypeDecorator):
+    """
+    Column type for amounts of money, read and written as Decimal.
+
+    Stored as NUMERIC(12, 2) where the database has exact decimals. SQLite
+    would keep NUMERIC as a float, so there the column holds integer cents.
+    Either way SUM() in the database is exact, and aggregates over a Money
+    column come back as Decimal.
+    """
+
+    impl = Numeric(12, 2)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "sqlite":
+            return dialect.type_descriptor(BigInteger())
+        return dialect.type_descriptor(Numeric(12, 2, asdecimal=True))
+
+    def process_bind_param(self, value: Optional[MoneyInput], dialect) -> Any:
+        if value is None:
+            return None
+        if dialect.name == "sqlite":
+            return to_cents(value)
+        return to_money(value)
+
+    def process_result_value(self, value: Any, dialect) -> Optional[Decimal]:
+        if value is None:
+            return None
+        if dialect.name == "sqlite":
+            return from_cents(value)
+        return to_money(value)
+
+    @property
+    def python_type(self):
+        return Decimal
+
+
+def _validate_money(value: Any) -> Any:
+    if isinstance(value, bool) or not isinstance(value, (Decimal, float, int, str)):
+        return value
+    try:
+        return to_money(value)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value!r}")
+
+
+# Amount field for schemas: validated into an exact Decimal, sent as a JSON number
+MoneyAmount = Annotated[
+    Decimal,
+    BeforeValidator(_validate_money),
+    PlainSerializer(float, return_type=float, when_used="json")
+]
@@ -0,0 +1,98 @@
+from typing import Any, AsyncIterator, Dict, Optional
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from app.core.config import settings
+
+# Async driver for each sync URL scheme
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite"
+}
+
+
+def async_database_uri(database_uri: str) -> str:
+    """
+    Rewrite a database URI to use the async driver of its backend
+
+    Args:
+        database_uri: URI as configured for the sync engine
+
+    Returns:
+        The same database, e.g. postgresql+asyncpg:// for postgresql://
+    """
+    url = make_url(database_uri)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver for {url.get_backend_name()} databases")
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def async_engine_options(database_uri: str) -> Dict[str, Any]:
+    """
+    Engine arguments for the async engine, from the same DB_* settings as
+    the sync pool (see app.db.session.engine_options)
+    """
+    url = make_url(database_uri)
+    options: Dict[str, Any] = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return options
+
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE or -1,
+        pool_use_lifo=True
+    )
+
+    if url.get_backend_name() == "postgresql":
+        connect_args: Dict[str, Any] = {"timeout": settings.DB_CONNECT_TIMEOUT}
+        if settings.DB_STATEMENT_TIMEOUT_MS:
+            connect_args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+        options["connect_args"] = connect_args
+    elif url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"timeout": settings.DB_CONNECT_TIMEOUT}
+
+    return options
+
+
+def create_async_session_factory(database_uri: str) -> async_sessionmaker:
+    """Build an async session factory for a (sync-style) database URI"""
+    engine = create_async_engine(async_database_uri(database_uri), **async_engine_options(database_uri))
+    # Attributes stay loaded after commit: lazy refreshes can't happen outside an await
+    return async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+_session_factory: Optional[async_sessionmaker] = None
+
+
+def get_async_session_factory() -> async_sessionmaker:
+    """
+    Session factory of the application database
+
+    Created on first use, so workers that never use the async layer don't
+    need the async driver installed.
+    """
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = create_async_session_factory(settings.SQLALCHEMY_DATABASE_URI)
+    return _session_factory
+
+
+def get_async_engine() -> AsyncEngine:
+    return get_async_session_factory().kw["bind"]
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    # Like get_db, the connection is only checked out on the first statement
+    async with get_async_session_factory()() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    """Close the async pool's connections (on shutdown)"""
+    global _session_factory
+    if _session_factory is not None:
+        await _session_factory.kw["bind"].dispose()
+        _session_factory = None
@@ -0,0 +1,20 @@
+from typing import Any, Iterator, Sequence
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+# Rows per INSERT statement, well under the bind parameter limit (32766 on SQLite)
+BATCH_SIZE = 500
+
+
+def chunks(values: Sequence[Any], size: int = BATCH_SIZE) -> Iterator[Sequence[Any]]:
+    """Split rows into slices of at most `size`, one per multi-row statement"""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def dialect_insert(db: Session):
+    """The insert() of the session's dialect, which supports ON CONFLICT clauses"""
+    # ON CONFLICT is dialect specific in SQLAlchemy
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert
+    return postgresql.insert
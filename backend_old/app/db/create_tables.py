@@ -9,11 +9,15 @@ from app.core.security import get_password_hash
 # Import all models to ensure they are registered with Base
 from app.models.order import Order, BillingHistory
 from app.models.setting import Setting
-from app.models.tracking_history import TrackingHistory
+from app.models.tracking_history import TrackingHistory, TrackingDailySummary
+from app.models.tracking_event import TrackingEvent, TrackedObject
+from app.models.rate_limit import RateLimitBucket
+from app.models.reconciliation import ReconciliationBatch, ReconciliationItem
 from app.models.nutra_product import (
     NutraProduct, Kit, KitProduct, Distributor,
     DistributorOrder, DistributorOrderItem, StockHistory,
-    KitSale, ProductType, OrderStatus, StockChangeReason
+    KitSale, ProductType, OrderStatus, StockChangeReason,
+    StockConsumptionDaily, ReplenishmentForecast
 )
 
 def create_tables():
@@ -0,0 +1,180 @@
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.config import settings
+from app.db.session import SessionLocal, engine, engine_options
+
+logger = logging.getLogger(__name__)
+
+# Seconds of replay lag on a Postgres standby (0 when it has replayed everything it received)
+POSTGRES_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def query_replica_lag(replica: Engine) -> float:
+    """
+    Measure how far a replica is behind the primary
+
+    Args:
+        replica: Engine connected to the replica
+
+    Returns:
+        Lag in seconds (always 0 for databases without replication, e.g. SQLite)
+    """
+    if replica.dialect.name != "postgresql":
+        return 0.0
+    with replica.connect() as connection:
+        return float(connection.execute(POSTGRES_LAG_QUERY).scalar() or 0.0)
+
+
+class ReplicaRouter:
+    """
+    Chooses the database a read-only session talks to.
+
+    Replicas are used in turn while their lag stays under max_lag; the lag
+    of each replica is measured at most every check_interval seconds and a
+    replica that can't be reached counts as lagging. A user who committed
+    a write in the last sticky_seconds reads from the primary, so they see
+    their own changes. With no healthy replica, reads go to the primary.
+    """
+
+    def __init__(
+        self,
+        primary: Engine,
+        replicas: List[Engine],
+        max_lag: float = 5.0,
+        check_interval: float = 5.0,
+        sticky_seconds: float = 10.0,
+        lag_probe: Callable[[Engine], float] = query_replica_lag
+    ):
+        self.primary = primary
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.sticky_seconds = sticky_seconds
+        self.lag_probe = lag_probe
+
+        self._lock = threading.Lock()
+        self._turn = itertools.cycle(range(len(replicas))) if replicas else None
+        self._lag: Dict[int, float] = {}
+        self._checked_at: Dict[int, float] = {}
+        self._last_write: Dict[int, float] = {}
+
+    def note_write(self, user_id: Optional[int]) -> None:
+        """Send the user's reads to the primary for the next sticky_seconds"""
+        if user_id is None or not self.replicas:
+            return
+        with self._lock:
+            self._last_write[user_id] = time.monotonic()
+            self._forget_old_writes()
+
+    def read_engine(self, user_id: Optional[int] = None) -> Engine:
+        """
+        Pick the engine for a read-only session
+
+        Args:
+            user_id: ID of the user the session reads for
+
+        Returns:
+            A replica that is caught up enough, or the primary
+        """
+        return self.replica_for(user_id) or self.primary
+
+    def replica_for(self, user_id: Optional[int] = None) -> Optional[Engine]:
+        """The replica a user's reads should go to, or None for the primary"""
+        if not self.replicas or self._recently_wrote(user_id):
+            return None
+
+        for _ in range(len(self.replicas)):
+            with self._lock:
+                index = next(self._turn)
+            if self._lag_of(index) <= self.max_lag:
+                return self.replicas[index]
+
+        logger.warning("No replica within the lag limit, reading from the primary")
+        return None
+
+    def status(self) -> List[Dict[str, object]]:
+        """Last measured lag of each replica"""
+        with self._lock:
+            return [
+                {"url": replica.url.render_as_string(hide_password=True), "lag": self._lag.get(index)}
+                for index, replica in enumerate(self.replicas)
+            ]
+
+    def _recently_wrote(self, user_id: Optional[int]) -> bool:
+        if user_id is None:
+            return False
+        with self._lock:
+            written_at = self._last_write.get(user_id)
+        return written_at is not None and time.monotonic() - written_at < self.sticky_seconds
+
+    def _lag_of(self, index: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at.get(index, float("-inf")) < self.check_interval:
+                return self._lag[index]
+
+        try:
+            lag = self.lag_probe(self.replicas[index])
+        except Exception as e:
+            logger.warning(f"Could not check replica {index}: {str(e)}")
+            lag = float("inf")
+
+        with self._lock:
+            self._lag[index] = lag
+            self._checked_at[index] = now
+        return lag
+
+    def _forget_old_writes(self) -> None:
+        cutoff = time.monotonic() - self.sticky_seconds
+        for user_id in [user_id for user_id, written_at in self._last_write.items() if written_at < cutoff]:
+            del self._last_write[user_id]
+
+
+def track_writes(session_factory: sessionmaker, router: ReplicaRouter) -> None:
+    """
+    Make reads sticky for users who commit a write
+
+    A session writes when it flushes or runs a bulk INSERT, UPDATE or
+    DELETE; when it then commits, the user in session.info["user_id"]
+    (set by get_current_user) is reported to the router.
+    """
+    def after_flush(session: Session, flush_context) -> None:
+        session.info["wrote"] = True
+
+    def do_orm_execute(orm_execute_state) -> None:
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            orm_execute_state.session.info["wrote"] = True
+
+    def after_commit(session: Session) -> None:
+        if session.info.pop("wrote", False):
+            router.note_write(session.info.get("user_id"))
+
+    event.listen(session_factory, "after_flush", after_flush)
+    event.listen(session_factory, "do_orm_execute", do_orm_execute)
+    event.listen(session_factory, "after_commit", after_commit)
+
+
+def create_replica_router() -> ReplicaRouter:
+    """Build the router for the replicas in DB_REPLICA_URIS"""
+    replicas = [create_engine(uri, **engine_options(uri)) for uri in settings.DB_REPLICA_URIS]
+    return ReplicaRouter(
+        primary=engine,
+        replicas=replicas,
+        max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+        check_interval=settings.DB_REPLICA_LAG_CHECK_INTERVAL,
+        sticky_seconds=settings.DB_READ_YOUR_WRITES_SECONDS
+    )
+
+
+# Create a singleton instance
+replica_router = create_replica_router()
+track_writes(SessionLocal, replica_router)
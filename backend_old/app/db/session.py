@@ -1,13 +1,144 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from typing import Any, Dict, Optional
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import ConnectionPoolEntry, QueuePool
 from app.core.config import settings
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
+
+class PoolMetrics:
+    """Checkout counters for a connection pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+
+    def record_checkout(self, wait: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait": self.total_wait / self.checkouts if self.checkouts else 0.0,
+                "max_wait": self.max_wait
+            }
+
+
+class MeteredQueuePool(QueuePool):
+    """
+    QueuePool that times every checkout.
+
+    The wait covers queueing for a free connection and opening an overflow
+    one, which is what a request feels when the pool is undersized.
+    """
+
+    def __init__(self, *args, metrics: Optional[PoolMetrics] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics or PoolMetrics()
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start)
+        return connection
+
+    def recreate(self) -> "MeteredQueuePool":
+        # Keep the counters when the engine replaces the pool after a disconnect
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def engine_options(database_uri: str) -> Dict[str, Any]:
+    """
+    Engine arguments for a database URI, from the DB_* settings
+
+    Each worker process holds up to DB_POOL_SIZE + DB_MAX_OVERFLOW
+    connections, which must fit within the server's max_connections
+    across all workers. In-memory SQLite keeps its single-connection pool.
+    """
+    url = make_url(database_uri)
+    options: Dict[str, Any] = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return options
+
+    options.update(
+        poolclass=MeteredQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE or -1,
+        pool_use_lifo=True  # Idle connections beyond the busy set age out and get recycled
+    )
+
+    if url.get_backend_name() == "postgresql":
+        connect_args: Dict[str, Any] = {"connect_timeout": settings.DB_CONNECT_TIMEOUT}
+        if settings.DB_STATEMENT_TIMEOUT_MS:
+            connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+        options["connect_args"] = connect_args
+    elif url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"timeout": settings.DB_CONNECT_TIMEOUT, "check_same_thread": False}
+
+    return options
+
+
+def pool_status(bind: Optional[Engine] = None) -> Dict[str, Any]:
+    """
+    Current state of an engine's connection pool
+
+    Args:
+        bind: Engine to inspect (defaults to the application engine)
+
+    Returns:
+        Pool size and usage, plus checkout counters for metered pools
+    """
+    pool = (bind or engine).pool
+    status: Dict[str, Any] = {"pool": type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(0, pool.overflow())
+        )
+    if isinstance(pool, MeteredQueuePool):
+        status.update(pool.metrics.snapshot())
+    return status
+
+
+engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, **engine_options(settings.SQLALCHEMY_DATABASE_URI))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
+    # Sessions check out a connection on their first statement only, so
+    # handing one to a request that never queries costs no pool slot
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
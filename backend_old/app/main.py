@@ -1,13 +1,30 @@
 import logging
-from fastapi import FastAPI, Request, status
-from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+import secrets
+from typing import Optional
+from fastapi import FastAPI, Header, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi.openapi.docs import get_swagger_ui_html, get_redoc_html
 from fastapi.openapi.utils import get_openapi
 from app.core.config import settings
+from app.core.logging_config import configure_logging
 from app.core.middleware import setup_middlewares
-from app.core.errors import AppError
+from app.core.errors import AppError, AuthenticationError, NotFoundError
+from app.core.instrumentation import PROMETHEUS_CONTENT_TYPE, metrics
 from app.api.api_v1.api import api_router
+from app.services.tracking_recorder import tracking_recorder
+from app.services.correios_client import correios_client
+from app.db.async_session import dispose_async_engine
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tracking_recorder.start()
+    yield
+    # Write buffered tracking history before the process exits
+    tracking_recorder.stop()
+    correios_client.close()
+    await dispose_async_engine()
 
 app = FastAPI(
     title="Sistema de Cobrança Inteligente",
@@ -15,14 +32,15 @@ app = FastAPI(
     version="1.0.0",
     docs_url=None,  # Disable default docs
     redoc_url=None,  # Disable default redoc
-    openapi_url=None if settings.ENVIRONMENT == "production" else "/openapi.json"
+    openapi_url=None if settings.ENVIRONMENT == "production" else "/openapi.json",
+    lifespan=lifespan
 )
 
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, settings.LOG_LEVEL),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+# Configure logging; records are written by a background thread
+configure_logging()
+
+if settings.METRICS_ENABLED and not settings.METRICS_TOKEN:
+    logging.warning("/metrics is enabled without METRICS_TOKEN; expose it on an internal network only")
 
 # Setup middlewares
 setup_middlewares(app)
@@ -105,6 +123,20 @@ async def get_openapi_schema():
     app.openapi_schema = openapi_schema
     return app.openapi_schema
 
+@app.get("/metrics", include_in_schema=False)
+def get_metrics(authorization: Optional[str] = Header(None)):
+    """
+    Request latency, SQL and upstream metrics in the Prometheus text format
+
+    Off unless METRICS_ENABLED is set: it lists every route and its
+    latencies. Without METRICS_TOKEN it is open to anyone who can reach it.
+    """
+    if not settings.METRICS_ENABLED:
+        raise NotFoundError()
+    if settings.METRICS_TOKEN and not secrets.compare_digest(authorization or "", f"Bearer {settings.METRICS_TOKEN}"):
+        raise AuthenticationError()
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 @app.get("/")
 async def root():
     return {"message": "Sistema de Cobrança Inteligente API"}
\ No newline at end of file
@@ -0,0 +1,8 @@
+-- Add supplier SKU to product variations (used by catalog sync)
+ALTER TABLE product_variations ADD COLUMN IF NOT EXISTS sku VARCHAR;
+
+-- Catalog sync upserts variations with ON CONFLICT (sku)
+CREATE UNIQUE INDEX IF NOT EXISTS ix_product_variations_sku ON product_variations(sku);
+
+-- Catalog sync upserts products with ON CONFLICT (name); merge duplicate names first
+CREATE UNIQUE INDEX IF NOT EXISTS ix_nutra_products_name ON nutra_products(name);
@@ -0,0 +1,8 @@
+-- Per-variation stock history ordered by (created_at, id), used for keyset pagination
+CREATE INDEX IF NOT EXISTS ix_nutra_stock_history_variation_created ON nutra_stock_history(variation_id, created_at, id);
+
+-- History across all variations and date range filters
+CREATE INDEX IF NOT EXISTS ix_nutra_stock_history_created ON nutra_stock_history(created_at, id);
+
+-- Lookups by the entity that caused the change (kit sale, distributor order)
+CREATE INDEX IF NOT EXISTS ix_nutra_stock_history_reference ON nutra_stock_history(reference_type, reference_id);
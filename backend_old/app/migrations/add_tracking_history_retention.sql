@@ -0,0 +1,19 @@
+-- Per-user history ordered by timestamp, used by the history endpoint and the per-user cap
+CREATE INDEX IF NOT EXISTS ix_tracking_history_user_timestamp ON trackinghistory(user_id, timestamp);
+
+-- Daily rollup of tracking history entries removed by retention
+CREATE TABLE IF NOT EXISTS trackingdailysummary (
+    id SERIAL PRIMARY KEY,
+    tracking_code VARCHAR NOT NULL,
+    user_id INTEGER,
+    day DATE NOT NULL,
+    lookups INTEGER DEFAULT 0 NOT NULL,
+    failures INTEGER DEFAULT 0 NOT NULL,
+    first_seen TIMESTAMP NOT NULL,
+    last_seen TIMESTAMP NOT NULL,
+    last_status VARCHAR NOT NULL,
+    CONSTRAINT uq_tracking_daily_summary_code_user_day UNIQUE (tracking_code, user_id, day)
+);
+
+CREATE INDEX IF NOT EXISTS ix_trackingdailysummary_id ON trackingdailysummary(id);
+CREATE INDEX IF NOT EXISTS ix_tracking_daily_summary_user_day ON trackingdailysummary(user_id, day);
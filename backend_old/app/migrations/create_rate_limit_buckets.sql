@@ -0,0 +1,10 @@
+-- Token buckets shared by all workers (CORREIOS_RATE_LIMIT_BACKEND=database)
+CREATE TABLE IF NOT EXISTS ratelimitbucket (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR NOT NULL,
+    tokens DOUBLE PRECISION NOT NULL,
+    updated_at DOUBLE PRECISION NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_ratelimitbucket_id ON ratelimitbucket(id);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_ratelimitbucket_name ON ratelimitbucket(name);
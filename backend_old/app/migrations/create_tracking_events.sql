@@ -0,0 +1,30 @@
+-- Tracking events, stored once per (tracking code, event time)
+CREATE TABLE IF NOT EXISTS trackingevent (
+    id SERIAL PRIMARY KEY,
+    tracking_code VARCHAR NOT NULL,
+    occurred_at TIMESTAMP NOT NULL,
+    data VARCHAR NOT NULL,
+    hora VARCHAR NOT NULL,
+    local VARCHAR NOT NULL DEFAULT '',
+    status VARCHAR NOT NULL,
+    sub_status VARCHAR,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    CONSTRAINT uq_tracking_event_code_occurred UNIQUE (tracking_code, occurred_at)
+);
+
+CREATE INDEX IF NOT EXISTS ix_trackingevent_id ON trackingevent(id);
+
+-- Latest known state of each tracking code
+CREATE TABLE IF NOT EXISTS trackedobject (
+    id SERIAL PRIMARY KEY,
+    tracking_code VARCHAR NOT NULL,
+    servico VARCHAR,
+    entregue BOOLEAN DEFAULT FALSE NOT NULL,
+    last_event_id INTEGER REFERENCES trackingevent(id),
+    last_event_at TIMESTAMP,
+    last_status VARCHAR,
+    last_checked_at TIMESTAMP NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_trackedobject_id ON trackedobject(id);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_trackedobject_tracking_code ON trackedobject(tracking_code);
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Enum, Text, Boolean, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -17,7 +17,7 @@ class NutraProduct(Base):
     __tablename__ = "nutra_products"
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, nullable=False)
+    name = Column(String, unique=True, index=True, nullable=False)  # Catalog sync upserts on it
     description = Column(Text, nullable=True)
     active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -34,6 +34,7 @@ class ProductVariation(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("nutra_products.id"), nullable=False)
+    sku = Column(String, unique=True, index=True, nullable=True)  # Supplier SKU used by catalog sync
     type = Column(Enum(ProductType), nullable=False)
     cost = Column(Float, nullable=False)
     sale_price = Column(Float, nullable=False)
@@ -151,6 +152,12 @@ class StockChangeReason(str, enum.Enum):
 
 class StockHistory(Base):
     __tablename__ = "nutra_stock_history"
+    __table_args__ = (
+        # Backs per-variation history with keyset pagination on (created_at, id)
+        Index("ix_nutra_stock_history_variation_created", "variation_id", "created_at", "id"),
+        Index("ix_nutra_stock_history_created", "created_at", "id"),
+        Index("ix_nutra_stock_history_reference", "reference_type", "reference_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     variation_id = Column(Integer, ForeignKey("product_variations.id"), nullable=False)
@@ -186,3 +193,36 @@ class KitSale(Base):
 
     def __repr__(self):
         return f"<KitSale {self.kit_id} x{self.quantity}>"
+
+class StockConsumptionDaily(Base):
+    __tablename__ = "nutra_stock_consumption_daily"
+    __table_args__ = (
+        UniqueConstraint("variation_id", "day", name="uq_stock_consumption_daily_variation_day"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    variation_id = Column(Integer, ForeignKey("product_variations.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    quantity = Column(Integer, nullable=False, default=0)  # Units consumed by kit sales on this day
+
+    # Relationships
+    variation = relationship("ProductVariation")
+
+    def __repr__(self):
+        return f"<StockConsumptionDaily {self.variation_id} {self.day} x{self.quantity}>"
+
+class ReplenishmentForecast(Base):
+    __tablename__ = "nutra_replenishment_forecasts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    variation_id = Column(Integer, ForeignKey("product_variations.id"), nullable=False, unique=True)
+    daily_velocity = Column(Float, nullable=False)  # Expected units consumed per day
+    days_until_stockout = Column(Float, nullable=True)  # Null when there is no consumption
+    suggested_quantity = Column(Integer, nullable=False, default=0)
+    computed_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    variation = relationship("ProductVariation")
+
+    def __repr__(self):
+        return f"<ReplenishmentForecast {self.variation_id} +{self.suggested_quantity}>"
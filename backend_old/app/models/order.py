@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text, Boolean, Index, text
 from sqlalchemy.orm import relationship
+from app.core.money import Money
 from app.db.base import Base
 import enum
 from datetime import datetime
@@ -15,14 +16,31 @@ class OrderStatus(str, enum.Enum):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Collector work queues: by collector, then status, newest first
+        Index("ix_orders_collector_status_created", "collector_id", "status", "created_at"),
+        Index("ix_orders_seller_created", "seller_id", "created_at"),
+        Index("ix_orders_status_created", "status", "created_at"),
+        Index("ix_orders_created_at", "created_at"),
+        # Duplicate detection groups orders by phone
+        Index("ix_orders_customer_phone", "customer_phone"),
+        Index("ix_orders_tracking_code", "tracking_code"),
+        # Only a handful of orders are duplicates; the partial index stays tiny
+        Index(
+            "ix_orders_duplicates",
+            "id",
+            postgresql_where=text("is_duplicate = true"),
+            sqlite_where=text("is_duplicate = 1")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     order_number = Column(String, unique=True, index=True, nullable=False)
     customer_name = Column(String, nullable=False)
     customer_phone = Column(String, nullable=False)
     customer_address = Column(String, nullable=False)
-    total_amount = Column(Float, nullable=False)
-    paid_amount = Column(Float, default=0.0)
+    total_amount = Column(Money, nullable=False)
+    paid_amount = Column(Money, default=0)
     status = Column(Enum(OrderStatus), default=OrderStatus.PENDING)
     tracking_code = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -45,11 +63,13 @@ class BillingHistory(Base):
     __tablename__ = "billing_history"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
-    amount = Column(Float, nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
+    amount = Column(Money, nullable=False)
     notes = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
     created_by = Column(Integer, ForeignKey("users.id"))
+    # Client-chosen key of the payment; a retried payment is never applied twice
+    idempotency_key = Column(String, unique=True, index=True, nullable=True)
     
     # Relationships
     order = relationship("Order", back_populates="billing_history")
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String, Float
+from app.db.base import Base
+
+
+class RateLimitBucket(Base):
+    """Token bucket shared by all workers calling a rate-limited upstream"""
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True, nullable=False)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)  # Epoch seconds of the last refill
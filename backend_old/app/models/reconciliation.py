@@ -0,0 +1,54 @@
+import enum
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text, Index
+from sqlalchemy.orm import relationship
+from app.core.money import Money
+from app.db.base import Base
+
+
+class ReconciliationItemStatus(str, enum.Enum):
+    PENDING = "pending"  # Waiting for someone to pick the order
+    RESOLVED = "resolved"  # Posted by hand to an order
+    IGNORED = "ignored"  # Not a customer payment
+
+
+class ReconciliationBatch(Base):
+    """One imported bank or PIX statement"""
+    id = Column(Integer, primary_key=True, index=True)
+    filename = Column(String, nullable=True)
+    format = Column(String, nullable=False)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    lines = Column(Integer, default=0, nullable=False)
+    matched = Column(Integer, default=0, nullable=False)
+    already_posted = Column(Integer, default=0, nullable=False)
+    unmatched = Column(Integer, default=0, nullable=False)
+    skipped = Column(Integer, default=0, nullable=False)  # Debits, zero amounts, unreadable and ignored lines
+    posted_amount = Column(Money, default=0, nullable=False)
+
+    items = relationship("ReconciliationItem", back_populates="batch")
+
+
+class ReconciliationItem(Base):
+    """Statement line that couldn't be matched to an order, queued for review"""
+    id = Column(Integer, primary_key=True, index=True)
+    batch_id = Column(Integer, ForeignKey("reconciliationbatch.id"), nullable=False)
+    line_number = Column(Integer, nullable=False)
+    transaction_id = Column(String, unique=True, nullable=False)  # Re-imported lines are queued once
+    posted_at = Column(DateTime, nullable=True)
+    amount = Column(Money, nullable=False)
+    payer_name = Column(String, nullable=True)
+    payer_phone = Column(String, nullable=True)
+    description = Column(Text, nullable=True)
+    reason = Column(String, nullable=False)  # Why the line wasn't matched
+    status = Column(Enum(ReconciliationItemStatus), default=ReconciliationItemStatus.PENDING, nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=True)
+    resolved_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    resolved_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # The review queue lists pending items, oldest first
+        Index("ix_reconciliationitem_status_id", "status", "id"),
+    )
+
+    batch = relationship("ReconciliationBatch", back_populates="items")
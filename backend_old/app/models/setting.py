@@ -1,7 +1,15 @@
+import threading
+import time
+import uuid
+from typing import Dict, Optional
 from sqlalchemy import Column, Integer, String, Text
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.db.base import Base
 
+# Reserved row whose value changes on every write, so workers can spot stale caches
+VERSION_KEY = "_settings_version"
+
 
 class Setting(Base):
     id = Column(Integer, primary_key=True, index=True)
@@ -9,7 +17,7 @@ class Setting(Base):
     value = Column(Text, nullable=False)
 
     @staticmethod
-    def get_setting(db: Session, key: str, default_value: str = "") -> str:
+    def get_setting(db: Session, key: str, default_value: str = "", cached: bool = True) -> str:
         """
         Get a setting value by key
 
@@ -17,10 +25,15 @@ class Setting(Base):
             db: Database session
             key: Setting key
             default_value: Default value if setting doesn't exist
+            cached: Serve the value from the shared settings cache; pass False
+                for values that must reflect the database exactly
 
         Returns:
             Setting value
         """
+        if cached:
+            return settings_cache.get(db, key, default_value)
+
         setting = db.query(Setting).filter(Setting.key == key).first()
         if not setting:
             return default_value
@@ -39,12 +52,105 @@ class Setting(Base):
         Returns:
             Setting object
         """
-        setting = db.query(Setting).filter(Setting.key == key).first()
-        if setting:
-            setting.value = value
+        return Setting.set_settings(db, {key: value})[key]
+
+    @staticmethod
+    def set_settings(db: Session, values: Dict[str, str]) -> Dict[str, "Setting"]:
+        """
+        Set several setting values in one transaction
+
+        Also changes the version row, so other workers reload their cache.
+
+        Args:
+            db: Database session
+            values: Setting values by key
+
+        Returns:
+            Setting objects by key
+        """
+        existing = {
+            setting.key: setting
+            for setting in db.query(Setting).filter(Setting.key.in_(list(values) + [VERSION_KEY]))
+        }
+
+        written = {}
+        for key, value in values.items():
+            setting = existing.get(key)
+            if setting:
+                setting.value = value
+            else:
+                setting = Setting(key=key, value=value)
+                db.add(setting)
+            written[key] = setting
+
+        version = uuid.uuid4().hex
+        if VERSION_KEY in existing:
+            existing[VERSION_KEY].value = version
         else:
-            setting = Setting(key=key, value=value)
-            db.add(setting)
+            db.add(Setting(key=VERSION_KEY, value=version))
+
         db.commit()
-        db.refresh(setting)
-        return setting
+        settings_cache.update(values)
+        for setting in written.values():
+            db.refresh(setting)
+        return written
+
+
+class SettingsCache:
+    """
+    In-process copy of the settings table.
+
+    All settings are loaded with one query and served from memory. At most
+    every `ttl` seconds a lookup reads the version row, which every write
+    changes, and reloads the table if another worker wrote to it. Writes
+    made through this process update the cache immediately.
+    """
+
+    def __init__(self, ttl: float = settings.SETTINGS_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._values: Optional[Dict[str, str]] = None
+        self._version: Optional[str] = None
+        self._checked_at = 0.0
+
+    def get(self, db: Session, key: str, default_value: str = "") -> str:
+        """Get a setting value, reloading the cache if it is stale"""
+        values = self._values
+        if values is None or time.monotonic() - self._checked_at >= self.ttl:
+            values = self._refresh(db)
+        return values.get(key, default_value)
+
+    def update(self, values: Dict[str, str]) -> None:
+        """
+        Apply values this process just committed
+
+        The cached version is left alone, so the next poll still reloads
+        the table and picks up writes other workers made before this one.
+        """
+        with self._lock:
+            if self._values is not None:
+                self._values = {**self._values, **values}
+
+    def invalidate(self) -> None:
+        """Reload the settings on the next lookup"""
+        with self._lock:
+            self._values = None
+            self._version = None
+
+    def _refresh(self, db: Session) -> Dict[str, str]:
+        version = db.query(Setting.value).filter(Setting.key == VERSION_KEY).scalar()
+        with self._lock:
+            values = self._values
+            if values is None or version != self._version:
+                values = {
+                    key: value
+                    for key, value in db.query(Setting.key, Setting.value).filter(Setting.key != VERSION_KEY)
+                }
+                self._values = values
+                self._version = version
+            self._checked_at = time.monotonic()
+        return values
+
+
+# Create a singleton instance
+settings_cache = SettingsCache()
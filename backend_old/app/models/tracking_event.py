@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class TrackingEvent(Base):
+    """A Correios tracking event, stored once per (tracking code, event time)"""
+    id = Column(Integer, primary_key=True, index=True)
+    tracking_code = Column(String, nullable=False)
+    occurred_at = Column(DateTime, nullable=False)
+    data = Column(String, nullable=False)
+    hora = Column(String, nullable=False)
+    local = Column(String, nullable=False, default="")
+    status = Column(String, nullable=False)
+    sub_status = Column(String, nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("tracking_code", "occurred_at", name="uq_tracking_event_code_occurred"),
+    )
+
+
+class TrackedObject(Base):
+    """Latest known state of a tracking code, pointing at its most recent event"""
+    id = Column(Integer, primary_key=True, index=True)
+    tracking_code = Column(String, unique=True, index=True, nullable=False)
+    servico = Column(String, nullable=True)
+    entregue = Column(Boolean, default=False, nullable=False)
+    last_event_id = Column(Integer, ForeignKey("trackingevent.id"), nullable=True)
+    last_event_at = Column(DateTime, nullable=True)
+    last_status = Column(String, nullable=True)
+    last_checked_at = Column(DateTime, nullable=False)
+
+    last_event = relationship("TrackingEvent")
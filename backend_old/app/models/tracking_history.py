@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Date, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import Session
 from typing import List
@@ -14,6 +14,11 @@ class TrackingHistory(Base):
     user_id = Column(Integer, nullable=True)
     details = Column(Text, nullable=True)
 
+    __table_args__ = (
+        # Backs the per-user history endpoint, newest first
+        Index("ix_tracking_history_user_timestamp", "user_id", "timestamp"),
+    )
+
     @staticmethod
     def add_history(
         db: Session,
@@ -90,7 +95,25 @@ class TrackingHistory(Base):
         if user_id is not None:
             query = query.filter(TrackingHistory.user_id == user_id)
 
-        count = query.count()
-        query.delete()
+        # A single DELETE; its rowcount replaces a separate COUNT(*) scan
+        count = query.delete(synchronize_session=False)
         db.commit()
         return count
+
+
+class TrackingDailySummary(Base):
+    """Per-code daily rollup of tracking history entries removed by retention"""
+    id = Column(Integer, primary_key=True, index=True)
+    tracking_code = Column(String, nullable=False)
+    user_id = Column(Integer, nullable=True)
+    day = Column(Date, nullable=False)
+    lookups = Column(Integer, default=0, nullable=False)
+    failures = Column(Integer, default=0, nullable=False)
+    first_seen = Column(DateTime, nullable=False)
+    last_seen = Column(DateTime, nullable=False)
+    last_status = Column(String, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("tracking_code", "user_id", "day", name="uq_tracking_daily_summary_code_user_day"),
+        Index("ix_tracking_daily_summary_user_day", "user_id", "day"),
+    )
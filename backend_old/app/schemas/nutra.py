@@ -40,6 +40,47 @@ class ProductInDB(ProductBase):
 class Product(ProductInDB):
     pass
 
+# Variation schemas
+class VariationProduct(NutraBase):
+    id: int
+    name: str
+
+class ProductVariation(NutraBase):
+    id: int
+    product_id: int
+    sku: Optional[str] = None
+    type: ProductType
+    cost: float
+    sale_price: float
+    current_stock: int
+    minimum_stock: int
+    active: bool
+    product: Optional[VariationProduct] = None
+
+# Catalog sync schemas
+class CatalogItem(NutraBase):
+    product_name: str
+    sku: str
+    type: ProductType
+    cost: float
+    sale_price: float
+    minimum_stock: int = 10
+    current_stock: int = 0  # Only applied when the variation is created
+    description: Optional[str] = None
+    active: bool = True
+
+class CatalogSyncRequest(NutraBase):
+    items: List[CatalogItem]
+
+class CatalogSyncSummary(NutraBase):
+    products_created: int = 0
+    variations_created: int = 0
+    variations_updated: int = 0
+    variations_unchanged: int = 0
+    stock_entries: int = 0
+    created_skus: List[str] = []
+    updated_skus: List[str] = []
+
 # Kit schemas
 class KitBase(NutraBase):
     name: str
@@ -47,7 +88,7 @@ class KitBase(NutraBase):
 
 class KitCreate(KitBase):
     active: bool = True
-    products: List[Dict[str, Any]]  # List of {product_id, quantity}
+    products: List[Dict[str, Any]]  # List of {variation_id, quantity}
 
 class KitUpdate(NutraBase):
     name: Optional[str] = None
@@ -57,11 +98,12 @@ class KitUpdate(NutraBase):
 
 class KitProductBase(NutraBase):
     kit_id: int
-    product_id: int
+    variation_id: int
     quantity: int
 
 class KitProduct(KitProductBase):
     id: int
+    variation: Optional[ProductVariation] = None
 
 class KitInDB(KitBase):
     id: int
@@ -103,7 +145,7 @@ class Distributor(DistributorInDB):
 
 # Order schemas
 class OrderItemBase(NutraBase):
-    product_id: int
+    variation_id: int
     quantity: int
 
 class OrderItemCreate(OrderItemBase):
@@ -112,7 +154,7 @@ class OrderItemCreate(OrderItemBase):
 class OrderItem(OrderItemBase):
     id: int
     order_id: int
-    product: Optional[Product] = None
+    variation: Optional[ProductVariation] = None
 
 class OrderBase(NutraBase):
     distributor_id: int
@@ -142,7 +184,7 @@ class Order(OrderInDB):
 
 # Stock history schemas
 class StockHistoryBase(NutraBase):
-    product_id: int
+    variation_id: int
     change_amount: int
     reason: StockChangeReason
     reference_type: Optional[str] = None
@@ -156,7 +198,10 @@ class StockHistory(StockHistoryBase):
     id: int
     user_id: int
     created_at: datetime
-    product: Optional[Product] = None
+
+class StockHistoryPage(NutraBase):
+    items: List[StockHistory]
+    next_cursor: Optional[str] = None  # Pass back as `cursor` to get the next page
 
 # Kit sale schemas
 class KitSaleBase(NutraBase):
@@ -197,3 +242,14 @@ class InventorySummary(NutraBase):
     out_of_stock_count: int
     total_inventory_value: float
     low_stock_items: List[ProductStockStatus] = []
+
+class ReplenishmentSuggestion(NutraBase):
+    variation_id: int
+    product_name: str
+    type: ProductType
+    current_stock: int
+    minimum_stock: int
+    daily_velocity: float  # Expected units consumed per day
+    days_until_stockout: Optional[float] = None  # None when there is no consumption
+    suggested_quantity: int  # Units to order from the distributor
+    computed_at: datetime
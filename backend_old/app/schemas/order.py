@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
+from app.core.money import MoneyAmount
 from app.models.order import OrderStatus
 
 class OrderBase(BaseModel):
@@ -8,7 +9,7 @@ class OrderBase(BaseModel):
     customer_name: str
     customer_phone: str
     customer_address: str
-    total_amount: float
+    total_amount: MoneyAmount
     tracking_code: Optional[str] = None
 
 class OrderCreate(OrderBase):
@@ -16,17 +17,18 @@ class OrderCreate(OrderBase):
 
 class OrderUpdate(BaseModel):
     status: Optional[OrderStatus] = None
-    paid_amount: Optional[float] = None
+    paid_amount: Optional[MoneyAmount] = None
     tracking_code: Optional[str] = None
     collector_id: Optional[int] = None
     is_duplicate: Optional[bool] = None
 
 class BillingHistoryBase(BaseModel):
-    amount: float
+    amount: MoneyAmount
     notes: Optional[str] = None
 
 class BillingHistoryCreate(BillingHistoryBase):
     order_id: int
+    idempotency_key: Optional[str] = Field(None, max_length=255)
 
 class BillingHistory(BillingHistoryBase):
     id: int
@@ -39,7 +41,7 @@ class BillingHistory(BillingHistoryBase):
 class Order(OrderBase):
     id: int
     status: OrderStatus
-    paid_amount: float
+    paid_amount: MoneyAmount
     created_at: datetime
     updated_at: Optional[datetime]
     seller_id: int
@@ -0,0 +1,43 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from app.core.money import MoneyAmount
+from app.models.reconciliation import ReconciliationItemStatus
+
+class ReconciliationBatch(BaseModel):
+    id: int
+    filename: Optional[str] = None
+    format: str
+    created_by: Optional[int] = None
+    created_at: datetime
+    lines: int
+    matched: int
+    already_posted: int
+    unmatched: int
+    skipped: int
+    posted_amount: MoneyAmount
+
+    class Config:
+        from_attributes = True
+
+class ReconciliationItem(BaseModel):
+    id: int
+    batch_id: int
+    line_number: int
+    transaction_id: str
+    posted_at: Optional[datetime] = None
+    amount: MoneyAmount
+    payer_name: Optional[str] = None
+    payer_phone: Optional[str] = None
+    description: Optional[str] = None
+    reason: str
+    status: ReconciliationItemStatus
+    order_id: Optional[int] = None
+    resolved_by: Optional[int] = None
+    resolved_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class ReconciliationResolve(BaseModel):
+    order_id: int
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -26,3 +26,9 @@ class CorreiosSettings(BaseModel):
     apiUrl: str = Field(..., description="Correios API URL")
     apiKey: str = Field(..., description="Correios API key")
     useMock: bool = Field(..., description="Whether to use mock data")
+
+
+class TrackingStatusPhrases(BaseModel):
+    delivered: List[str] = Field(..., description="Phrases of delivered statuses")
+    critical: List[str] = Field(..., description="Phrases of statuses that need attention")
+    returned: List[str] = Field(..., description="Phrases of statuses of packages sent back to the sender")
@@ -6,6 +6,7 @@ from pydantic import BaseModel, Field
 class TrackingEvent(BaseModel):
     data: str = Field(..., description="Date of the event")
     hora: str = Field(..., description="Time of the event")
+    dataHora: Optional[datetime] = Field(None, description="Full timestamp of the event, when known")
     local: str = Field(..., description="Location of the event")
     status: str = Field(..., description="Status description")
     subStatus: Optional[str] = Field(None, description="Additional status details")
@@ -32,6 +33,7 @@ class ApiStatus(BaseModel):
     message: Optional[str] = Field(None, description="Status message")
     timestamp: datetime = Field(default_factory=datetime.now, description="Timestamp of the status check")
     response_time: Optional[int] = Field(None, description="API response time in milliseconds")
+    rate_limit: Optional[Dict[str, float]] = Field(None, description="Wait-time metrics of the Correios rate limiter")
 
 
 class TrackingHistoryItem(BaseModel):
@@ -49,3 +51,8 @@ class TrackingHistoryItem(BaseModel):
 class TrackingHistoryResponse(BaseModel):
     items: List[TrackingHistoryItem]
     total: int
+
+
+class TrackingRetentionSummary(BaseModel):
+    expired: int = Field(0, description="Entries removed because they were older than the retention window")
+    over_cap: int = Field(0, description="Entries removed because their user exceeded the per-user cap")
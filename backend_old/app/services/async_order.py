@@ -0,0 +1,206 @@
+import logging
+from sqlalchemy import select, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from decimal import Decimal
+
+from app.core.money import to_money
+from app.models.order import Order, BillingHistory, OrderStatus
+from app.schemas.order import OrderCreate, OrderUpdate, BillingHistoryCreate
+from app.services.payments import IdempotencyConflict, payment_service
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncOrderService:
+    """
+    OrderService for AsyncSession.
+
+    Same behaviour as app.services.order.OrderService. Orders are returned
+    with their billing history loaded, since the response schema includes
+    it and lazy loads aren't possible with an async session.
+    """
+
+    def _orders(self):
+        return select(Order).options(selectinload(Order.billing_history))
+
+    async def get_orders(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Order]:
+        """Get all orders with pagination"""
+        result = await db.execute(self._orders().order_by(Order.id).offset(skip).limit(limit))
+        return list(result.scalars().all())
+
+    async def get_order(self, db: AsyncSession, order_id: int) -> Optional[Order]:
+        """Get a specific order by ID"""
+        result = await db.execute(self._orders().where(Order.id == order_id))
+        return result.scalars().first()
+
+    async def get_order_by_number(self, db: AsyncSession, order_number: str) -> Optional[Order]:
+        """Get a specific order by order number"""
+        result = await db.execute(self._orders().where(Order.order_number == order_number))
+        return result.scalars().first()
+
+    async def get_orders_by_status(self, db: AsyncSession, status: OrderStatus) -> List[Order]:
+        """Get orders filtered by status"""
+        result = await db.execute(self._orders().where(Order.status == status))
+        return list(result.scalars().all())
+
+    async def get_orders_by_collector(self, db: AsyncSession, collector_id: int) -> List[Order]:
+        """Get orders assigned to a specific collector"""
+        result = await db.execute(self._orders().where(Order.collector_id == collector_id))
+        return list(result.scalars().all())
+
+    async def get_orders_by_seller(self, db: AsyncSession, seller_id: int) -> List[Order]:
+        """Get orders created by a specific seller"""
+        result = await db.execute(self._orders().where(Order.seller_id == seller_id))
+        return list(result.scalars().all())
+
+    async def create_order(self, db: AsyncSession, order: OrderCreate, collector_id: Optional[int] = None) -> Order:
+        """Create a new order"""
+        # Check if this might be a duplicate order
+        existing = await db.execute(select(Order.id).where(Order.order_number == order.order_number))
+        is_duplicate = existing.first() is not None
+
+        db_order = Order(
+            order_number=order.order_number,
+            customer_name=order.customer_name,
+            customer_phone=order.customer_phone,
+            customer_address=order.customer_address,
+            total_amount=order.total_amount,
+            tracking_code=order.tracking_code,
+            seller_id=order.seller_id,
+            collector_id=collector_id,
+            is_duplicate=is_duplicate,
+            billing_history=[]
+        )
+
+        db.add(db_order)
+        # Keys and defaults are set by the flush; a refresh would expire billing_history
+        await db.commit()
+        return db_order
+
+    async def update_order(self, db: AsyncSession, order_id: int, order_update: OrderUpdate) -> Optional[Order]:
+        """Update an existing order"""
+        db_order = await self.get_order(db, order_id)
+        if not db_order:
+            return None
+
+        update_data = order_update.model_dump(exclude_unset=True)
+        for field, value in update_data.items():
+            setattr(db_order, field, value)
+
+        db_order.updated_at = datetime.utcnow()
+
+        # If paid_amount is updated, check if we need to update the status
+        if "paid_amount" in update_data:
+            if db_order.paid_amount >= db_order.total_amount:
+                db_order.status = OrderStatus.PAID
+            elif db_order.paid_amount > 0:
+                db_order.status = OrderStatus.PARTIALLY_PAID
+
+        await db.commit()
+        return db_order
+
+    async def add_billing_history(self, db: AsyncSession, billing: BillingHistoryCreate, created_by: int) -> Optional[BillingHistory]:
+        """
+        Add a billing history entry to an order, updating its paid amount and status atomically
+
+        Runs the statements of PaymentService.post_payment: the order row is
+        updated in place and a retry with an applied idempotency key returns
+        the original entry.
+        """
+        amount = to_money(billing.amount)
+        key = billing.idempotency_key
+
+        if key:
+            replay = await self._replay(db, key, billing.order_id, amount)
+            if replay is not None:
+                return replay
+
+        savepoint = await db.begin_nested()
+        row = (await db.execute(payment_service.apply_statement(billing.order_id, amount))).first()
+        if row is None:
+            await savepoint.rollback()
+            return None
+
+        billing_id = (await db.execute(payment_service.billing_statement(db, {
+            "order_id": billing.order_id,
+            "amount": amount,
+            "notes": billing.notes,
+            "created_by": created_by,
+            "idempotency_key": key
+        }))).scalar()
+        if billing_id is None:
+            # A concurrent retry with the same key committed first
+            await savepoint.rollback()
+            return await self._replay(db, key, billing.order_id, amount)
+
+        await db.commit()
+        await self._refresh_loaded_order(db, billing.order_id)
+        return await db.get(BillingHistory, billing_id)
+
+    async def _replay(self, db: AsyncSession, key: str, order_id: int, amount: Decimal) -> Optional[BillingHistory]:
+        result = await db.execute(select(BillingHistory).where(BillingHistory.idempotency_key == key))
+        billing = result.scalars().first()
+        if billing is None:
+            return None
+        if billing.order_id != order_id or billing.amount != amount:
+            raise IdempotencyConflict(key)
+
+        logger.info(f"Payment {key} was already applied, returning billing entry {billing.id}")
+        return billing
+
+    async def _refresh_loaded_order(self, db: AsyncSession, order_id: int) -> None:
+        # The UPDATE bypasses the session, so a copy of the order it already holds is stale
+        order = db.identity_map.get(db.sync_session.identity_key(Order, order_id))
+        if order is not None:
+            await db.refresh(order, ["paid_amount", "status", "updated_at", "billing_history"])
+
+    async def get_duplicate_orders(self, db: AsyncSession) -> List[Order]:
+        """Get orders marked as duplicates"""
+        result = await db.execute(self._orders().where(Order.is_duplicate == True))
+        return list(result.scalars().all())
+
+    async def search_orders(self, db: AsyncSession, query: str) -> List[Order]:
+        """Search orders by various criteria"""
+        search = f"%{query}%"
+        result = await db.execute(self._orders().where(
+            or_(
+                Order.order_number.ilike(search),
+                Order.customer_name.ilike(search),
+                Order.customer_phone.ilike(search),
+                Order.tracking_code.ilike(search)
+            )
+        ))
+        return list(result.scalars().all())
+
+    async def get_orders_by_date_range(self, db: AsyncSession, start_date: datetime, end_date: datetime) -> List[Order]:
+        """Get orders created within a date range"""
+        result = await db.execute(self._orders().where(
+            Order.created_at >= start_date,
+            Order.created_at <= end_date
+        ))
+        return list(result.scalars().all())
+
+    async def get_orders_statistics(self, db: AsyncSession) -> Dict[str, Any]:
+        """Get statistics about orders, in one query per aggregate group"""
+        totals = (await db.execute(
+            select(func.count(Order.id), func.sum(Order.total_amount), func.sum(Order.paid_amount))
+        )).one()
+        total_orders, total_amount, total_paid = totals[0], totals[1] or to_money(0), totals[2] or to_money(0)
+
+        counts = dict((await db.execute(select(Order.status, func.count(Order.id)).group_by(Order.status))).all())
+        status_counts = {status.value: counts.get(status, 0) for status in OrderStatus}
+
+        return {
+            "total_orders": total_orders,
+            "total_amount": total_amount,
+            "total_paid": total_paid,
+            "payment_rate": float(total_paid / total_amount) if total_amount > 0 else 0,
+            "status_counts": status_counts
+        }
+
+
+# Create a singleton instance
+async_order_service = AsyncOrderService()
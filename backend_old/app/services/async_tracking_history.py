@@ -0,0 +1,87 @@
+from typing import List
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.tracking_history import TrackingHistory
+
+
+class AsyncTrackingHistoryService:
+    """Tracking history queries of the TrackingHistory model, for AsyncSession"""
+
+    async def add_history(
+        self,
+        db: AsyncSession,
+        tracking_code: str,
+        status: str,
+        success: bool = True,
+        user_id: int = None,
+        details: str = None
+    ) -> TrackingHistory:
+        """
+        Add a tracking history entry
+
+        Args:
+            db: Database session
+            tracking_code: Tracking code
+            status: Status message
+            success: Whether the tracking was successful
+            user_id: ID of the user who performed the tracking
+            details: Additional details
+
+        Returns:
+            TrackingHistory object
+        """
+        history = TrackingHistory(
+            tracking_code=tracking_code,
+            status=status,
+            success=success,
+            user_id=user_id,
+            details=details
+        )
+        db.add(history)
+        await db.commit()
+        # Loads the server-side timestamp
+        await db.refresh(history)
+        return history
+
+    async def get_history(self, db: AsyncSession, limit: int = 50, user_id: int = None) -> List[TrackingHistory]:
+        """
+        Get tracking history, newest first
+
+        Args:
+            db: Database session
+            limit: Maximum number of entries to return
+            user_id: Filter by user ID
+
+        Returns:
+            List of TrackingHistory objects
+        """
+        query = select(TrackingHistory)
+        if user_id is not None:
+            query = query.where(TrackingHistory.user_id == user_id)
+
+        result = await db.execute(query.order_by(TrackingHistory.timestamp.desc()).limit(limit))
+        return list(result.scalars().all())
+
+    async def clear_history(self, db: AsyncSession, user_id: int = None) -> int:
+        """
+        Clear tracking history
+
+        Args:
+            db: Database session
+            user_id: Filter by user ID
+
+        Returns:
+            Number of deleted entries
+        """
+        statement = delete(TrackingHistory)
+        if user_id is not None:
+            statement = statement.where(TrackingHistory.user_id == user_id)
+
+        result = await db.execute(statement.execution_options(synchronize_session=False))
+        await db.commit()
+        return result.rowcount
+
+
+# Create a singleton instance
+async_tracking_history_service = AsyncTrackingHistoryService()
@@ -0,0 +1,96 @@
+import asyncio
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.models.order import Order
+from app.models.user import User, UserRole
+from app.schemas.user import UserCreate, UserUpdate
+from app.core.security import get_password_hash, verify_password
+
+class AsyncUserService:
+    """
+    UserService for AsyncSession.
+
+    Password hashing is CPU-bound, so it runs in a worker thread instead of
+    stalling the event loop.
+    """
+
+    async def get_user(self, db: AsyncSession, user_id: int) -> Optional[User]:
+        return await db.get(User, user_id)
+
+    async def get_user_by_email(self, db: AsyncSession, email: str) -> Optional[User]:
+        result = await db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
+
+    async def get_users(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[User]:
+        result = await db.execute(select(User).order_by(User.id).offset(skip).limit(limit))
+        return list(result.scalars().all())
+
+    async def create_user(self, db: AsyncSession, user: UserCreate) -> User:
+        hashed_password = await asyncio.to_thread(get_password_hash, user.password)
+        db_user = User(
+            email=user.email,
+            hashed_password=hashed_password,
+            full_name=user.full_name,
+            role=user.role
+        )
+        db.add(db_user)
+        await db.commit()
+        await db.refresh(db_user)
+        return db_user
+
+    async def update_user(self, db: AsyncSession, user_id: int, user_update: UserUpdate) -> Optional[User]:
+        db_user = await self.get_user(db, user_id)
+        if not db_user:
+            return None
+
+        update_data = user_update.model_dump(exclude_unset=True)
+        if "password" in update_data:
+            update_data["hashed_password"] = await asyncio.to_thread(get_password_hash, update_data.pop("password"))
+
+        for field, value in update_data.items():
+            setattr(db_user, field, value)
+
+        await db.commit()
+        await db.refresh(db_user)
+        return db_user
+
+    async def authenticate(self, db: AsyncSession, email: str, password: str) -> Optional[User]:
+        user = await self.get_user_by_email(db, email)
+        if not user:
+            return None
+        if not await asyncio.to_thread(verify_password, password, user.hashed_password):
+            return None
+        return user
+
+    async def get_least_busy_collector(self, db: AsyncSession) -> Optional[User]:
+        # Get the active collector with the fewest assigned orders
+        result = await db.execute(
+            select(User)
+            .where(User.role == UserRole.COLLECTOR, User.is_active == True)
+            .outerjoin(Order, Order.collector_id == User.id)
+            .group_by(User.id)
+            .order_by(func.count(Order.id).asc(), User.id)
+            .limit(1)
+        )
+        return result.scalars().first()
+
+    async def get_collectors(self, db: AsyncSession) -> List[User]:
+        result = await db.execute(select(User).where(User.role == UserRole.COLLECTOR))
+        return list(result.scalars().all())
+
+    async def get_sellers(self, db: AsyncSession) -> List[User]:
+        result = await db.execute(select(User).where(User.role == UserRole.SELLER))
+        return list(result.scalars().all())
+
+    async def delete_user(self, db: AsyncSession, user_id: int) -> Optional[User]:
+        db_user = await self.get_user(db, user_id)
+        if not db_user:
+            return None
+
+        # With expire_on_commit off, the deleted object keeps its attributes
+        await db.delete(db_user)
+        await db.commit()
+        return db_user
+
+async_user_service = AsyncUserService()
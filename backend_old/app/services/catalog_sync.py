@@ -0,0 +1,157 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, insert
+from typing import Dict, List
+from datetime import datetime
+
+from app.db.bulk import chunks, dialect_insert
+from app.models.nutra_product import NutraProduct, ProductVariation, StockHistory, StockChangeReason
+from app.schemas.nutra import CatalogItem, CatalogSyncSummary
+
+# Variation columns owned by the supplier catalog; stock is only set on creation
+CATALOG_FIELDS = ("product_id", "type", "cost", "sale_price", "minimum_stock", "active")
+
+
+class CatalogSyncService:
+    def sync(self, db: Session, items: List[CatalogItem], user_id: int) -> CatalogSyncSummary:
+        """
+        Upsert products and their variations from a supplier catalog
+
+        Products are matched by name and variations by SKU. Both are written
+        with batched INSERT ... ON CONFLICT DO UPDATE, and the initial stock
+        of new variations is booked with one bulk StockHistory insert.
+        Everything is committed in a single transaction.
+
+        Args:
+            db: Database session
+            items: Catalog lines; when a SKU appears twice the last line wins
+            user_id: ID of the user running the sync
+
+        Returns:
+            Summary of what was created, updated or left unchanged
+        """
+        summary = CatalogSyncSummary()
+        items = list({item.sku: item for item in items}.values())
+        if not items:
+            return summary
+
+        now = datetime.utcnow()
+        product_ids = self._resolve_products(db, items, now, summary)
+
+        # Classify every line against the current variation rows
+        existing = {}
+        skus = [item.sku for item in items]
+        for chunk in chunks(skus):
+            for row in db.query(
+                ProductVariation.sku, *[getattr(ProductVariation, field) for field in CATALOG_FIELDS]
+            ).filter(ProductVariation.sku.in_(chunk)):
+                existing[row[0]] = dict(zip(CATALOG_FIELDS, row[1:]))
+
+        rows = []
+        for item in items:
+            values = {
+                "product_id": product_ids[item.product_name],
+                "type": item.type,
+                "cost": item.cost,
+                "sale_price": item.sale_price,
+                "minimum_stock": item.minimum_stock,
+                "active": item.active
+            }
+            current = existing.get(item.sku)
+            if current is None:
+                summary.created_skus.append(item.sku)
+            elif current != values:
+                summary.updated_skus.append(item.sku)
+            else:
+                summary.variations_unchanged += 1
+                continue
+
+            rows.append({
+                **values,
+                "sku": item.sku,
+                "current_stock": item.current_stock,
+                "created_at": now,
+                "updated_at": now
+            })
+
+        insert_stmt = dialect_insert(db)
+        for chunk in chunks(rows):
+            stmt = insert_stmt(ProductVariation).values(list(chunk))
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[ProductVariation.sku],
+                set_={
+                    **{field: stmt.excluded[field] for field in CATALOG_FIELDS},
+                    "updated_at": stmt.excluded.updated_at
+                }
+            ))
+
+        # Book the initial stock of the new variations
+        initial_stock = {item.sku: item.current_stock for item in items if item.current_stock > 0}
+        created_with_stock = [sku for sku in summary.created_skus if sku in initial_stock]
+        ledger = []
+        for chunk in chunks(created_with_stock):
+            for variation_id, sku in db.query(ProductVariation.id, ProductVariation.sku).filter(
+                ProductVariation.sku.in_(chunk)
+            ):
+                ledger.append({
+                    "variation_id": variation_id,
+                    "user_id": user_id,
+                    "change_amount": initial_stock[sku],
+                    "reason": StockChangeReason.MANUAL,
+                    "notes": "Initial stock",
+                    "created_at": now
+                })
+        if ledger:
+            db.execute(insert(StockHistory), ledger)
+
+        db.commit()
+
+        summary.variations_created = len(summary.created_skus)
+        summary.variations_updated = len(summary.updated_skus)
+        summary.stock_entries = len(ledger)
+        return summary
+
+    def _resolve_products(
+        self,
+        db: Session,
+        items: List[CatalogItem],
+        now: datetime,
+        summary: CatalogSyncSummary
+    ) -> Dict[str, int]:
+        """
+        Upsert the catalog's products and map their names to IDs
+
+        Products are written with INSERT ... ON CONFLICT (name) DO UPDATE, so
+        concurrent syncs can't create the same product twice. Existing
+        products get the catalog's description, when it has one, and a new
+        updated_at, which kit catalog caches use to see variation edits.
+        """
+        descriptions = {}
+        for item in items:
+            descriptions.setdefault(item.product_name, item.description)
+
+        rows = [
+            {"name": name, "description": description, "active": True, "created_at": now, "updated_at": now}
+            for name, description in descriptions.items()
+        ]
+        insert_stmt = dialect_insert(db)
+        product_ids = {}
+        for chunk in chunks(rows):
+            stmt = insert_stmt(NutraProduct).values(list(chunk))
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[NutraProduct.name],
+                set_={
+                    "description": func.coalesce(stmt.excluded.description, NutraProduct.description),
+                    "updated_at": stmt.excluded.updated_at
+                }
+            ).returning(NutraProduct.name, NutraProduct.id, NutraProduct.created_at)
+            for name, product_id, created_at in db.execute(stmt):
+                product_ids[name] = product_id
+                # Updated rows keep their original creation time
+                if created_at == now:
+                    summary.products_created += 1
+
+        return product_ids
+
+
+# Create a singleton instance
+catalog_sync_service = CatalogSyncService()
@@ -0,0 +1,212 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.instrumentation import upstream_timer
+from app.db.session import SessionLocal
+from app.models.setting import Setting
+
+logger = logging.getLogger(__name__)
+
+
+class CorreiosConfig:
+    """Correios API settings as stored in the settings table"""
+
+    def __init__(self, api_url: str, api_key: Optional[str], use_mock: bool):
+        self.api_url = api_url.rstrip("/")
+        self.api_key = api_key or None
+        self.use_mock = use_mock
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, CorreiosConfig) and (
+            (self.api_url, self.api_key, self.use_mock) == (other.api_url, other.api_key, other.use_mock)
+        )
+
+
+class CorreiosClient:
+    """
+    Shared HTTP client for the Correios API.
+
+    Requests go through one pooled `requests.Session`, so connections are
+    reused across tracking calls. The URL, key and mock flag are read from
+    the settings table and reloaded every `reload_interval` seconds, or on
+    the next call after `invalidate()`.
+
+    A key of the form `user:access_code` is exchanged for a token at
+    `/token/v1/autentica`, which is renewed `token_refresh_margin` seconds
+    before it expires; any other key is sent as a static bearer token.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        reload_interval: float = settings.CORREIOS_SETTINGS_RELOAD_SECONDS,
+        pool_size: int = settings.CORREIOS_POOL_SIZE,
+        timeout: float = settings.CORREIOS_TIMEOUT,
+        token_refresh_margin: float = settings.CORREIOS_TOKEN_REFRESH_MARGIN
+    ):
+        self.session_factory = session_factory
+        self.reload_interval = reload_interval
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.token_refresh_margin = token_refresh_margin
+
+        self._lock = threading.RLock()
+        self._http: Optional[requests.Session] = None
+        self._config = CorreiosConfig(settings.CORREIOS_API_URL, settings.CORREIOS_API_KEY, False)
+        self._loaded_at: Optional[float] = None
+        self._token: Optional[str] = None
+        self._token_expires_at: Optional[float] = None
+
+    @property
+    def http(self) -> requests.Session:
+        """The pooled HTTP session, created on first use"""
+        with self._lock:
+            if self._http is None:
+                self._http = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                self._http.mount("https://", adapter)
+                self._http.mount("http://", adapter)
+                self._http.headers.update({"Content-Type": "application/json"})
+            return self._http
+
+    def invalidate(self) -> None:
+        """Reload the settings on the next call"""
+        with self._lock:
+            self._loaded_at = None
+
+    def get_config(self, db: Optional[Session] = None) -> CorreiosConfig:
+        """
+        Get the current settings, reloading them if they are stale
+
+        Args:
+            db: Session to read the settings with (a new one is opened if omitted)
+
+        Returns:
+            The current Correios settings
+        """
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.reload_interval:
+            return self._config
+
+        try:
+            config = self._read_config(db) if db is not None else self._read_config_with_own_session()
+        except Exception:
+            # Keep the last known settings if the database is unavailable
+            logger.exception("Error reloading Correios settings")
+            with self._lock:
+                self._loaded_at = time.monotonic()
+            return self._config
+
+        with self._lock:
+            if config != self._config:
+                logger.info("Correios settings changed, reloading client")
+                self._config = config
+                self._token = None
+                self._token_expires_at = None
+            self._loaded_at = time.monotonic()
+        return config
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        """
+        Send an authenticated GET to the Correios API
+
+        Args:
+            path: Path under the API URL, e.g. /v1/sro-rastro/{code}
+            **kwargs: Extra arguments for requests
+
+        Returns:
+            The response; a 401 is retried once with a fresh token
+        """
+        config = self.get_config()
+        kwargs.setdefault("timeout", self.timeout)
+
+        headers = self._auth_headers(config)
+        with upstream_timer("correios", "get"):
+            response = self.http.get(f"{config.api_url}{path}", headers=headers, **kwargs)
+        if response.status_code == 401 and self._token_expires_at is not None:
+            self._drop_token()
+            headers = self._auth_headers(config)
+            with upstream_timer("correios", "get"):
+                response = self.http.get(f"{config.api_url}{path}", headers=headers, **kwargs)
+        return response
+
+    def close(self) -> None:
+        """Close the pooled connections"""
+        with self._lock:
+            if self._http is not None:
+                self._http.close()
+                self._http = None
+
+    def _auth_headers(self, config: CorreiosConfig) -> dict:
+        token = self._get_token(config)
+        return {"Authorization": f"Bearer {token}"} if token else {}
+
+    def _get_token(self, config: CorreiosConfig) -> Optional[str]:
+        if not config.api_key:
+            return None
+        if ":" not in config.api_key:
+            return config.api_key
+
+        with self._lock:
+            expires_at = self._token_expires_at
+            if self._token and expires_at is not None and time.time() < expires_at - self.token_refresh_margin:
+                return self._token
+
+            user, access_code = config.api_key.split(":", 1)
+            with upstream_timer("correios", "token"):
+                response = self.http.post(
+                    f"{config.api_url}/token/v1/autentica",
+                    auth=(user, access_code),
+                    timeout=self.timeout
+                )
+            response.raise_for_status()
+            data = response.json()
+
+            self._token = data["token"]
+            self._token_expires_at = self._parse_expiry(data.get("expiraEm"))
+            return self._token
+
+    def _drop_token(self) -> None:
+        with self._lock:
+            self._token = None
+            self._token_expires_at = None
+
+    @staticmethod
+    def _parse_expiry(value: Optional[str]) -> float:
+        """Epoch time a token expires at; tokens without a valid expiry last an hour"""
+        if value:
+            try:
+                expires = datetime.fromisoformat(value.replace("Z", "+00:00"))
+                if expires.tzinfo is None:
+                    expires = expires.replace(tzinfo=timezone.utc)
+                return expires.timestamp()
+            except ValueError:
+                logger.warning(f"Invalid Correios token expiry: {value}")
+        return time.time() + 3600
+
+    def _read_config_with_own_session(self) -> CorreiosConfig:
+        db = self.session_factory()
+        try:
+            return self._read_config(db)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _read_config(db: Session) -> CorreiosConfig:
+        return CorreiosConfig(
+            api_url=Setting.get_setting(db, "correios_api_url", settings.CORREIOS_API_URL),
+            api_key=Setting.get_setting(db, "correios_api_key", settings.CORREIOS_API_KEY),
+            use_mock=Setting.get_setting(db, "correios_use_mock", "false").lower() == "true"
+        )
+
+
+# Create a singleton instance
+correios_client = CorreiosClient()
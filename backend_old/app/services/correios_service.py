@@ -2,35 +2,32 @@ import logging
 import requests
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-from app.core.config import settings
+from app.services.correios_client import CorreiosClient, correios_client
+from app.services.rate_limiter import RateLimiter, correios_rate_limiter
+from app.services.status_classifier import DELIVERED, status_classifier
+from app.services.tracking_backends import TrackingBackend, SimulatedTrackingBackend, create_tracking_backend
 
 logger = logging.getLogger(__name__)
 
 class CorreiosService:
     """Service for interacting with the Correios API"""
     
-    def __init__(self):
-        self.api_url = settings.CORREIOS_API_URL
-        self.api_key = settings.CORREIOS_API_KEY
-        
-        # Status considerados críticos que precisam de atenção
-        self.critical_statuses = [
-            'objeto devolvido',
-            'endereço incorreto',
-            'objeto aguardando retirada',
-            'tentativa de entrega',
-            'objeto roubado',
-            'objeto extraviado',
-            'recusado',
-            'entrega não efetuada'
-        ]
+    def __init__(
+        self,
+        client: CorreiosClient = correios_client,
+        rate_limiter: RateLimiter = correios_rate_limiter,
+        backend: Optional[TrackingBackend] = None
+    ):
+        self.client = client
+        self.rate_limiter = rate_limiter
+        # Replaces the Correios API entirely when set (e.g. the simulator for load tests)
+        self.backend = backend
+        # Deterministic data served when the API is mocked, unconfigured or failing
+        self.simulator = SimulatedTrackingBackend()
     
     def is_status_critical(self, status: str) -> bool:
         """Check if a status is considered critical"""
-        if not status:
-            return False
-            
-        return any(critical.lower() in status.lower() for critical in self.critical_statuses)
+        return status_classifier.is_critical(status)
     
     def track_package(self, tracking_code: str) -> Dict[str, Any]:
         """
@@ -44,24 +41,26 @@ class CorreiosService:
         """
         if not tracking_code:
             raise ValueError("Tracking code is required")
+
+        if self.backend is not None:
+            # The backend stands in for the upstream, quota included
+            self.rate_limiter.acquire()
+            return self.backend.track(tracking_code)
             
-        if not self.api_key:
+        config = self.client.get_config()
+        if config.use_mock:
+            return self.simulator.simulate(tracking_code)
+
+        if not config.api_key:
             logger.warning("Correios API key is not set. Using mock data.")
-            return self._mock_tracking_response(tracking_code)
+            return self.simulator.simulate(tracking_code)
             
+        # Queue for an upstream slot; RateLimitTimeout propagates to the caller
+        self.rate_limiter.acquire()
+
         try:
-            # Prepare headers with authentication
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.api_key}"
-            }
-            
-            # Make request to Correios API
-            response = requests.get(
-                f"{self.api_url}/v1/sro-rastro/{tracking_code}",
-                headers=headers,
-                timeout=10
-            )
+            # Make request to Correios API through the pooled client
+            response = self.client.get(f"/v1/sro-rastro/{tracking_code}")
             
             # Check if request was successful
             response.raise_for_status()
@@ -75,7 +74,7 @@ class CorreiosService:
         except requests.RequestException as e:
             logger.error(f"Error tracking package {tracking_code}: {str(e)}")
             # Fallback to mock data if API fails
-            return self._mock_tracking_response(tracking_code)
+            return self.simulator.simulate(tracking_code)
     
     def track_multiple_packages(self, tracking_codes: List[str]) -> Dict[str, Dict[str, Any]]:
         """
@@ -87,21 +86,28 @@ class CorreiosService:
         Returns:
             Dictionary mapping tracking codes to their tracking information
         """
-        results = {}
+        return {code: self.track_package_safe(code) for code in tracking_codes}
+    
+    def track_package_safe(self, tracking_code: str) -> Dict[str, Any]:
+        """
+        Track a package, reporting failures in the result instead of raising
         
-        for code in tracking_codes:
-            try:
-                results[code] = self.track_package(code)
-            except Exception as e:
-                logger.error(f"Error tracking package {code}: {str(e)}")
-                results[code] = {
-                    "codigo": code,
-                    "eventos": [],
-                    "entregue": False,
-                    "error": str(e)
-                }
-                
-        return results
+        Args:
+            tracking_code: The tracking code to look up
+            
+        Returns:
+            Tracking information, with an "error" entry if the lookup failed
+        """
+        try:
+            return self.track_package(tracking_code)
+        except Exception as e:
+            logger.error(f"Error tracking package {tracking_code}: {str(e)}")
+            return {
+                "codigo": tracking_code,
+                "eventos": [],
+                "entregue": False,
+                "error": str(e)
+            }
     
     def _format_correios_response(self, data: Dict[str, Any], tracking_code: str) -> Dict[str, Any]:
         """
@@ -125,9 +131,9 @@ class CorreiosService:
                     "entregue": False
                 }
                 
-            # Check if the object has been delivered
+            # Check if the object has been delivered (not "não entregue" nor returned to sender)
             entregue = any(
-                evento.get("descricao", "").lower().find("entregue") >= 0
+                status_classifier.classify(evento.get("descricao", "")) == DELIVERED
                 for evento in objeto.get("eventos", [])
             )
             
@@ -136,6 +142,7 @@ class CorreiosService:
             for evento in objeto.get("eventos", []):
                 # Parse the date and time
                 data_hora = evento.get("dtHrCriado", "")
+                dt = None
                 if data_hora:
                     try:
                         dt = datetime.fromisoformat(data_hora.replace("Z", "+00:00"))
@@ -159,6 +166,7 @@ class CorreiosService:
                 eventos.append({
                     "data": data,
                     "hora": hora,
+                    "dataHora": dt,
                     "local": local,
                     "status": status,
                     "subStatus": sub_status
@@ -173,114 +181,8 @@ class CorreiosService:
             
         except Exception as e:
             logger.error(f"Error formatting Correios response for {tracking_code}: {str(e)}")
-            return self._mock_tracking_response(tracking_code)
-    
-    def _mock_tracking_response(self, tracking_code: str) -> Dict[str, Any]:
-        """
-        Generate mock tracking data for development and testing
-        
-        Args:
-            tracking_code: The tracking code to generate mock data for
-            
-        Returns:
-            Mock tracking information
-        """
-        import random
-        from datetime import datetime, timedelta
-        
-        # Generate a random number to simulate different states
-        rnd = random.random()
-        entregue = rnd > 0.7
-        
-        # Create an array of simulated events
-        eventos = []
-        
-        # Add most recent event
-        now = datetime.now()
-        
-        if entregue:
-            eventos.append({
-                "data": now.strftime("%d/%m/%Y"),
-                "hora": now.strftime("%H:%M"),
-                "local": "São Paulo / SP",
-                "status": "Objeto entregue ao destinatário",
-                "subStatus": ""
-            })
-        elif rnd > 0.6:
-            eventos.append({
-                "data": now.strftime("%d/%m/%Y"),
-                "hora": now.strftime("%H:%M"),
-                "local": "São Paulo / SP",
-                "status": "Objeto saiu para entrega ao destinatário",
-                "subStatus": ""
-            })
-        elif rnd > 0.5:
-            eventos.append({
-                "data": now.strftime("%d/%m/%Y"),
-                "hora": now.strftime("%H:%M"),
-                "local": "São Paulo / SP",
-                "status": "Objeto em trânsito - por favor aguarde",
-                "subStatus": ""
-            })
-        elif rnd > 0.4:
-            eventos.append({
-                "data": now.strftime("%d/%m/%Y"),
-                "hora": now.strftime("%H:%M"),
-                "local": "São Paulo / SP",
-                "status": "Tentativa de entrega não efetuada",
-                "subStatus": "Endereço incorreto"
-            })
-        elif rnd > 0.3:
-            eventos.append({
-                "data": now.strftime("%d/%m/%Y"),
-                "hora": now.strftime("%H:%M"),
-                "local": "São Paulo / SP",
-                "status": "Objeto aguardando retirada no endereço indicado",
-                "subStatus": "Pode ser retirado em uma agência dos Correios"
-            })
-        elif rnd > 0.2:
-            eventos.append({
-                "data": now.strftime("%d/%m/%Y"),
-                "hora": now.strftime("%H:%M"),
-                "local": "São Paulo / SP",
-                "status": "Objeto devolvido ao remetente",
-                "subStatus": "Recusado pelo destinatário"
-            })
-        elif rnd > 0.1:
-            eventos.append({
-                "data": now.strftime("%d/%m/%Y"),
-                "hora": now.strftime("%H:%M"),
-                "local": "São Paulo / SP",
-                "status": "Objeto em processo de desembaraço",
-                "subStatus": "Aguardando pagamento de tributos"
-            })
-        else:
-            eventos.append({
-                "data": now.strftime("%d/%m/%Y"),
-                "hora": now.strftime("%H:%M"),
-                "local": "Curitiba / PR",
-                "status": "Objeto postado",
-                "subStatus": ""
-            })
-        
-        # Add some historical simulated events
-        past_date = now - timedelta(days=2)
-        
-        eventos.append({
-            "data": past_date.strftime("%d/%m/%Y"),
-            "hora": past_date.strftime("%H:%M"),
-            "local": "Curitiba / PR",
-            "status": "Objeto postado",
-            "subStatus": ""
-        })
-        
-        return {
-            "codigo": tracking_code,
-            "eventos": eventos,
-            "entregue": entregue,
-            "servico": "SEDEX" if random.random() > 0.5 else "PAC"
-        }
+            return self.simulator.simulate(tracking_code)
 
 
 # Create a singleton instance
-correios_service = CorreiosService()
+correios_service = CorreiosService(backend=create_tracking_backend())
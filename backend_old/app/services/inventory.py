@@ -0,0 +1,176 @@
+import base64
+from sqlalchemy.orm import Session, Query
+from sqlalchemy import func, case, insert, update, and_, or_
+from typing import List, Optional, Tuple
+from datetime import datetime
+
+from app.models.nutra_product import (
+    ProductVariation, DistributorOrder, DistributorOrderItem,
+    StockHistory, StockChangeReason, OrderStatus
+)
+
+
+class InventoryService:
+    def receive_distributor_order(self, db: Session, order: DistributorOrder, user_id: int) -> bool:
+        """
+        Mark a distributor order as complete and add its items to stock
+
+        The status change, the stock increments and the ledger entries are
+        written in a single transaction. Quantities are aggregated per
+        variation and applied with one UPDATE, and the StockHistory rows are
+        inserted in bulk. Receiving an order that was already received is a
+        no-op, so retries and concurrent calls never add stock twice.
+
+        Args:
+            db: Database session
+            order: The distributor order being received
+            user_id: ID of the user receiving the order
+
+        Returns:
+            True if stock was added, False if the order had already been received
+        """
+        # Pending changes to the order (e.g. replaced items) must be visible below
+        db.flush()
+
+        # Claim the receipt: only one caller can move the order to COMPLETO
+        claimed = db.execute(
+            update(DistributorOrder)
+            .where(
+                DistributorOrder.id == order.id,
+                DistributorOrder.status != OrderStatus.COMPLETO
+            )
+            .values(status=OrderStatus.COMPLETO, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount == 1
+
+        already_booked = db.query(StockHistory.id).filter(
+            StockHistory.reason == StockChangeReason.ORDER_RECEIVED,
+            StockHistory.reference_type == "order",
+            StockHistory.reference_id == order.id
+        ).first() is not None
+
+        received = claimed and not already_booked
+        if received:
+            quantities = dict(
+                db.query(DistributorOrderItem.variation_id, func.sum(DistributorOrderItem.quantity))
+                .filter(DistributorOrderItem.order_id == order.id)
+                .group_by(DistributorOrderItem.variation_id)
+                .all()
+            )
+
+            if quantities:
+                db.execute(
+                    update(ProductVariation)
+                    .where(ProductVariation.id.in_(quantities.keys()))
+                    .values(current_stock=ProductVariation.current_stock + case(quantities, value=ProductVariation.id, else_=0))
+                    .execution_options(synchronize_session=False)
+                )
+
+                notes = f"Order received from distributor #{order.distributor_id}"
+                db.execute(insert(StockHistory), [
+                    {
+                        "variation_id": variation_id,
+                        "user_id": user_id,
+                        "change_amount": quantity,
+                        "reason": StockChangeReason.ORDER_RECEIVED,
+                        "reference_type": "order",
+                        "reference_id": order.id,
+                        "notes": notes
+                    }
+                    for variation_id, quantity in quantities.items()
+                ])
+
+        db.commit()
+        return received
+
+    def query_stock_history(
+        self,
+        db: Session,
+        variation_id: Optional[int] = None,
+        product_id: Optional[int] = None,
+        reason: Optional[StockChangeReason] = None,
+        reference_type: Optional[str] = None,
+        reference_id: Optional[int] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Query:
+        """Build a stock history query, newest first, with the given filters"""
+        query = db.query(StockHistory)
+
+        if variation_id is not None:
+            query = query.filter(StockHistory.variation_id == variation_id)
+        if product_id is not None:
+            query = query.filter(StockHistory.variation_id.in_(
+                db.query(ProductVariation.id).filter(ProductVariation.product_id == product_id)
+            ))
+        if reason is not None:
+            query = query.filter(StockHistory.reason == reason)
+        if reference_type is not None:
+            query = query.filter(StockHistory.reference_type == reference_type)
+        if reference_id is not None:
+            query = query.filter(StockHistory.reference_id == reference_id)
+        if start_date is not None:
+            query = query.filter(StockHistory.created_at >= start_date)
+        if end_date is not None:
+            query = query.filter(StockHistory.created_at <= end_date)
+
+        return query.order_by(StockHistory.created_at.desc(), StockHistory.id.desc())
+
+    def get_stock_history_page(
+        self,
+        db: Session,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        **filters
+    ) -> Tuple[List[StockHistory], Optional[str]]:
+        """
+        Get one page of stock history using keyset pagination
+
+        Pages are ordered by (created_at, id) descending and continue after
+        the row encoded in the cursor, so deep pages cost the same as the
+        first one instead of scanning and discarding an offset.
+
+        Args:
+            db: Database session
+            cursor: Cursor returned with the previous page
+            limit: Maximum number of entries to return
+            **filters: Filters accepted by query_stock_history
+
+        Returns:
+            The entries and the cursor of the next page (None on the last page)
+        """
+        query = self.query_stock_history(db, **filters)
+
+        if cursor:
+            created_at, history_id = self.decode_cursor(cursor)
+            query = query.filter(or_(
+                StockHistory.created_at < created_at,
+                and_(StockHistory.created_at == created_at, StockHistory.id < history_id)
+            ))
+
+        # Fetch one extra row to know whether there is a next page
+        items = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = self.encode_cursor(items[-1])
+
+        return items, next_cursor
+
+    @staticmethod
+    def encode_cursor(history: StockHistory) -> str:
+        raw = f"{history.created_at.isoformat()}|{history.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        """Decode a pagination cursor, raising ValueError if it is malformed"""
+        try:
+            created_at, history_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return datetime.fromisoformat(created_at), int(history_id)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+# Create a singleton instance
+inventory_service = InventoryService()
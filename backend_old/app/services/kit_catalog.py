@@ -0,0 +1,189 @@
+import threading
+from typing import Dict, List, Optional, Tuple, Any
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.nutra_product import Kit, KitProduct, ProductVariation, NutraProduct
+from app.schemas.nutra import Kit as KitSchema, ProductVariation as ProductVariationSchema
+
+
+class KitCatalog:
+    """Snapshot of the kit catalog with compositions resolved to variations"""
+
+    def __init__(
+        self,
+        version: Tuple[Any, ...],
+        kits: Dict[int, KitSchema],
+        compositions: Dict[int, Dict[int, int]],
+        variations: Dict[int, ProductVariationSchema]
+    ):
+        self.version = version
+        self.kits = kits
+        self.compositions = compositions
+        self.variations = variations
+
+
+class KitCatalogService:
+    """
+    In-memory cache of the kit catalog.
+
+    The catalog is loaded with a single eager-loaded query and reused until
+    its version changes. The version combines a local generation counter,
+    bumped by invalidate() on kit writes in this process, with a cheap stamp
+    of the kit, composition, variation and product tables so that writes
+    made by other workers are picked up as well. Stock moves with every
+    sale, so it's left out of the stamp: kits are served with the current
+    stock of their variations, read on each lookup.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._catalog: Optional[KitCatalog] = None
+
+    def invalidate(self) -> None:
+        """Drop the cached catalog, forcing a reload on the next lookup"""
+        with self._lock:
+            self._generation += 1
+            self._catalog = None
+
+    def get_catalog(self, db: Session) -> KitCatalog:
+        """Get the current catalog, reloading it if it is stale"""
+        version = (self._generation,) + self._get_db_version(db)
+        catalog = self._catalog
+        if catalog is not None and catalog.version == version:
+            return catalog
+
+        catalog = self._load_catalog(db, version)
+        with self._lock:
+            # Don't publish a snapshot that was invalidated while loading
+            if self._generation == version[0]:
+                self._catalog = catalog
+        return catalog
+
+    def list_kits(self, db: Session, skip: int = 0, limit: int = 100, active_only: bool = True) -> List[KitSchema]:
+        """Get cached kits with pagination"""
+        kits = self.get_catalog(db).kits.values()
+        if active_only:
+            kits = [kit for kit in kits if kit.active]
+        return self.with_stock(db, list(kits)[skip:skip + limit])
+
+    def get_kit(self, db: Session, kit_id: int) -> Optional[KitSchema]:
+        """Get a cached kit by ID"""
+        kit = self.get_catalog(db).kits.get(kit_id)
+        return self.with_stock(db, [kit])[0] if kit is not None else None
+
+    def with_stock(self, db: Session, kits: List[KitSchema]) -> List[KitSchema]:
+        """
+        Copies of cached kits with the current stock of their variations
+
+        Args:
+            db: Database session
+            kits: Kits from the catalog
+
+        Returns:
+            The kits in the same order; the cached ones are left untouched
+        """
+        variation_ids = {
+            kit_product.variation_id for kit in kits for kit_product in kit.kit_products if kit_product.variation
+        }
+        if not variation_ids:
+            return kits
+        stock = dict(db.query(ProductVariation.id, ProductVariation.current_stock).filter(
+            ProductVariation.id.in_(variation_ids)
+        ).all())
+
+        def fresh(kit_product):
+            if kit_product.variation is None or kit_product.variation_id not in stock:
+                return kit_product
+            variation = kit_product.variation.model_copy(update={"current_stock": stock[kit_product.variation_id]})
+            return kit_product.model_copy(update={"variation": variation})
+
+        return [kit.model_copy(update={"kit_products": [fresh(p) for p in kit.kit_products]}) for kit in kits]
+
+    def get_composition(self, db: Session, kit_id: int) -> Optional[Dict[int, int]]:
+        """Get the {variation_id: quantity} map of a kit, or None if the kit doesn't exist"""
+        return self.get_catalog(db).compositions.get(kit_id)
+
+    def get_kits_version(self, db: Session, skip: int = 0, limit: int = 100, active_only: bool = True) -> Tuple[Any, ...]:
+        """
+        Cheap version stamp of a page of list_kits, for conditional GETs
+
+        Takes a single query and loads nothing: the catalog's table stamp plus
+        the count, latest update and total stock of the page's variations.
+        The local generation is left out so that every worker agrees on it.
+
+        Args:
+            db: Database session
+            skip: Number of kits to skip
+            limit: Maximum number of kits
+            active_only: Whether inactive kits are left out
+
+        Returns:
+            A tuple that changes whenever the page would
+        """
+        page = select(Kit.id)
+        if active_only:
+            page = page.where(Kit.active.is_(True))
+        page = page.order_by(Kit.id).offset(skip).limit(limit)
+        variations = (
+            select(ProductVariation.id, ProductVariation.updated_at, ProductVariation.current_stock)
+            .distinct()
+            .join(KitProduct, KitProduct.variation_id == ProductVariation.id)
+            .where(KitProduct.kit_id.in_(page))
+            .subquery()
+        )
+        stock = select(
+            func.count(variations.c.id), func.max(variations.c.updated_at), func.sum(variations.c.current_stock)
+        ).subquery()
+        return tuple(db.execute(select(*self._stamp_columns(), *stock.c)).one())
+
+    def _get_db_version(self, db: Session) -> Tuple[Any, ...]:
+        return tuple(db.execute(select(*self._stamp_columns())).one())
+
+    def _stamp_columns(self) -> List[Any]:
+        # Variation updated_at moves with every stock change; catalog edits
+        # to a variation bump its product's updated_at instead
+        return [
+            select(func.count(Kit.id)).scalar_subquery(),
+            select(func.max(Kit.updated_at)).scalar_subquery(),
+            select(func.count(KitProduct.id)).scalar_subquery(),
+            select(func.max(KitProduct.id)).scalar_subquery(),
+            select(func.count(ProductVariation.id)).scalar_subquery(),
+            select(func.max(ProductVariation.id)).scalar_subquery(),
+            select(func.max(NutraProduct.updated_at)).scalar_subquery()
+        ]
+
+    def _load_catalog(self, db: Session, version: Tuple[Any, ...]) -> KitCatalog:
+        db_kits = (
+            db.query(Kit)
+            .options(
+                selectinload(Kit.kit_products)
+                .selectinload(KitProduct.variation)
+                .selectinload(ProductVariation.product)
+            )
+            .order_by(Kit.id)
+            .all()
+        )
+
+        kits = {}
+        compositions = {}
+        variations = {}
+        for db_kit in db_kits:
+            kit = KitSchema.model_validate(db_kit)
+            kits[kit.id] = kit
+
+            composition = {}
+            for kit_product in kit.kit_products:
+                composition[kit_product.variation_id] = (
+                    composition.get(kit_product.variation_id, 0) + kit_product.quantity
+                )
+                if kit_product.variation is not None:
+                    variations[kit_product.variation_id] = kit_product.variation
+            compositions[kit.id] = composition
+
+        return KitCatalog(version, kits, compositions, variations)
+
+
+# Create a singleton instance
+kit_catalog = KitCatalogService()
@@ -1,10 +1,12 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func, or_
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 
+from app.core.money import to_money
 from app.models.order import Order, BillingHistory, OrderStatus
 from app.schemas.order import OrderCreate, OrderUpdate, BillingHistoryCreate
+from app.services.payments import payment_service
 
 
 class OrderService:
@@ -32,6 +34,39 @@ class OrderService:
         """Get orders created by a specific seller"""
         return db.query(Order).filter(Order.seller_id == seller_id).all()
     
+    def get_orders_version(
+        self,
+        db: Session,
+        collector_id: Optional[int] = None,
+        seller_id: Optional[int] = None,
+        status: Optional[OrderStatus] = None
+    ) -> Tuple[int, Optional[datetime]]:
+        """
+        Cheap version stamp of a list of orders
+
+        Every write to an order (payments included) moves its updated_at,
+        and deletions change the count, so the stamp changes whenever the
+        list does.
+
+        Args:
+            db: Database session
+            collector_id: Only orders assigned to this collector
+            seller_id: Only orders created by this seller
+            status: Only orders with this status
+
+        Returns:
+            (number of orders, latest updated_at)
+        """
+        query = db.query(func.count(Order.id), func.max(Order.updated_at))
+        if collector_id is not None:
+            query = query.filter(Order.collector_id == collector_id)
+        if seller_id is not None:
+            query = query.filter(Order.seller_id == seller_id)
+        if status is not None:
+            query = query.filter(Order.status == status)
+        count, updated_at = query.one()
+        return count, updated_at
+    
     def create_order(self, db: Session, order: OrderCreate, collector_id: Optional[int] = None) -> Order:
         """Create a new order"""
         # Check if this might be a duplicate order
@@ -81,34 +116,17 @@ class OrderService:
         db.refresh(db_order)
         return db_order
     
-    def add_billing_history(self, db: Session, billing: BillingHistoryCreate, created_by: int) -> BillingHistory:
-        """Add a billing history entry to an order"""
-        # Create the billing history entry
-        db_billing = BillingHistory(
+    def add_billing_history(self, db: Session, billing: BillingHistoryCreate, created_by: int) -> Optional[BillingHistory]:
+        """Add a billing history entry to an order, updating its paid amount and status atomically"""
+        result = payment_service.post_payment(
+            db,
             order_id=billing.order_id,
             amount=billing.amount,
+            created_by=created_by,
             notes=billing.notes,
-            created_by=created_by
+            idempotency_key=billing.idempotency_key
         )
-        
-        db.add(db_billing)
-        db.commit()
-        db.refresh(db_billing)
-        
-        # Update the order's paid amount
-        order = self.get_order(db, billing.order_id)
-        if order:
-            order.paid_amount += billing.amount
-            
-            # Update status based on payment
-            if order.paid_amount >= order.total_amount:
-                order.status = OrderStatus.PAID
-            elif order.paid_amount > 0:
-                order.status = OrderStatus.PARTIALLY_PAID
-                
-            db.commit()
-        
-        return db_billing
+        return result.billing if result else None
     
     def get_duplicate_orders(self, db: Session) -> List[Order]:
         """Get orders marked as duplicates"""
@@ -165,22 +183,22 @@ class OrderService:
         ).all()
     
     def get_orders_statistics(self, db: Session):
-        """Get statistics about orders"""
-        total_orders = db.query(func.count(Order.id)).scalar()
-        total_amount = db.query(func.sum(Order.total_amount)).scalar() or 0
-        total_paid = db.query(func.sum(Order.paid_amount)).scalar() or 0
+        """Get statistics about orders, summed exactly by the database"""
+        total_orders, total_amount, total_paid = db.query(
+            func.count(Order.id), func.sum(Order.total_amount), func.sum(Order.paid_amount)
+        ).one()
+        total_amount = total_amount or to_money(0)
+        total_paid = total_paid or to_money(0)
         
-        # Count orders by status
-        status_counts = {}
-        for status in OrderStatus:
-            count = db.query(func.count(Order.id)).filter(Order.status == status).scalar()
-            status_counts[status.value] = count
+        # Count orders by status, in one grouped query
+        counts = dict(db.query(Order.status, func.count(Order.id)).group_by(Order.status).all())
+        status_counts = {status.value: counts.get(status, 0) for status in OrderStatus}
         
         return {
             "total_orders": total_orders,
             "total_amount": total_amount,
             "total_paid": total_paid,
-            "payment_rate": (total_paid / total_amount) if total_amount > 0 else 0,
+            "payment_rate": float(total_paid / total_amount) if total_amount > 0 else 0,
             "status_counts": status_counts
         }
 
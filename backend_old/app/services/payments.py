@@ -0,0 +1,224 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence
+from sqlalchemy import bindparam, case, func, literal, select, update
+from sqlalchemy.orm import Session
+
+from app.core.money import Money, MoneyInput, to_money
+from app.db.bulk import dialect_insert
+from app.models.order import BillingHistory, Order, OrderStatus
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyConflict(Exception):
+    """Raised when an idempotency key is reused for a different payment"""
+
+    def __init__(self, key: str):
+        super().__init__(f"Idempotency key {key} was already used for a different payment")
+        self.key = key
+
+
+@dataclass
+class PaymentResult:
+    """Outcome of posting a payment"""
+    billing: BillingHistory
+    paid_amount: Decimal
+    status: OrderStatus
+    replayed: bool = False  # True when the key had already been applied
+
+
+@dataclass
+class PaymentLine:
+    """A payment to post in a batch"""
+    order_id: int
+    amount: Decimal
+    idempotency_key: str
+    notes: Optional[str] = None
+
+
+class _AlreadyApplied(Exception):
+    """Rolls back the savepoint of a payment whose key was applied concurrently"""
+
+
+class PaymentService:
+    """
+    Posts payments against orders.
+
+    A payment is one transaction: the order row is updated in place with
+    UPDATE ... SET paid_amount = paid_amount + :amount RETURNING, so
+    concurrent payments never lose an update, and the billing entry is
+    inserted alongside it. A payment with an idempotency key already
+    applied returns the original entry instead of paying twice.
+    """
+
+    def post_payment(
+        self,
+        db: Session,
+        order_id: int,
+        amount: MoneyInput,
+        created_by: Optional[int] = None,
+        notes: Optional[str] = None,
+        idempotency_key: Optional[str] = None
+    ) -> Optional[PaymentResult]:
+        """
+        Apply a payment to an order
+
+        Args:
+            db: Database session
+            order_id: ID of the order being paid
+            amount: Amount received
+            created_by: ID of the user recording the payment
+            notes: Free-form notes
+            idempotency_key: Client-chosen key identifying this payment
+
+        Returns:
+            The posted (or previously posted) payment, or None if the order
+            doesn't exist
+        """
+        amount = to_money(amount)
+
+        if idempotency_key:
+            replay = self._replay(db, idempotency_key, order_id, amount)
+            if replay is not None:
+                return replay
+
+        try:
+            with db.begin_nested():
+                row = db.execute(self.apply_statement(order_id, amount)).first()
+                if row is None:
+                    return None
+
+                billing_id = db.execute(self.billing_statement(db, {
+                    "order_id": order_id,
+                    "amount": amount,
+                    "notes": notes,
+                    "created_by": created_by,
+                    "idempotency_key": idempotency_key
+                })).scalar()
+                if billing_id is None:
+                    # A concurrent retry with the same key committed first
+                    raise _AlreadyApplied()
+        except _AlreadyApplied:
+            return self._replay(db, idempotency_key, order_id, amount)
+
+        db.commit()
+        return PaymentResult(billing=db.get(BillingHistory, billing_id), paid_amount=row.paid_amount, status=row.status)
+
+    def post_many(self, db: Session, payments: Sequence[PaymentLine], created_by: Optional[int] = None) -> List[PaymentLine]:
+        """
+        Post a batch of payments in one transaction
+
+        The billing entries go in with one multi-row insert; lines whose
+        idempotency key was already posted are skipped. Each order is then
+        updated once with the sum of its new payments, so its status is
+        recomputed once however many lines paid it.
+
+        Args:
+            db: Database session
+            payments: Payments to post, each with an idempotency key
+            created_by: ID of the user running the import
+
+        Returns:
+            The payments that were applied (not posted before)
+        """
+        if not payments:
+            return []
+
+        inserted = db.execute(
+            dialect_insert(db)(BillingHistory)
+            .values([
+                {
+                    "order_id": payment.order_id,
+                    "amount": payment.amount,
+                    "notes": payment.notes,
+                    "created_by": created_by,
+                    "idempotency_key": payment.idempotency_key
+                }
+                for payment in payments
+            ])
+            .on_conflict_do_nothing(index_elements=[BillingHistory.idempotency_key])
+            .returning(BillingHistory.idempotency_key)
+        ).scalars().all()
+
+        # A key repeated within the batch is inserted, and applied, once
+        new_keys = set(inserted)
+        applied = []
+        for payment in payments:
+            if payment.idempotency_key in new_keys:
+                new_keys.discard(payment.idempotency_key)
+                applied.append(payment)
+
+        totals: Dict[int, Decimal] = {}
+        for payment in applied:
+            totals[payment.order_id] = totals.get(payment.order_id, to_money(0)) + payment.amount
+
+        if totals:
+            orders = Order.__table__
+            new_paid = func.coalesce(orders.c.paid_amount, 0) + bindparam("delta", type_=Money())
+            status = lambda value: literal(value, orders.c.status.type)
+            db.execute(
+                orders.update()
+                .where(orders.c.id == bindparam("order_key"))
+                .values(
+                    paid_amount=new_paid,
+                    status=case(
+                        (new_paid >= orders.c.total_amount, status(OrderStatus.PAID)),
+                        (new_paid > 0, status(OrderStatus.PARTIALLY_PAID)),
+                        else_=orders.c.status
+                    ),
+                    updated_at=datetime.utcnow()
+                ),
+                [{"order_key": order_id, "delta": delta} for order_id, delta in totals.items()]
+            )
+
+        db.commit()
+        return applied
+
+    def apply_statement(self, order_id: int, amount: Decimal):
+        """
+        Single-statement read-modify-write of the order's paid amount and status
+
+        Shared with AsyncOrderService, which runs the same statements.
+        """
+        new_paid = func.coalesce(Order.paid_amount, 0) + amount
+        status = lambda value: literal(value, Order.__table__.c.status.type)
+        return (
+            update(Order)
+            .where(Order.id == order_id)
+            .values(
+                paid_amount=new_paid,
+                status=case(
+                    (new_paid >= Order.total_amount, status(OrderStatus.PAID)),
+                    (new_paid > 0, status(OrderStatus.PARTIALLY_PAID)),
+                    else_=Order.status
+                ),
+                updated_at=datetime.utcnow()
+            )
+            .returning(Order.paid_amount, Order.status)
+            .execution_options(synchronize_session=False)
+        )
+
+    def billing_statement(self, db: Session, values: dict):
+        """INSERT of a billing entry returning its id; none is returned when its key is already used"""
+        statement = dialect_insert(db)(BillingHistory).values(**values)
+        if values["idempotency_key"]:
+            statement = statement.on_conflict_do_nothing(index_elements=[BillingHistory.idempotency_key])
+        return statement.returning(BillingHistory.id)
+
+    def _replay(self, db: Session, key: str, order_id: int, amount: Decimal) -> Optional[PaymentResult]:
+        billing = db.scalars(select(BillingHistory).where(BillingHistory.idempotency_key == key)).first()
+        if billing is None:
+            return None
+        if billing.order_id != order_id or billing.amount != amount:
+            raise IdempotencyConflict(key)
+
+        logger.info(f"Payment {key} was already applied, returning billing entry {billing.id}")
+        order = db.get(Order, order_id)
+        return PaymentResult(billing=billing, paid_amount=order.paid_amount, status=order.status, replayed=True)
+
+
+# Create a singleton instance
+payment_service = PaymentService()
@@ -0,0 +1,198 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.rate_limit import RateLimitBucket
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a call can't get a token before its deadline"""
+
+    def __init__(self, deadline: float, retry_after: float):
+        super().__init__(
+            f"Rate limit: no upstream slot available within {deadline:.2f}s (next one in {retry_after:.2f}s)"
+        )
+        self.deadline = deadline
+        self.retry_after = retry_after  # Seconds until the bucket has a token for a new caller
+
+
+def _reserve(
+    tokens: float,
+    updated_at: float,
+    now: float,
+    rate: float,
+    burst: int,
+    max_wait: Optional[float]
+) -> Tuple[Optional[float], float]:
+    """
+    Take one token from a bucket
+
+    The bucket may go negative: a caller that has to wait reserves the next
+    token, so queued callers are served in order.
+
+    Returns:
+        The new token count, or None if the wait would exceed max_wait (no
+        token is taken then), and how long the caller must wait
+    """
+    tokens = min(float(burst), tokens + (now - updated_at) * rate)
+    wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+    if max_wait is not None and wait > max_wait:
+        return None, wait
+    return tokens - 1, wait
+
+
+class LocalBucketBackend:
+    """Token bucket kept in this process"""
+
+    def __init__(self, burst: int):
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+
+    def reserve(self, rate: float, burst: int, max_wait: Optional[float]) -> Tuple[bool, float]:
+        with self._lock:
+            now = time.monotonic()
+            tokens, wait = _reserve(self._tokens, self._updated_at, now, rate, burst, max_wait)
+            if tokens is None:
+                return False, wait
+            self._tokens = tokens
+            self._updated_at = now
+            return True, wait
+
+
+class DatabaseBucketBackend:
+    """Token bucket stored in the database, shared by every worker"""
+
+    def __init__(self, name: str, session_factory: Callable[[], Session] = SessionLocal):
+        self.name = name
+        self.session_factory = session_factory
+
+    def reserve(self, rate: float, burst: int, max_wait: Optional[float]) -> Tuple[bool, float]:
+        db = self.session_factory()
+        try:
+            bucket = self._lock_bucket(db, burst)
+            now = time.time()
+            tokens, wait = _reserve(bucket.tokens, bucket.updated_at, now, rate, burst, max_wait)
+            if tokens is None:
+                # Nothing changed; closing the session releases the row lock
+                return False, wait
+            bucket.tokens = tokens
+            bucket.updated_at = now
+            db.commit()
+            return True, wait
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _lock_bucket(self, db: Session, burst: int) -> RateLimitBucket:
+        """Load the bucket row with a row lock, creating it on first use"""
+        query = db.query(RateLimitBucket).filter(RateLimitBucket.name == self.name).with_for_update()
+        bucket = query.first()
+        if bucket is not None:
+            return bucket
+
+        try:
+            db.add(RateLimitBucket(name=self.name, tokens=float(burst), updated_at=time.time()))
+            db.commit()
+        except IntegrityError:
+            # Another worker created it first
+            db.rollback()
+        return query.one()
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter for calls to an upstream API.
+
+    Callers wait for their turn instead of being rejected; a caller whose
+    turn would come after its deadline gets RateLimitTimeout right away,
+    without consuming a token. Wait times are recorded for monitoring.
+    """
+
+    def __init__(self, rate: float, burst: int, backend=None, max_wait: Optional[float] = None):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_wait = max_wait
+        self.backend = backend or LocalBucketBackend(self.burst)
+
+        self._lock = threading.Lock()
+        self._recent_waits = deque(maxlen=1000)
+        self._calls = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait_seen = 0.0
+
+    def acquire(self, timeout: Optional[float] = None) -> float:
+        """
+        Wait until a call may be made
+
+        Args:
+            timeout: Longest acceptable wait in seconds (defaults to max_wait)
+
+        Returns:
+            Seconds spent waiting
+        """
+        if self.rate <= 0:
+            return 0.0
+
+        deadline = self.max_wait if timeout is None else timeout
+        granted, wait = self.backend.reserve(self.rate, self.burst, deadline)
+        if not granted:
+            with self._lock:
+                self._timeouts += 1
+            raise RateLimitTimeout(deadline, wait)
+
+        if wait > 0:
+            time.sleep(wait)
+
+        with self._lock:
+            self._calls += 1
+            self._total_wait += wait
+            self._max_wait_seen = max(self._max_wait_seen, wait)
+            self._recent_waits.append(wait)
+        return wait
+
+    def stats(self) -> Dict[str, float]:
+        """Wait-time metrics since the process started"""
+        with self._lock:
+            recent = sorted(self._recent_waits)
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "calls": self._calls,
+                "timeouts": self._timeouts,
+                "avg_wait": self._total_wait / self._calls if self._calls else 0.0,
+                "p95_wait": recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0,
+                "max_wait": self._max_wait_seen
+            }
+
+
+def create_rate_limiter(name: str = "correios") -> RateLimiter:
+    """Build the Correios rate limiter from the application settings"""
+    backend = None
+    if settings.CORREIOS_RATE_LIMIT_BACKEND == "database":
+        backend = DatabaseBucketBackend(name)
+    elif settings.CORREIOS_RATE_LIMIT_BACKEND != "local":
+        logger.warning(f"Unknown rate limit backend {settings.CORREIOS_RATE_LIMIT_BACKEND}, using local")
+
+    return RateLimiter(
+        rate=settings.CORREIOS_RATE_LIMIT,
+        burst=settings.CORREIOS_RATE_BURST,
+        backend=backend,
+        max_wait=settings.CORREIOS_RATE_LIMIT_MAX_WAIT
+    )
+
+
+# Create a singleton instance
+correios_rate_limiter = create_rate_limiter()
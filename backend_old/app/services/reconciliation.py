@@ -0,0 +1,573 @@
+import csv
+import hashlib
+import html
+import itertools
+import logging
+import re
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.money import to_cents, to_money
+from app.models.order import BillingHistory, Order, OrderStatus
+from app.models.reconciliation import ReconciliationBatch, ReconciliationItem, ReconciliationItemStatus
+from app.services.payments import PaymentLine, payment_service
+
+logger = logging.getLogger(__name__)
+
+# Orders that can still receive a payment
+CLOSED_STATUSES = (OrderStatus.PAID, OrderStatus.CANCELLED)
+
+# Accepted CSV headers, compared without accents, case or punctuation
+CSV_COLUMNS = {
+    "transaction_id": ("id", "identificador", "transaction_id", "id_transacao", "fitid", "end_to_end", "e2e_id"),
+    "posted_at": ("data", "date", "data_lancamento", "data_movimento", "dtposted"),
+    "amount": ("valor", "amount", "value", "trnamt"),
+    "payer_name": ("nome", "name", "pagador", "nome_pagador", "payer", "payer_name"),
+    "payer_phone": ("telefone", "phone", "celular", "payer_phone"),
+    "description": ("descricao", "description", "memo", "historico")
+}
+
+# OFX transaction tags and the statement fields they fill
+OFX_FIELDS = {
+    "FITID": "transaction_id",
+    "DTPOSTED": "posted_at",
+    "TRNAMT": "amount",
+    "NAME": "payer_name",
+    "MEMO": "description"
+}
+
+OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+DATE_FORMATS = (
+    "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y",
+    "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d",
+    "%Y%m%d%H%M%S", "%Y%m%d"
+)
+
+ORDER_NUMBER_TOKEN = re.compile(r"[A-Za-z0-9][A-Za-z0-9/-]*")
+PHONE_TOKEN = re.compile(r"\+?\d[\d\s().-]{8,}\d")
+
+
+@dataclass
+class StatementLine:
+    """A credit or debit read from a statement"""
+    line_number: int
+    transaction_id: str
+    amount: Decimal
+    posted_at: Optional[datetime] = None
+    payer_name: Optional[str] = None
+    payer_phone: Optional[str] = None
+    description: Optional[str] = None
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Lowercase, accent-free text with single spaces between words"""
+    if not value:
+        return ""
+    value = unicodedata.normalize("NFKD", value)
+    value = "".join(char for char in value if not unicodedata.combining(char)).casefold()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", value).split())
+
+
+def normalize_phone(value: Optional[str]) -> Optional[str]:
+    """National number (area code and subscriber) of a Brazilian phone"""
+    digits = re.sub(r"\D", "", value or "")
+    if len(digits) in (12, 13) and digits.startswith("55"):
+        digits = digits[2:]
+    return digits if len(digits) in (10, 11) else None
+
+
+def normalize_order_number(value: Optional[str]) -> str:
+    return re.sub(r"[^A-Z0-9]", "", (value or "").upper())
+
+
+def parse_amount(value: str) -> Decimal:
+    """
+    Parse an amount as written in Brazilian or international statements
+
+    Args:
+        value: Amount such as "R$ 1.234,56", "1234.56" or "-10,00"
+
+    Returns:
+        The amount as a two-place Decimal
+
+    Raises:
+        ValueError: If the value isn't an amount
+    """
+    text = re.sub(r"[^\d,.+-]", "", value or "")
+    if "," in text and "." in text:
+        # Whichever separator comes last is the decimal one
+        if text.rfind(",") > text.rfind("."):
+            text = text.replace(".", "").replace(",", ".")
+        else:
+            text = text.replace(",", "")
+    elif "," in text:
+        text = text.replace(",", ".")
+    try:
+        return to_money(text)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value!r}")
+
+
+def parse_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse a statement date; OFX time zone suffixes are dropped"""
+    if not value:
+        return None
+    value = value.split("[")[0].strip()
+    if re.fullmatch(r"\d{14}\.\d+", value):
+        value = value.split(".")[0]
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_csv(stream: TextIO) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """
+    Read statement lines from a CSV file, one row at a time
+
+    The delimiter (comma or semicolon) is taken from the header row.
+
+    Args:
+        stream: Text stream positioned at the header row
+
+    Returns:
+        Iterator of (line number, fields) pairs
+    """
+    header = stream.readline()
+    if not header:
+        return
+    delimiter = ";" if header.count(";") > header.count(",") else ","
+    reader = csv.reader(itertools.chain([header], stream), delimiter=delimiter)
+
+    aliases = {alias: field for field, names in CSV_COLUMNS.items() for alias in names}
+    columns = [aliases.get(normalize_text(name).replace(" ", "_")) for name in next(reader)]
+    if "amount" not in columns:
+        raise ValueError("The statement has no amount column")
+
+    for line_number, row in enumerate(reader, start=2):
+        fields = {column: value.strip() for column, value in zip(columns, row) if column and value.strip()}
+        if fields:
+            yield line_number, fields
+
+
+def parse_ofx(stream: TextIO) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """
+    Read statement lines from an OFX file (SGML or XML), one transaction at a time
+
+    Args:
+        stream: Text stream of the OFX file
+
+    Returns:
+        Iterator of (transaction number, fields) pairs
+    """
+    fields = None
+    number = 0
+    for text in stream:
+        for closing, tag, value in OFX_TAG.findall(text):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if closing and fields is not None:
+                    number += 1
+                    yield number, fields
+                    fields = None
+                elif not closing:
+                    fields = {}
+            elif fields is not None and not closing and tag in OFX_FIELDS and value.strip():
+                fields[OFX_FIELDS[tag]] = html.unescape(value.strip())
+
+
+PARSERS: Dict[str, Callable[[TextIO], Iterator[Tuple[int, Dict[str, str]]]]] = {
+    "csv": parse_csv,
+    "ofx": parse_ofx
+}
+
+
+def read_statement(stream: TextIO, fmt: str) -> Iterator[Optional[StatementLine]]:
+    """
+    Read the lines of a statement
+
+    Lines without a transaction id get one hashed from their content, so
+    importing the same statement again yields the same ids.
+
+    Args:
+        stream: Text stream of the statement file
+        fmt: "csv" or "ofx"
+
+    Returns:
+        Iterator of statement lines; None for lines that can't be read
+    """
+    if fmt not in PARSERS:
+        raise ValueError(f"Unsupported statement format: {fmt}")
+
+    occurrences: Dict[str, int] = defaultdict(int)
+    for line_number, fields in PARSERS[fmt](stream):
+        try:
+            amount = parse_amount(fields.get("amount", ""))
+        except ValueError as e:
+            logger.warning(f"Skipping statement line {line_number}: {e}")
+            yield None
+            continue
+
+        transaction_id = fields.get("transaction_id")
+        if not transaction_id:
+            content = "|".join(fields.get(field, "") for field in ("posted_at", "amount", "payer_name", "payer_phone", "description"))
+            occurrences[content] += 1
+            transaction_id = hashlib.sha256(f"{content}|{occurrences[content]}".encode()).hexdigest()[:32]
+
+        yield StatementLine(
+            line_number=line_number,
+            transaction_id=transaction_id,
+            amount=amount,
+            posted_at=parse_date(fields.get("posted_at")),
+            payer_name=fields.get("payer_name"),
+            payer_phone=fields.get("payer_phone"),
+            description=fields.get("description")
+        )
+
+
+def statement_key(transaction_id: str) -> str:
+    """Idempotency key of the payment posted for a statement line"""
+    return f"stmt:{transaction_id}"
+
+
+class OrderIndex:
+    """
+    Hash indexes over the open orders, built once per import.
+
+    Every statement line is matched with dictionary lookups by order
+    number, phone, payer name and amount due, instead of a query per line.
+    """
+
+    def __init__(self):
+        self.due: Dict[int, int] = {}  # Cents still owed per order
+        self.by_number: Dict[str, Set[int]] = defaultdict(set)
+        self.by_phone: Dict[str, Set[int]] = defaultdict(set)
+        self.by_name: Dict[str, Set[int]] = defaultdict(set)
+        self.by_due: Dict[int, Set[int]] = defaultdict(set)
+
+    @classmethod
+    def load(cls, db: Session) -> "OrderIndex":
+        """Index the orders that can still be paid"""
+        index = cls()
+        rows = db.execute(
+            select(
+                Order.id, Order.order_number, Order.customer_name, Order.customer_phone,
+                Order.total_amount, Order.paid_amount
+            )
+            .where(Order.status.notin_(CLOSED_STATUSES))
+            .execution_options(yield_per=5000)
+        )
+        for row in rows:
+            index.add(
+                row.id, row.order_number, row.customer_name, row.customer_phone,
+                to_cents(row.total_amount) - to_cents(row.paid_amount or 0)
+            )
+        return index
+
+    def add(self, order_id: int, order_number: str, customer_name: str, customer_phone: str, due: int) -> None:
+        self.due[order_id] = due
+        self.by_due[due].add(order_id)
+        if normalize_order_number(order_number):
+            self.by_number[normalize_order_number(order_number)].add(order_id)
+        if normalize_phone(customer_phone):
+            self.by_phone[normalize_phone(customer_phone)].add(order_id)
+        if normalize_text(customer_name):
+            self.by_name[normalize_text(customer_name)].add(order_id)
+
+    def apply(self, order_id: int, cents: int) -> None:
+        """Lower the amount due of an order paid earlier in the same import"""
+        self.by_due[self.due[order_id]].discard(order_id)
+        self.due[order_id] -= cents
+        self.by_due[self.due[order_id]].add(order_id)
+
+    def match(self, line: StatementLine) -> Tuple[Optional[int], str]:
+        """
+        Find the order a statement line pays
+
+        Keys are tried from the most to the least specific. When a key
+        points at several orders, the one whose amount due equals the
+        line's amount is taken.
+
+        Args:
+            line: Statement line to match
+
+        Returns:
+            (order ID, key it was matched by), or (None, why it wasn't matched)
+        """
+        cents = to_cents(line.amount)
+        text = " ".join(value for value in (line.description, line.payer_name) if value)
+
+        numbers = {normalize_order_number(token) for token in ORDER_NUMBER_TOKEN.findall(text)}
+        candidates = self._lookup(self.by_number, numbers)
+        if candidates:
+            return self._pick(candidates, cents, "order number")
+
+        phones = {normalize_phone(token) for token in PHONE_TOKEN.findall(text)}
+        phones.add(normalize_phone(line.payer_phone))
+        candidates = self._lookup(self.by_phone, phones)
+        if candidates:
+            return self._pick(candidates, cents, "phone")
+
+        candidates = self.by_name.get(normalize_text(line.payer_name))
+        if candidates:
+            return self._pick(candidates, cents, "name")
+
+        if settings.RECONCILIATION_MATCH_BY_AMOUNT:
+            candidates = self.by_due.get(cents)
+            if candidates:
+                return self._pick(candidates, cents, "amount")
+
+        return None, "No open order matches the line"
+
+    @staticmethod
+    def _lookup(index: Dict[str, Set[int]], keys: Iterable[Optional[str]]) -> Set[int]:
+        found: Set[int] = set()
+        for key in keys:
+            if key and key in index:
+                found |= index[key]
+        return found
+
+    def _pick(self, candidates: Set[int], cents: int, key: str) -> Tuple[Optional[int], str]:
+        if len(candidates) == 1:
+            return next(iter(candidates)), key
+        exact = [order_id for order_id in candidates if self.due[order_id] == cents]
+        if len(exact) == 1:
+            return exact[0], f"{key} and amount"
+        return None, f"{len(candidates)} open orders match the {key}"
+
+
+class ItemAlreadyReviewed(Exception):
+    """Raised when a review item was already resolved or ignored"""
+
+    def __init__(self, item: ReconciliationItem):
+        super().__init__(f"Reconciliation item {item.id} is already {item.status.value}")
+        self.item = item
+
+
+class ReconciliationService:
+    """
+    Reconciles bank and PIX statements with the open orders.
+
+    A statement is read as a stream and handled in chunks: each chunk's
+    matched lines are posted with one batched payment write, and the lines
+    no order could be found for are queued for review. Every line is
+    posted under an idempotency key derived from its transaction id, so
+    importing the same statement twice never pays an order twice.
+    """
+
+    def import_statement(
+        self,
+        db: Session,
+        stream: TextIO,
+        fmt: str,
+        filename: Optional[str] = None,
+        user_id: Optional[int] = None
+    ) -> ReconciliationBatch:
+        """
+        Import a statement and post the payments it contains
+
+        Args:
+            db: Database session
+            stream: Text stream of the statement file
+            fmt: "csv" or "ofx"
+            filename: Name of the uploaded file
+            user_id: ID of the user running the import
+
+        Returns:
+            The import batch with its counters
+
+        Raises:
+            ValueError: If the format is unsupported or the file has no amounts
+        """
+        if fmt not in PARSERS:
+            raise ValueError(f"Unsupported statement format: {fmt}")
+
+        batch = ReconciliationBatch(
+            filename=filename, format=fmt, created_by=user_id,
+            lines=0, matched=0, already_posted=0, unmatched=0, skipped=0, posted_amount=to_money(0)
+        )
+        db.add(batch)
+        db.flush()
+
+        index = OrderIndex.load(db)
+        chunk: List[StatementLine] = []
+        for line in read_statement(stream, fmt):
+            batch.lines += 1
+            if line is None or line.amount <= 0:
+                # Unreadable lines, debits and zero amounts aren't payments
+                batch.skipped += 1
+                continue
+            chunk.append(line)
+            if len(chunk) >= settings.RECONCILIATION_BATCH_SIZE:
+                self._post_chunk(db, batch, index, chunk, user_id)
+                chunk = []
+        self._post_chunk(db, batch, index, chunk, user_id)
+
+        logger.info(
+            f"Statement {filename or batch.id}: {batch.lines} lines, {batch.matched} posted, "
+            f"{batch.already_posted} already posted, {batch.unmatched} queued for review"
+        )
+        return batch
+
+    def _post_chunk(
+        self,
+        db: Session,
+        batch: ReconciliationBatch,
+        index: OrderIndex,
+        chunk: List[StatementLine],
+        user_id: Optional[int]
+    ) -> None:
+        """Match, post and queue one chunk of statement lines, then commit"""
+        ids = [line.transaction_id for line in chunk]
+        posted = set(db.scalars(
+            select(BillingHistory.idempotency_key)
+            .where(BillingHistory.idempotency_key.in_([statement_key(id) for id in ids]))
+        ))
+        queued = dict(db.execute(
+            select(ReconciliationItem.transaction_id, ReconciliationItem.status)
+            .where(ReconciliationItem.transaction_id.in_(ids))
+        ).all())
+
+        payments: List[PaymentLine] = []
+        items = []
+        seen: Set[str] = set()
+        for line in chunk:
+            key = statement_key(line.transaction_id)
+            if key in posted:
+                batch.already_posted += 1
+                continue
+            if line.transaction_id in seen or queued.get(line.transaction_id) == ReconciliationItemStatus.IGNORED:
+                batch.skipped += 1
+                continue
+            seen.add(line.transaction_id)
+            if line.transaction_id in queued:
+                batch.unmatched += 1
+                continue
+
+            order_id, how = index.match(line)
+            if order_id is None:
+                items.append({
+                    "batch_id": batch.id,
+                    "line_number": line.line_number,
+                    "transaction_id": line.transaction_id,
+                    "posted_at": line.posted_at,
+                    "amount": line.amount,
+                    "payer_name": line.payer_name,
+                    "payer_phone": line.payer_phone,
+                    "description": line.description,
+                    "reason": how,
+                    "status": ReconciliationItemStatus.PENDING
+                })
+                continue
+
+            index.apply(order_id, to_cents(line.amount))
+            payments.append(PaymentLine(
+                order_id=order_id,
+                amount=line.amount,
+                idempotency_key=key,
+                notes=f"Statement {line.transaction_id} matched by {how}"
+            ))
+
+        if items:
+            db.execute(insert(ReconciliationItem), items)
+            batch.unmatched += len(items)
+
+        applied = payment_service.post_many(db, payments, created_by=user_id)
+        batch.matched += len(applied)
+        batch.already_posted += len(payments) - len(applied)
+        batch.posted_amount = batch.posted_amount + sum((payment.amount for payment in applied), to_money(0))
+        # post_many only commits when it had payments to post
+        db.commit()
+
+    def get_review_queue(
+        self,
+        db: Session,
+        status: ReconciliationItemStatus = ReconciliationItemStatus.PENDING,
+        after_id: Optional[int] = None,
+        limit: int = 100
+    ) -> List[ReconciliationItem]:
+        """Get statement lines waiting for review, oldest first"""
+        query = select(ReconciliationItem).where(ReconciliationItem.status == status)
+        if after_id is not None:
+            query = query.where(ReconciliationItem.id > after_id)
+        return list(db.scalars(query.order_by(ReconciliationItem.id).limit(limit)))
+
+    def get_item(self, db: Session, item_id: int) -> Optional[ReconciliationItem]:
+        """Get a review item by ID"""
+        return db.get(ReconciliationItem, item_id)
+
+    def resolve_item(
+        self,
+        db: Session,
+        item: ReconciliationItem,
+        order_id: int,
+        user_id: int
+    ) -> Optional[ReconciliationItem]:
+        """
+        Post a queued statement line to the order picked by a reviewer
+
+        The payment uses the line's idempotency key, so resolving again
+        after a failure doesn't pay twice.
+
+        Args:
+            db: Database session
+            item: Review item to resolve
+            order_id: ID of the order the line pays
+            user_id: ID of the reviewer
+
+        Returns:
+            The resolved item, or None if the order doesn't exist
+
+        Raises:
+            ItemAlreadyReviewed: If the item isn't pending
+            IdempotencyConflict: If the line was already posted to another order
+        """
+        if item.status != ReconciliationItemStatus.PENDING:
+            raise ItemAlreadyReviewed(item)
+
+        result = payment_service.post_payment(
+            db, order_id, item.amount,
+            created_by=user_id,
+            notes=f"Statement {item.transaction_id} matched by review",
+            idempotency_key=statement_key(item.transaction_id)
+        )
+        if result is None:
+            return None
+
+        item.status = ReconciliationItemStatus.RESOLVED
+        item.order_id = order_id
+        item.resolved_by = user_id
+        item.resolved_at = datetime.utcnow()
+        db.commit()
+        return item
+
+    def ignore_item(self, db: Session, item: ReconciliationItem, user_id: int) -> ReconciliationItem:
+        """
+        Mark a queued statement line as not being a customer payment
+
+        Raises:
+            ItemAlreadyReviewed: If the item isn't pending
+        """
+        if item.status != ReconciliationItemStatus.PENDING:
+            raise ItemAlreadyReviewed(item)
+
+        item.status = ReconciliationItemStatus.IGNORED
+        item.resolved_by = user_id
+        item.resolved_at = datetime.utcnow()
+        db.commit()
+        return item
+
+
+# Create a singleton instance
+reconciliation_service = ReconciliationService()
@@ -0,0 +1,198 @@
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import and_, func, insert, delete, or_
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import settings
+from app.models.nutra_product import (
+    ProductVariation, StockHistory, StockChangeReason,
+    StockConsumptionDaily, ReplenishmentForecast
+)
+from app.models.setting import Setting
+
+# Last StockHistory id seen by the daily consumption rollup
+WATERMARK_KEY = "replenishment_last_stock_history_id"
+
+
+class ReplenishmentService:
+    """Service for forecasting stock-outs and suggesting distributor order quantities"""
+
+    def refresh(self, db: Session, as_of: Optional[date] = None) -> int:
+        """
+        Fold new kit sales into the daily rollup and recompute every forecast
+
+        Only the days with sales added since the previous run, and the last
+        few days, are re-aggregated, so the nightly job stays cheap as the
+        ledger grows. Forecasts are then recomputed from the compact daily
+        rollup.
+
+        Args:
+            db: Database session
+            as_of: Day the forecast is made for (defaults to today, UTC)
+
+        Returns:
+            Number of forecasts written
+        """
+        as_of = as_of or datetime.utcnow().date()
+        watermark = self._update_consumption(db)
+        count = self._compute_forecasts(db, as_of)
+
+        # set_setting commits, so rollup, forecasts and watermark land together
+        Setting.set_setting(db, WATERMARK_KEY, str(watermark))
+        return count
+
+    def get_forecasts(
+        self,
+        db: Session,
+        reorder_only: bool = False,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[ReplenishmentForecast]:
+        """Get forecasts, soonest stock-out first"""
+        query = db.query(ReplenishmentForecast).options(
+            joinedload(ReplenishmentForecast.variation).joinedload(ProductVariation.product)
+        )
+        if reorder_only:
+            query = query.filter(ReplenishmentForecast.suggested_quantity > 0)
+
+        return query.order_by(
+            ReplenishmentForecast.days_until_stockout.is_(None),
+            ReplenishmentForecast.days_until_stockout,
+            ReplenishmentForecast.variation_id
+        ).offset(skip).limit(limit).all()
+
+    def _update_consumption(self, db: Session) -> int:
+        """
+        Re-aggregate the kit sales of every day that may have changed
+
+        A sale committed after a run can have a lower id than that run's
+        watermark, so ids alone would skip it. Days are rebuilt from the
+        ledger instead of incremented, which makes re-scanning them
+        harmless: the days of rows added since the watermark (including
+        backdated ones) and the trailing REPLENISHMENT_RESCAN_DAYS, where
+        late commits land.
+        """
+        # Read past the settings cache: a stale watermark would skip new days
+        last_id = int(Setting.get_setting(db, WATERMARK_KEY, "0", cached=False) or 0)
+        upper_id = db.query(func.max(StockHistory.id)).scalar() or 0
+
+        day = func.date(StockHistory.created_at)
+        is_sale = StockHistory.reason == StockChangeReason.KIT_SALE
+        recent = datetime.utcnow().date() - timedelta(days=settings.REPLENISHMENT_RESCAN_DAYS)
+        older_days = {
+            self._as_date(sale_day)
+            for sale_day, in db.query(day).filter(
+                StockHistory.id > last_id,
+                StockHistory.id <= upper_id,
+                StockHistory.created_at < datetime.combine(recent, time.min),
+                is_sale
+            ).distinct()
+        }
+
+        # Ranges on created_at rather than DATE(): they use its index and compare the same on every dialect
+        in_scope = or_(StockHistory.created_at >= datetime.combine(recent, time.min), *[
+            and_(
+                StockHistory.created_at >= datetime.combine(sale_day, time.min),
+                StockHistory.created_at < datetime.combine(sale_day + timedelta(days=1), time.min)
+            )
+            for sale_day in sorted(older_days)
+        ])
+        rows = db.query(
+            StockHistory.variation_id,
+            day,
+            func.sum(StockHistory.change_amount)
+        ).filter(in_scope, is_sale).group_by(StockHistory.variation_id, day).all()
+
+        db.execute(delete(StockConsumptionDaily).where(
+            or_(StockConsumptionDaily.day >= recent, StockConsumptionDaily.day.in_(sorted(older_days)))
+        ))
+
+        # Kit sales are recorded as negative stock changes
+        db.add_all([
+            StockConsumptionDaily(variation_id=variation_id, day=self._as_date(sale_day), quantity=-int(total))
+            for variation_id, sale_day, total in rows
+        ])
+        db.flush()
+        return max(upper_id, last_id)
+
+    def _compute_forecasts(self, db: Session, as_of: date) -> int:
+        """Recompute the forecast of every active variation"""
+        window = settings.REPLENISHMENT_WINDOW_DAYS
+        smoothing = min(settings.REPLENISHMENT_SMOOTHING_DAYS, window)
+        horizon = settings.REPLENISHMENT_LEAD_TIME_DAYS + settings.REPLENISHMENT_COVERAGE_DAYS
+
+        db.execute(delete(ReplenishmentForecast))
+
+        variations = db.query(
+            ProductVariation.id,
+            ProductVariation.current_stock,
+            ProductVariation.minimum_stock
+        ).filter(ProductVariation.active == True).order_by(ProductVariation.id).all()
+        if not variations:
+            return 0
+
+        ids = [variation_id for variation_id, _, _ in variations]
+        stock = np.array([current or 0 for _, current, _ in variations], dtype=float)
+        minimum = np.array([minimum or 0 for _, _, minimum in variations], dtype=float)
+
+        # Consumption matrix: one row per variation, one column per day of the window
+        start = as_of - timedelta(days=window)
+        usage = np.zeros((len(ids), window))
+        rows = db.query(
+            StockConsumptionDaily.variation_id,
+            StockConsumptionDaily.day,
+            StockConsumptionDaily.quantity
+        ).filter(
+            StockConsumptionDaily.day >= start,
+            StockConsumptionDaily.day < as_of,
+            StockConsumptionDaily.variation_id.in_(ids)
+        ).all()
+        if rows:
+            positions = {variation_id: i for i, variation_id in enumerate(ids)}
+            row_index = np.array([positions[variation_id] for variation_id, _, _ in rows])
+            day_index = np.array([(day - start).days for _, day, _ in rows])
+            np.add.at(usage, (row_index, day_index), np.array([quantity for _, _, quantity in rows], dtype=float))
+
+        velocity = self._daily_velocity(usage, smoothing)
+        days_until_stockout = np.divide(stock, velocity, out=np.full_like(stock, np.inf), where=velocity > 0)
+        suggested = np.ceil(np.maximum(velocity * horizon + minimum - stock, 0)).astype(int)
+
+        computed_at = datetime.utcnow()
+        db.execute(insert(ReplenishmentForecast), [
+            {
+                "variation_id": variation_id,
+                "daily_velocity": float(velocity[i]),
+                "days_until_stockout": float(days_until_stockout[i]) if np.isfinite(days_until_stockout[i]) else None,
+                "suggested_quantity": int(suggested[i]),
+                "computed_at": computed_at
+            }
+            for i, variation_id in enumerate(ids)
+        ])
+        return len(ids)
+
+    @staticmethod
+    def _daily_velocity(usage: np.ndarray, smoothing: int) -> np.ndarray:
+        """
+        Expected daily consumption per row of a (variations x days) matrix
+
+        Rolling averages of `smoothing` days are computed for every variation
+        at once from a cumulative sum, then combined with linearly increasing
+        weights so recent weeks count more than older ones.
+        """
+        cumulative = np.cumsum(np.pad(usage, ((0, 0), (1, 0))), axis=1)
+        rolling = (cumulative[:, smoothing:] - cumulative[:, :-smoothing]) / smoothing
+        weights = np.arange(1, rolling.shape[1] + 1, dtype=float)
+        return rolling @ weights / weights.sum()
+
+    @staticmethod
+    def _as_date(value) -> date:
+        # SQLite returns DATE() as an ISO string, PostgreSQL as a date
+        if isinstance(value, date):
+            return value
+        return date.fromisoformat(value)
+
+
+# Create a singleton instance
+replenishment_service = ReplenishmentService()
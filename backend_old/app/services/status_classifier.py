@@ -0,0 +1,140 @@
+import json
+import logging
+import re
+import threading
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.setting import Setting
+
+logger = logging.getLogger(__name__)
+
+# Setting holding the editable phrase lists, as a JSON object keyed by category
+PHRASES_KEY = "tracking_status_phrases"
+
+DELIVERED = "delivered"
+CRITICAL = "critical"
+RETURNED = "returned"
+IN_TRANSIT = "in_transit"
+UNKNOWN = "unknown"
+
+# When a status matches phrases of several categories, the first one wins
+PRIORITY = (RETURNED, CRITICAL, DELIVERED)
+
+# Delivered phrases don't match when negated ("objeto não entregue"), in edited lists too
+NEGATED = {DELIVERED: r"(?<!nao )"}
+
+DEFAULT_PHRASES: Dict[str, List[str]] = {
+    RETURNED: [
+        'objeto devolvido',
+        'entregue ao remetente',
+        'devolvido ao remetente'
+    ],
+    CRITICAL: [
+        'endereço incorreto',
+        'objeto aguardando retirada',
+        'tentativa de entrega',
+        'objeto roubado',
+        'objeto extraviado',
+        'recusado',
+        'entrega não efetuada',
+        'não entregue'
+    ],
+    DELIVERED: [
+        'entregue'
+    ]
+}
+
+
+def normalize_status(text: str) -> str:
+    """Lowercase a status and strip its accents"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+class _CompiledPhrases:
+    """Phrase lists compiled into a single regex, with a per-status result cache"""
+
+    def __init__(self, phrases: Dict[str, List[str]]):
+        self.phrases = phrases
+        alternatives = []
+        for category in PRIORITY:
+            words = sorted({normalize_status(p) for p in phrases.get(category, []) if p.strip()}, key=len, reverse=True)
+            if words:
+                alternatives.append(
+                    f"(?P<{category}>{NEGATED.get(category, '')}(?:{'|'.join(re.escape(word) for word in words)}))"
+                )
+        # A lookahead reports a match at every position, so a phrase overlapping
+        # a lower-priority one starting earlier is still found in the same pass
+        self.pattern = re.compile(f"(?=(?:{'|'.join(alternatives)}))") if alternatives else None
+        self.classify = lru_cache(maxsize=4096)(self._classify)
+
+    def _classify(self, status: str) -> str:
+        if not status:
+            return UNKNOWN
+        if self.pattern is None:
+            return IN_TRANSIT
+
+        found = {match.lastgroup for match in self.pattern.finditer(normalize_status(status))}
+        for category in PRIORITY:
+            if category in found:
+                return category
+        return IN_TRANSIT
+
+
+class StatusClassifier:
+    """
+    Classifies Correios statuses into delivered, critical, returned or in transit.
+
+    The phrase lists are compiled once into an accent-insensitive regex, and
+    results are memoized per distinct status string. Editable lists are
+    stored in the `tracking_status_phrases` setting; `load` recompiles only
+    when the stored value changed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._raw: Optional[str] = None
+        self._compiled = _CompiledPhrases(DEFAULT_PHRASES)
+
+    @property
+    def phrases(self) -> Dict[str, List[str]]:
+        return self._compiled.phrases
+
+    def load(self, db: Session) -> None:
+        """Pick up phrase lists edited in the settings table"""
+        raw = Setting.get_setting(db, PHRASES_KEY, "")
+        if raw == self._raw:
+            return
+
+        with self._lock:
+            if raw == self._raw:
+                return
+            phrases = DEFAULT_PHRASES
+            if raw:
+                try:
+                    phrases = {**DEFAULT_PHRASES, **json.loads(raw)}
+                except ValueError:
+                    logger.error(f"Invalid {PHRASES_KEY} setting, using the default phrases")
+            self._compiled = _CompiledPhrases(phrases)
+            self._raw = raw
+
+    def save(self, db: Session, phrases: Dict[str, List[str]]) -> None:
+        """Store edited phrase lists and start using them"""
+        Setting.set_setting(db, PHRASES_KEY, json.dumps(phrases, ensure_ascii=False))
+        self.load(db)
+
+    def classify(self, status: str) -> str:
+        """Category of a status string"""
+        return self._compiled.classify(status)
+
+    def is_critical(self, status: str) -> bool:
+        """Whether a status needs attention (critical or returned)"""
+        return self.classify(status) in (CRITICAL, RETURNED)
+
+
+# Create a singleton instance
+status_classifier = StatusClassifier()
@@ -0,0 +1,167 @@
+import hashlib
+import logging
+import math
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TrackingBackendError(Exception):
+    """Raised when a tracking backend fails to answer"""
+
+
+class TrackingBackend(ABC):
+    """
+    Source of tracking information for CorreiosService.
+
+    Implementations return results in the CorreiosService format
+    (codigo, eventos, entregue, servico) and raise TrackingBackendError
+    when the lookup fails.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def track(self, tracking_code: str) -> Dict[str, Any]:
+        """Look up a tracking code"""
+
+
+# Simulated outcomes: (threshold, local, status, subStatus); the first threshold
+# below the code's draw wins, matching the spread of the former mock data
+SIMULATED_OUTCOMES = [
+    (0.7, "São Paulo / SP", "Objeto entregue ao destinatário", ""),
+    (0.6, "São Paulo / SP", "Objeto saiu para entrega ao destinatário", ""),
+    (0.5, "São Paulo / SP", "Objeto em trânsito - por favor aguarde", ""),
+    (0.4, "São Paulo / SP", "Tentativa de entrega não efetuada", "Endereço incorreto"),
+    (0.3, "São Paulo / SP", "Objeto aguardando retirada no endereço indicado", "Pode ser retirado em uma agência dos Correios"),
+    (0.2, "São Paulo / SP", "Objeto devolvido ao remetente", "Recusado pelo destinatário"),
+    (0.1, "São Paulo / SP", "Objeto em processo de desembaraço", "Aguardando pagamento de tributos"),
+    (0.0, "Curitiba / PR", "Objeto postado", "")
+]
+
+
+class SimulatedTrackingBackend(TrackingBackend):
+    """
+    Deterministic stand-in for the Correios API.
+
+    The outcome of a tracking code is drawn from a generator seeded with a
+    hash of the code, so the same code always gets the same events, and
+    event times are anchored to `base_time` (midnight UTC of the current
+    day by default). Latency follows a log-normal distribution around
+    `latency_ms` and a share `error_rate` of calls fails; both are drawn
+    from one generator seeded with `seed`, so a sequential run is
+    reproducible.
+    """
+
+    name = "simulator"
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        latency_sigma: float = 0.0,
+        error_rate: float = 0.0,
+        seed: str = "",
+        base_time: Optional[datetime] = None,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.seed = seed
+        self.base_time = base_time
+        self.sleep = sleep
+
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+
+    def track(self, tracking_code: str) -> Dict[str, Any]:
+        with self._lock:
+            latency = self._draw_latency()
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+
+        if latency > 0:
+            self.sleep(latency)
+        if failed:
+            raise TrackingBackendError(f"Simulated upstream failure for {tracking_code}")
+
+        return self.simulate(tracking_code)
+
+    def simulate(self, tracking_code: str) -> Dict[str, Any]:
+        """
+        Build the tracking result of a code, without latency or failures
+
+        Args:
+            tracking_code: The tracking code to simulate
+
+        Returns:
+            Simulated tracking information
+        """
+        digest = hashlib.sha256(f"{self.seed}:{tracking_code}".encode()).digest()
+        rng = random.Random(int.from_bytes(digest[:8], "big"))
+
+        draw = rng.random()
+        _, local, status, sub_status = next(
+            (outcome for outcome in SIMULATED_OUTCOMES if draw > outcome[0]), SIMULATED_OUTCOMES[-1]
+        )
+
+        base_time = self.base_time or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        latest = base_time - timedelta(minutes=rng.randrange(12 * 60))
+        posted = latest - timedelta(days=2, minutes=rng.randrange(24 * 60))
+
+        eventos = [
+            self._event(latest, local, status, sub_status),
+            self._event(posted, "Curitiba / PR", "Objeto postado", "")
+        ]
+
+        return {
+            "codigo": tracking_code,
+            "eventos": eventos,
+            "entregue": draw > SIMULATED_OUTCOMES[0][0],
+            "servico": "SEDEX" if rng.random() > 0.5 else "PAC",
+            # Mock data must never be persisted as real tracking events
+            "simulado": True
+        }
+
+    def _draw_latency(self) -> float:
+        """Seconds to wait, from a log-normal distribution around latency_ms"""
+        if self.latency_ms <= 0:
+            return 0.0
+        return self.latency_ms * math.exp(self.latency_sigma * self._random.gauss(0, 1)) / 1000
+
+    @staticmethod
+    def _event(when: datetime, local: str, status: str, sub_status: str) -> Dict[str, Any]:
+        return {
+            "data": when.strftime("%d/%m/%Y"),
+            "hora": when.strftime("%H:%M"),
+            "dataHora": when,
+            "local": local,
+            "status": status,
+            "subStatus": sub_status
+        }
+
+
+def create_tracking_backend() -> Optional[TrackingBackend]:
+    """
+    Build the backend selected by CORREIOS_BACKEND
+
+    Returns:
+        The simulator, or None to use the Correios API
+    """
+    if settings.CORREIOS_BACKEND == "simulator":
+        logger.info("Using the simulated tracking backend")
+        return SimulatedTrackingBackend(
+            latency_ms=settings.SIMULATOR_LATENCY_MS,
+            latency_sigma=settings.SIMULATOR_LATENCY_SIGMA,
+            error_rate=settings.SIMULATOR_ERROR_RATE,
+            seed=settings.SIMULATOR_SEED
+        )
+    if settings.CORREIOS_BACKEND != "correios":
+        logger.warning(f"Unknown tracking backend {settings.CORREIOS_BACKEND}, using the Correios API")
+    return None
@@ -0,0 +1,172 @@
+import logging
+import queue
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.replicas import replica_router
+from app.db.session import SessionLocal
+from app.models.tracking_history import TrackingHistory
+
+logger = logging.getLogger(__name__)
+
+
+class TrackingHistoryRecorder:
+    """
+    Write-behind recorder for tracking history entries.
+
+    Tracking lookups only enqueue their history entry; a background thread
+    writes the queued entries with multi-row inserts when a batch fills up
+    or the flush interval elapses. The queue is bounded: when it is full,
+    callers block for up to `enqueue_timeout` seconds before the entry is
+    dropped, so a slow database slows producers down instead of exhausting
+    memory.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: int = settings.TRACKING_HISTORY_BATCH_SIZE,
+        flush_interval: float = settings.TRACKING_HISTORY_FLUSH_INTERVAL,
+        max_queue_size: int = settings.TRACKING_HISTORY_QUEUE_SIZE,
+        enqueue_timeout: float = settings.TRACKING_HISTORY_ENQUEUE_TIMEOUT
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.dropped = 0
+
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue_size)
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the background flush thread if it isn't running"""
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="tracking-history-recorder", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and write everything still queued"""
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stopping.set()
+            self._wakeup.set()
+            thread.join()
+        self.flush()
+
+    def record(
+        self,
+        tracking_code: str,
+        status: str,
+        success: bool = True,
+        user_id: int = None,
+        details: str = None
+    ) -> bool:
+        """
+        Queue a tracking history entry
+
+        Args:
+            tracking_code: Tracking code
+            status: Status message
+            success: Whether the tracking was successful
+            user_id: ID of the user who performed the tracking
+            details: Additional details
+
+        Returns:
+            False if the queue stayed full and the entry was dropped
+        """
+        entry = {
+            "tracking_code": tracking_code,
+            "timestamp": datetime.utcnow(),
+            "status": status,
+            "success": success,
+            "user_id": user_id,
+            "details": details
+        }
+        try:
+            self._queue.put(entry, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Tracking history queue is full, dropping entry for %s", tracking_code)
+            return False
+
+        if self._thread is None:
+            self.start()
+        if self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def flush(self) -> int:
+        """
+        Write all queued entries now
+
+        A batch whose insert fails is retried once, then dropped.
+
+        Returns:
+            Number of entries written
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._drain()
+                if not batch:
+                    return written
+                if self._write(batch) or self._write(batch):
+                    written += len(batch)
+                else:
+                    self.dropped += len(batch)
+                    logger.error("Dropping %d tracking history entries after a failed retry", len(batch))
+
+    def pending(self) -> int:
+        """Number of entries waiting to be written"""
+        return self._queue.qsize()
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[Dict[str, Any]]) -> bool:
+        db = self.session_factory()
+        try:
+            db.execute(insert(TrackingHistory), batch)
+            db.commit()
+            # The users' next history reads must see these entries
+            for user_id in {entry["user_id"] for entry in batch}:
+                replica_router.note_write(user_id)
+            return True
+        except Exception:
+            db.rollback()
+            logger.exception("Error writing %d tracking history entries", len(batch))
+            return False
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Error flushing tracking history")
+
+
+# Create a singleton instance
+tracking_recorder = TrackingHistoryRecorder()
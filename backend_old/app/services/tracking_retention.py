@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.tracking_history import TrackingHistory, TrackingDailySummary
+from app.schemas.tracking import TrackingRetentionSummary
+
+
+class TrackingRetentionService:
+    """Service for keeping the tracking history table bounded"""
+
+    def purge(self, db: Session, now: Optional[datetime] = None) -> TrackingRetentionSummary:
+        """
+        Remove expired entries and entries beyond each user's cap
+
+        Entries are removed in chunks of TRACKING_HISTORY_PURGE_CHUNK_SIZE
+        rows, each compacted into per-code daily summaries and deleted in its
+        own short transaction, so the purge never holds long locks on the
+        table the tracking endpoints write to.
+
+        Args:
+            db: Database session
+            now: Reference time for the retention window (defaults to now, UTC)
+
+        Returns:
+            Number of entries removed by age and by the per-user cap
+        """
+        now = now or datetime.utcnow()
+        summary = TrackingRetentionSummary()
+
+        if settings.TRACKING_HISTORY_RETENTION_DAYS > 0:
+            cutoff = now - timedelta(days=settings.TRACKING_HISTORY_RETENTION_DAYS)
+            summary.expired = self._purge_chunks(db, TrackingHistory.timestamp < cutoff)
+
+        cap = settings.TRACKING_HISTORY_MAX_PER_USER
+        if cap > 0:
+            over_cap = db.query(TrackingHistory.user_id).filter(
+                TrackingHistory.user_id.isnot(None)
+            ).group_by(TrackingHistory.user_id).having(func.count(TrackingHistory.id) > cap).all()
+
+            for (user_id,) in over_cap:
+                # Newest entry past the cap; it and everything older goes
+                boundary = db.query(TrackingHistory.timestamp, TrackingHistory.id).filter(
+                    TrackingHistory.user_id == user_id
+                ).order_by(TrackingHistory.timestamp.desc(), TrackingHistory.id.desc()).offset(cap).first()
+                if boundary is None:
+                    continue
+
+                summary.over_cap += self._purge_chunks(
+                    db,
+                    TrackingHistory.user_id == user_id,
+                    or_(
+                        TrackingHistory.timestamp < boundary.timestamp,
+                        and_(TrackingHistory.timestamp == boundary.timestamp, TrackingHistory.id <= boundary.id)
+                    )
+                )
+
+        return summary
+
+    def _purge_chunks(self, db: Session, *criteria) -> int:
+        """Compact and delete the matching entries one chunk at a time"""
+        chunk_size = settings.TRACKING_HISTORY_PURGE_CHUNK_SIZE
+        total = 0
+        while True:
+            rows = db.query(
+                TrackingHistory.id,
+                TrackingHistory.tracking_code,
+                TrackingHistory.user_id,
+                TrackingHistory.timestamp,
+                TrackingHistory.status,
+                TrackingHistory.success
+            ).filter(*criteria).order_by(TrackingHistory.id).limit(chunk_size).all()
+            if not rows:
+                break
+
+            self._compact(db, rows)
+            db.execute(
+                delete(TrackingHistory)
+                .where(TrackingHistory.id.in_([row.id for row in rows]))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+
+            total += len(rows)
+            if len(rows) < chunk_size:
+                break
+        return total
+
+    def _compact(self, db: Session, rows: List) -> None:
+        """Fold history rows into their (code, user, day) summaries"""
+        daily: Dict[Tuple[str, Optional[int], object], dict] = {}
+        for row in rows:
+            key = (row.tracking_code, row.user_id, row.timestamp.date())
+            entry = daily.get(key)
+            if entry is None:
+                daily[key] = entry = {
+                    "lookups": 0,
+                    "failures": 0,
+                    "first_seen": row.timestamp,
+                    "last_seen": row.timestamp,
+                    "last_status": row.status
+                }
+            entry["lookups"] += 1
+            entry["failures"] += 0 if row.success else 1
+            entry["first_seen"] = min(entry["first_seen"], row.timestamp)
+            if row.timestamp >= entry["last_seen"]:
+                entry["last_seen"] = row.timestamp
+                entry["last_status"] = row.status
+
+        existing = db.query(TrackingDailySummary).filter(
+            TrackingDailySummary.tracking_code.in_({code for code, _, _ in daily}),
+            TrackingDailySummary.day.in_({day for _, _, day in daily})
+        ).all()
+        for summary in existing:
+            entry = daily.pop((summary.tracking_code, summary.user_id, summary.day), None)
+            if entry is None:
+                continue
+            summary.lookups += entry["lookups"]
+            summary.failures += entry["failures"]
+            summary.first_seen = min(summary.first_seen, entry["first_seen"])
+            if entry["last_seen"] >= summary.last_seen:
+                summary.last_seen = entry["last_seen"]
+                summary.last_status = entry["last_status"]
+
+        db.add_all([
+            TrackingDailySummary(tracking_code=code, user_id=user_id, day=day, **entry)
+            for (code, user_id, day), entry in daily.items()
+        ])
+        db.flush()
+
+
+# Create a singleton instance
+tracking_retention_service = TrackingRetentionService()
@@ -0,0 +1,194 @@
+import logging
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, or_
+from sqlalchemy.orm import Session
+
+from app.db.bulk import chunks, dialect_insert
+from app.models.tracking_event import TrackingEvent, TrackedObject
+
+logger = logging.getLogger(__name__)
+
+# Called with the tracking code and its new events, newest first
+TrackingListener = Callable[[str, List[TrackingEvent]], None]
+
+
+class TrackingStoreService:
+    """Service for persisting tracking events and detecting new ones"""
+
+    def __init__(self):
+        self._listeners: List[TrackingListener] = []
+
+    def add_listener(self, listener: TrackingListener) -> None:
+        """Register a callback notified when a tracking code gets new events"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: TrackingListener) -> None:
+        self._listeners.remove(listener)
+
+    def record_results(self, db: Session, results: Dict[str, Dict[str, Any]]) -> Dict[str, List[TrackingEvent]]:
+        """
+        Store the events of fresh tracking results
+
+        Events are inserted with ON CONFLICT (tracking_code, occurred_at)
+        DO NOTHING RETURNING, so only events that were not stored yet come
+        back, even when two refreshes of the same code race. The per-code
+        pointer to the latest event only moves forward. Listeners are
+        notified after the commit, and only for codes with new events.
+        Rows are inserted BATCH_SIZE at a time in one transaction, so a
+        full batch stays under the database's bind parameter limit.
+
+        Args:
+            db: Database session
+            results: Tracking results keyed by tracking code, as returned by CorreiosService
+
+        Returns:
+            New events per tracking code, newest first; codes without new events are omitted
+        """
+        now = datetime.utcnow()
+        incoming: Dict[str, Tuple[Dict[str, Any], Dict[datetime, Dict[str, Any]]]] = {}
+        for code, result in results.items():
+            # Failed lookups and mock data carry no real events
+            if result.get("error") or result.get("simulado"):
+                continue
+            events = {}
+            for evento in result.get("eventos") or []:
+                occurred_at = self._event_time(evento)
+                if occurred_at is not None:
+                    events.setdefault(occurred_at, evento)
+            incoming[code] = (result, events)
+        if not incoming:
+            return {}
+
+        # Skip events already stored; the conflict clause covers concurrent refreshes
+        existing = set(db.query(TrackingEvent.tracking_code, TrackingEvent.occurred_at).filter(
+            TrackingEvent.tracking_code.in_(incoming.keys())
+        ).all())
+        rows = [
+            {
+                "tracking_code": code,
+                "occurred_at": occurred_at,
+                "data": evento.get("data", ""),
+                "hora": evento.get("hora", ""),
+                "local": evento.get("local") or "",
+                "status": evento.get("status", ""),
+                "sub_status": evento.get("subStatus") or None,
+                "created_at": now
+            }
+            for code, (_, events) in incoming.items()
+            for occurred_at, evento in events.items()
+            if (code, occurred_at) not in existing
+        ]
+
+        insert = dialect_insert(db)
+        new_events: Dict[str, List[TrackingEvent]] = {}
+        for chunk in chunks(rows):
+            stmt = insert(TrackingEvent).values(list(chunk)).on_conflict_do_nothing(
+                index_elements=[TrackingEvent.tracking_code, TrackingEvent.occurred_at]
+            ).returning(TrackingEvent)
+            for event in db.scalars(stmt).all():
+                new_events.setdefault(event.tracking_code, []).append(event)
+        for events in new_events.values():
+            events.sort(key=lambda event: event.occurred_at, reverse=True)
+
+        pointers = []
+        for code, (result, _) in incoming.items():
+            latest = new_events[code][0] if code in new_events else None
+            pointers.append({
+                "tracking_code": code,
+                "servico": result.get("servico") or None,
+                "entregue": bool(result.get("entregue")),
+                "last_event_id": latest.id if latest else None,
+                "last_event_at": latest.occurred_at if latest else None,
+                "last_status": latest.status if latest else None,
+                "last_checked_at": now
+            })
+
+        for chunk in chunks(pointers):
+            stmt = insert(TrackedObject).values(list(chunk))
+            # Only move the pointer when the new event is more recent than the stored one
+            newer = or_(TrackedObject.last_event_at.is_(None), stmt.excluded.last_event_at > TrackedObject.last_event_at)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[TrackedObject.tracking_code],
+                set_={
+                    "servico": stmt.excluded.servico,
+                    "entregue": stmt.excluded.entregue,
+                    "last_checked_at": stmt.excluded.last_checked_at,
+                    **{
+                        field: case((newer, stmt.excluded[field]), else_=getattr(TrackedObject, field))
+                        for field in ("last_event_id", "last_event_at", "last_status")
+                    }
+                }
+            ))
+        db.commit()
+
+        for code, events in new_events.items():
+            logger.info(f"New tracking events for {code}: {events[0].status}")
+            for listener in list(self._listeners):
+                try:
+                    listener(code, events)
+                except Exception:
+                    logger.exception(f"Error notifying tracking listener for {code}")
+
+        return new_events
+
+    def get_events(self, db: Session, tracking_code: str) -> List[TrackingEvent]:
+        """Get the stored events of a tracking code, newest first"""
+        return db.query(TrackingEvent).filter(
+            TrackingEvent.tracking_code == tracking_code
+        ).order_by(TrackingEvent.occurred_at.desc()).all()
+
+    def get_tracking(self, db: Session, tracking_code: str) -> Optional[Dict[str, Any]]:
+        """
+        Build a tracking result from the stored events
+
+        Args:
+            db: Database session
+            tracking_code: Tracking code
+
+        Returns:
+            Tracking information in the CorreiosService format, or None if the code was never stored
+        """
+        tracked = db.query(TrackedObject).filter(TrackedObject.tracking_code == tracking_code).first()
+        if not tracked:
+            return None
+
+        return {
+            "codigo": tracking_code,
+            "eventos": [
+                {
+                    "data": event.data,
+                    "hora": event.hora,
+                    "dataHora": event.occurred_at,
+                    "local": event.local,
+                    "status": event.status,
+                    "subStatus": event.sub_status or ""
+                }
+                for event in self.get_events(db, tracking_code)
+            ],
+            "entregue": tracked.entregue,
+            "servico": tracked.servico
+        }
+
+    @staticmethod
+    def _event_time(evento: Dict[str, Any]) -> Optional[datetime]:
+        """Timestamp of an event, as naive UTC when the API gave a timezone"""
+        occurred_at = evento.get("dataHora")
+        if isinstance(occurred_at, str):
+            try:
+                occurred_at = datetime.fromisoformat(occurred_at.replace("Z", "+00:00"))
+            except ValueError:
+                occurred_at = None
+        if occurred_at is None:
+            try:
+                occurred_at = datetime.strptime(f"{evento.get('data', '')} {evento.get('hora', '')}", "%d/%m/%Y %H:%M")
+            except ValueError:
+                return None
+        if occurred_at.tzinfo is not None:
+            occurred_at = occurred_at.astimezone(timezone.utc).replace(tzinfo=None)
+        return occurred_at
+
+
+# Create a singleton instance
+tracking_store = TrackingStoreService()
@@ -0,0 +1,155 @@
+"""
+Benchmark of the per-request cost of the request logging middleware.
+
+Calls a minimal FastAPI app in process, through the ASGI interface, with
+no logging middleware, with the former BaseHTTPMiddleware implementation,
+and with the current pure ASGI one. Log output goes to /dev/null: the
+former middleware wrote through a StreamHandler on the request path, the
+current one through the queue handler set up by configure_logging. Each
+run reports the mean and p50/p99 time per request and the overhead over
+the bare app.
+
+Usage:
+    python -m benchmarks.middleware_overhead --requests 20000
+    python -m benchmarks.middleware_overhead --sample-rate 0.1
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from benchmarks.tracking_pipeline import percentile
+
+VARIANTS = ("bare", "basehttp", "asgi")
+
+
+def legacy_middleware():
+    """RequestLoggingMiddleware as it was before it became pure ASGI"""
+    from starlette.middleware.base import BaseHTTPMiddleware
+    from starlette.responses import JSONResponse
+
+    logger = logging.getLogger("app.core.middleware")
+
+    class LegacyRequestLoggingMiddleware(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            start_time = time.time()
+            logger.info(f"Request: {request.method} {request.url.path}")
+            try:
+                response = await call_next(request)
+                process_time = time.time() - start_time
+                logger.info(
+                    f"Response: {request.method} {request.url.path} - Status: {response.status_code} - Time: {process_time:.3f}s"
+                )
+                response.headers["X-Process-Time"] = str(process_time)
+                return response
+            except Exception as e:
+                process_time = time.time() - start_time
+                logger.error(
+                    f"Error: {request.method} {request.url.path} - Error: {str(e)} - Time: {process_time:.3f}s"
+                )
+                return JSONResponse(status_code=500, content={"detail": "Internal server error"})
+
+    return LegacyRequestLoggingMiddleware
+
+
+def build_app(variant: str, sample_rate: float):
+    from fastapi import FastAPI
+    from app.core.middleware import RequestLoggingMiddleware
+
+    app = FastAPI()
+    if variant == "basehttp":
+        app.add_middleware(legacy_middleware())
+    elif variant == "asgi":
+        app.add_middleware(RequestLoggingMiddleware, sample_rate=sample_rate)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+def configure_logging(variant: str, devnull) -> None:
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(logging.INFO)
+    if variant == "asgi":
+        from app.core import logging_config
+        logging_config.configure_logging(devnull)
+    else:
+        handler = logging.StreamHandler(devnull)
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+        root.addHandler(handler)
+
+
+async def drive(app, requests: int) -> List[float]:
+    """Time `requests` sequential GET /ping calls straight through the ASGI app"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/ping", "raw_path": b"/ping", "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1234), "server": ("bench", 80)
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await app(dict(scope), receive, send)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_variant(variant: str, requests: int, warmup: int, sample_rate: float, devnull) -> Dict[str, Any]:
+    configure_logging(variant, devnull)
+    app = build_app(variant, sample_rate)
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(drive(app, warmup))
+        timings = loop.run_until_complete(drive(app, requests))
+    finally:
+        loop.close()
+    return {
+        "variant": variant,
+        "requests": requests,
+        "mean_us": round(sum(timings) / len(timings) * 1e6, 1),
+        "p50_us": round(percentile(timings, 50) * 1e6, 1),
+        "p99_us": round(percentile(timings, 99) * 1e6, 1)
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000, help="Timed requests per variant")
+    parser.add_argument("--warmup", type=int, default=1000, help="Untimed requests per variant")
+    parser.add_argument("--sample-rate", type=float, default=1.0, help="ACCESS_LOG_SAMPLE_RATE of the ASGI variant")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    os.environ.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite://")
+
+    # The queue handler's listener is process-wide, so it runs last
+    with open(os.devnull, "w") as devnull:
+        results = [run_variant(variant, args.requests, args.warmup, args.sample_rate, devnull) for variant in VARIANTS]
+
+    bare = results[0]["mean_us"]
+    columns = ("variant", "requests", "mean_us", "p50_us", "p99_us", "overhead_us")
+    print("  ".join(f"{column:>12}" for column in columns))
+    for row in results:
+        row["overhead_us"] = round(row["mean_us"] - bare, 1)
+        print("  ".join(f"{row[column]:>12}" for column in columns))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
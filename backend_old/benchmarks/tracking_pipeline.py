@@ -0,0 +1,348 @@
+"""
+Benchmark of the tracking pipeline against a local Correios stand-in.
+
+Starts an HTTP stand-in for /v1/sro-rastro/{code} with tunable latency and
+failures, serves the API with uvicorn on a scratch SQLite database, and
+drives /tracking/{code}, /tracking/batch and /tracking/check-critical at
+fixed concurrency levels. Each run reports throughput, p50/p95/p99 latency
+and how many upstream calls the requests caused.
+
+Usage:
+    python -m benchmarks.tracking_pipeline --concurrency 1,8,32 --latency-ms 50
+    python -m benchmarks.tracking_pipeline --json results.json
+    python -m benchmarks.tracking_pipeline --baseline results.json --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import requests
+
+SCENARIOS = ("single", "batch", "critical")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class CorreiosStandIn:
+    """Local HTTP server answering /v1/sro-rastro/{code} like the Correios API"""
+
+    def __init__(self, latency_ms: float, latency_sigma: float, failure_rate: float, seed: str):
+        from app.services.tracking_backends import SimulatedTrackingBackend
+
+        self.simulator = SimulatedTrackingBackend(
+            latency_ms=latency_ms,
+            latency_sigma=latency_sigma,
+            error_rate=failure_rate,
+            seed=seed
+        )
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = 0
+
+    def respond(self, tracking_code: str):
+        """Status code and body for a tracking code"""
+        from app.services.tracking_backends import TrackingBackendError
+
+        with self._lock:
+            self.calls += 1
+        try:
+            result = self.simulator.track(tracking_code)
+        except TrackingBackendError as e:
+            return 503, {"msgs": [str(e)]}
+
+        return 200, {
+            "objetos": [{
+                "codObjeto": tracking_code,
+                "tipoPostal": {"categoria": result["servico"]},
+                "eventos": [
+                    {
+                        "dtHrCriado": evento["dataHora"].isoformat(),
+                        "descricao": evento["status"],
+                        "detalhe": evento["subStatus"],
+                        "unidade": dict(zip(("cidade", "uf"), (part.strip() for part in evento["local"].split("/"))))
+                    }
+                    for evento in result["eventos"]
+                ]
+            }]
+        }
+
+    def _handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                prefix = "/v1/sro-rastro/"
+                if not self.path.startswith(prefix):
+                    self.send_error(404)
+                    return
+                status, body = stand_in.respond(self.path[len(prefix):])
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+class ApiServer:
+    """The FastAPI app served by uvicorn in a background thread"""
+
+    def __init__(self, app):
+        import uvicorn
+
+        self.port = free_port()
+        self._server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> None:
+        self._thread.start()
+        deadline = time.monotonic() + 30
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("API server did not start")
+            time.sleep(0.05)
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join()
+
+
+def setup_app(db_path: str, upstream_url: str):
+    """Point the app at a scratch database and the stand-in, with auth bypassed"""
+    from types import SimpleNamespace
+    from sqlalchemy import create_engine
+    from app.api.deps import get_current_active_user
+    from app.db.base import Base
+    from app.db.session import SessionLocal
+    from app.main import app
+    from app.models.setting import Setting
+    from app.models.user import UserRole
+    from app.services.correios_client import correios_client
+
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False, "timeout": 30})
+    Base.metadata.create_all(bind=engine)
+    SessionLocal.configure(bind=engine)
+
+    db = SessionLocal()
+    try:
+        Setting.set_settings(db, {
+            "correios_api_url": upstream_url,
+            "correios_api_key": "benchmark-key",
+            "correios_use_mock": "false"
+        })
+    finally:
+        db.close()
+    correios_client.invalidate()
+
+    user = SimpleNamespace(id=1, is_active=True, role=UserRole.ADMIN)
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    return app
+
+
+def run_scenario(
+    api_url: str,
+    stand_in: CorreiosStandIn,
+    scenario: str,
+    concurrency: int,
+    total_requests: int,
+    codes: List[str],
+    batch_size: int
+) -> Dict[str, Any]:
+    """Send `total_requests` requests with `concurrency` workers and measure them"""
+    local = threading.local()
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def send(index: int) -> None:
+        nonlocal errors
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+
+        start = index * batch_size % len(codes)
+        batch = [codes[(start + offset) % len(codes)] for offset in range(batch_size)]
+        began = time.perf_counter()
+        try:
+            if scenario == "single":
+                response = session.get(f"{api_url}/api/v1/tracking/{codes[index % len(codes)]}")
+            elif scenario == "batch":
+                response = session.post(f"{api_url}/api/v1/tracking/batch", json={"tracking_codes": batch})
+            else:
+                response = session.get(f"{api_url}/api/v1/tracking/check-critical", params={"tracking_codes": batch})
+            failed = response.status_code >= 400
+        except requests.RequestException:
+            failed = True
+        elapsed = time.perf_counter() - began
+
+        with lock:
+            latencies.append(elapsed)
+            errors += failed
+
+    stand_in.reset()
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(send, range(total_requests)))
+    wall = time.perf_counter() - began
+
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "errors": errors,
+        "throughput_rps": round(total_requests / wall, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "upstream_calls": stand_in.calls,
+        "upstream_calls_per_request": round(stand_in.calls / total_requests, 3)
+    }
+
+
+def find_regressions(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float) -> List[str]:
+    """Compare results with a previous run; slower, lower-throughput or chattier runs are regressions"""
+    previous = {(row["scenario"], row["concurrency"]): row for row in baseline}
+    regressions = []
+    for row in results:
+        base = previous.get((row["scenario"], row["concurrency"]))
+        if base is None:
+            continue
+        name = f"{row['scenario']}@{row['concurrency']}"
+        if row["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']}ms -> {row['p95_ms']}ms")
+        if row["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {base['throughput_rps']} -> {row['throughput_rps']} req/s")
+        if row["upstream_calls_per_request"] > base["upstream_calls_per_request"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: upstream calls/request {base['upstream_calls_per_request']} -> {row['upstream_calls_per_request']}"
+            )
+    return regressions
+
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    columns = ("scenario", "concurrency", "requests", "errors", "throughput_rps", "p50_ms", "p95_ms", "p99_ms", "upstream_calls")
+    print("  ".join(f"{column:>14}" for column in columns))
+    for row in results:
+        print("  ".join(f"{row[column]:>14}" for column in columns))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenarios to run")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and concurrency level")
+    parser.add_argument("--codes", type=int, default=100, help="Distinct tracking codes to cycle through")
+    parser.add_argument("--batch-size", type=int, default=20, help="Codes per batch and check-critical request")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Median upstream latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.3, help="Spread of the log-normal upstream latency")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of upstream calls answered with 503")
+    parser.add_argument("--seed", default="benchmark", help="Seed of the stand-in's outcomes, latency and failures")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Compare with results written by a previous run")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown against the baseline")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    scenarios = [name for name in args.scenarios.split(",") if name]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        print(f"Unknown scenarios: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    workdir = tempfile.mkdtemp(prefix="tracking-benchmark-")
+    db_path = os.path.join(workdir, "benchmark.db")
+
+    # Settings are read at import time, so configure them before importing the app
+    os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("CORREIOS_BACKEND", "correios")
+    os.environ.setdefault("CORREIOS_RATE_LIMIT", "0")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    stand_in = CorreiosStandIn(args.latency_ms, args.latency_sigma, args.failure_rate, args.seed)
+    stand_in.start()
+    server = None
+    codes = [f"BM{index:09d}BR" for index in range(args.codes)]
+    results = []
+    try:
+        server = ApiServer(setup_app(db_path, stand_in.url))
+        server.start()
+        for scenario in scenarios:
+            for concurrency in (int(level) for level in args.concurrency.split(",")):
+                results.append(run_scenario(
+                    server.url, stand_in, scenario, concurrency, args.requests, codes, args.batch_size
+                ))
+    finally:
+        if server is not None:
+            server.stop()
+        stand_in.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+import sys
+import logging
+
+from app.db.session import SessionLocal
+from app.services.replenishment import replenishment_service
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def run_replenishment():
+    """Refresh replenishment forecasts (scheduled nightly)"""
+    logger.info("Refreshing replenishment forecasts...")
+    
+    db = SessionLocal()
+    try:
+        count = replenishment_service.refresh(db)
+        logger.info(f"Replenishment forecasts refreshed for {count} variations")
+    except Exception as e:
+        logger.error(f"Error refreshing replenishment forecasts: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    run_replenishment()
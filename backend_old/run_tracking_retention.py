@@ -0,0 +1,25 @@
+import sys
+import logging
+
+from app.db.session import SessionLocal
+from app.services.tracking_retention import tracking_retention_service
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def run_tracking_retention():
+    """Apply the tracking history retention policy (scheduled nightly)"""
+    logger.info("Purging tracking history...")
+    
+    db = SessionLocal()
+    try:
+        summary = tracking_retention_service.purge(db)
+        logger.info(f"Tracking history purged: {summary.expired} expired, {summary.over_cap} over the per-user cap")
+    except Exception as e:
+        logger.error(f"Error purging tracking history: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    run_tracking_retention()
@@ -0,0 +1,73 @@
+import asyncio
+import json
+import threading
+import pytest
+from sqlalchemy.orm import Session
+from app.api.api_v1.endpoints import tracking
+from app.core.config import settings
+from app.models.tracking_event import TrackedObject
+from tests.conftest import TestingSessionLocal
+
+def make_result(code):
+    if code.startswith("ERR"):
+        return {"codigo": code, "eventos": [], "entregue": False, "error": "upstream down"}
+    return {
+        "codigo": code,
+        "eventos": [{"data": "03/06/2024", "hora": "10:15", "local": "São Paulo/SP",
+                     "status": "Objeto entregue ao destinatário", "subStatus": ""}],
+        "entregue": True,
+        "servico": "SEDEX"
+    }
+
+@pytest.fixture
+def lookups(db: Session, monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def track_package_safe(code):
+        with lock:
+            calls.append(code)
+        return make_result(code)
+
+    monkeypatch.setattr(tracking.correios_service, "track_package_safe", track_package_safe)
+    monkeypatch.setattr(tracking, "SessionLocal", lambda: TestingSessionLocal(bind=db.get_bind()))
+    monkeypatch.setattr(tracking.tracking_recorder, "record", lambda **entry: True)
+    return calls
+
+async def collect(generator, limit=None):
+    chunks = []
+    async for chunk in generator:
+        chunks.append(chunk)
+        if limit is not None and len(chunks) >= limit:
+            break
+    await generator.aclose()
+    return chunks
+
+def test_ndjson_streams_one_line_per_code(db: Session, lookups):
+    codes = ["AA000000001BR", "ERR00000002BR", "AA000000003BR", "AA000000001BR"]
+    chunks = asyncio.run(collect(tracking._stream_tracking(codes, user_id=1, fmt="ndjson")))
+
+    results = {line["codigo"]: line for line in map(json.loads, chunks)}
+    assert all(chunk.endswith("\n") for chunk in chunks)
+    # Duplicates are looked up once
+    assert sorted(lookups) == sorted(set(codes))
+    assert results["ERR00000002BR"]["error"] == "upstream down"
+    assert results["AA000000003BR"]["entregue"] is True
+
+    stored = db.query(TrackedObject.tracking_code).all()
+    assert sorted(code for code, in stored) == ["AA000000001BR", "AA000000003BR"]
+
+def test_sse_ends_with_summary_event(lookups):
+    chunks = asyncio.run(collect(tracking._stream_tracking(["AA000000001BR"], user_id=1, fmt="sse")))
+
+    assert chunks[0].startswith("event: result\ndata: ")
+    assert chunks[-1] == 'event: end\ndata: {"count": 1}\n\n'
+
+def test_disconnect_stops_new_lookups(lookups, monkeypatch):
+    monkeypatch.setattr(settings, "TRACKING_STREAM_CONCURRENCY", 2)
+    codes = [f"AA{n:09d}BR" for n in range(20)]
+
+    chunks = asyncio.run(collect(tracking._stream_tracking(codes, user_id=1, fmt="ndjson"), limit=1))
+
+    assert len(chunks) == 1
+    assert len(lookups) <= 3
@@ -1,7 +1,7 @@
 import os
 import sys
 import pytest
-from typing import Generator, Dict, Any
+from typing import Any, Callable, Dict, Generator
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -12,11 +12,13 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 from app.core.test_config import test_settings
 from app.db.base import Base
+from app.api.deps import get_read_db
 from app.db.session import get_db
 from app.main import app
 from app.models.user import User, UserRole
 from app.core.security import get_password_hash
 from app.models.order import Order, OrderStatus
+from app.models.setting import settings_cache
 
 # Create test database engine
 SQLALCHEMY_DATABASE_URL = test_settings.SQLALCHEMY_DATABASE_URI
@@ -48,6 +50,16 @@ def db() -> Generator:
     transaction.rollback()
     connection.close()
 
+    # Settings cached during the test were rolled back with it
+    settings_cache.invalidate()
+
+@pytest.fixture(scope="function")
+def session_factory(db) -> Callable:
+    """
+    Session factory on the test connection, for services that open their own sessions.
+    """
+    return lambda: TestingSessionLocal(bind=db.get_bind())
+
 @pytest.fixture(scope="function")
 def client(db) -> Generator:
     """
@@ -60,6 +72,7 @@ def client(db) -> Generator:
             pass
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
@@ -0,0 +1,127 @@
+import asyncio
+import pytest
+from app.core.security import get_password_hash
+from app.db.async_session import async_database_uri, create_async_session_factory
+from app.db.base import Base
+from app.models.order import Order, OrderStatus
+from app.models.user import User, UserRole
+from app.schemas.order import BillingHistoryCreate, OrderCreate
+from app.services.async_order import async_order_service
+from app.services.async_tracking_history import async_tracking_history_service
+from app.services.async_user import async_user_service
+from app.services.payments import IdempotencyConflict
+
+def test_async_database_uri():
+    assert async_database_uri("postgresql://u:p@db/billing") == "postgresql+asyncpg://u:p@db/billing"
+    assert async_database_uri("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    with pytest.raises(ValueError):
+        async_database_uri("mysql://db/billing")
+
+@pytest.fixture
+def run(tmp_path):
+    """Run a coroutine against a fresh database, passing it an AsyncSession"""
+    factory = create_async_session_factory(f"sqlite:///{tmp_path / 'async.db'}")
+
+    async def setup():
+        async with factory.kw["bind"].begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        async with factory() as db:
+            collectors = [
+                User(email=f"collector{n}@test.com", hashed_password=get_password_hash("secret"),
+                     full_name=f"Collector {n}", role=UserRole.COLLECTOR, is_active=True)
+                for n in range(2)
+            ]
+            seller = User(email="seller@test.com", hashed_password="x", full_name="Seller", role=UserRole.SELLER)
+            db.add_all(collectors + [seller])
+            await db.flush()
+            db.add(Order(order_number="A-1", customer_name="Ana", customer_phone="11999990000",
+                         customer_address="Rua A", total_amount=100.0, paid_amount=0.0,
+                         seller_id=seller.id, collector_id=collectors[0].id))
+            await db.commit()
+
+    async def call(coroutine_function):
+        async with factory() as db:
+            return await coroutine_function(db)
+
+    def runner(coroutine_function):
+        return asyncio.run(call(coroutine_function))
+
+    asyncio.run(setup())
+    yield runner
+    asyncio.run(factory.kw["bind"].dispose())
+
+def test_users(run):
+    user = run(lambda db: async_user_service.authenticate(db, "collector0@test.com", "secret"))
+    assert user.full_name == "Collector 0"
+    assert run(lambda db: async_user_service.authenticate(db, "collector0@test.com", "wrong")) is None
+
+    # Collector 0 already has an order
+    collector = run(async_user_service.get_least_busy_collector)
+    assert collector.email == "collector1@test.com"
+
+    deleted = run(lambda db: async_user_service.delete_user(db, collector.id))
+    assert deleted.email == "collector1@test.com"
+    assert len(run(async_user_service.get_collectors)) == 1
+
+def test_orders(run):
+    async def create(db):
+        collector = await async_user_service.get_least_busy_collector(db)
+        seller = (await async_user_service.get_sellers(db))[0]
+        order = OrderCreate(order_number="A-2", customer_name="Ana", customer_phone="11999990000",
+                            customer_address="Rua A", total_amount=50.0, seller_id=seller.id)
+        return await async_order_service.create_order(db, order, collector.id)
+
+    created = run(create)
+    assert created.is_duplicate is False
+    assert created.collector_id is not None
+    assert created.billing_history == []
+
+    async def pay(db):
+        order = await async_order_service.get_order_by_number(db, "A-1")
+        billing = BillingHistoryCreate(order_id=order.id, amount=100.0, notes="pix")
+        await async_order_service.add_billing_history(db, billing, created_by=order.seller_id)
+        return await async_order_service.get_order(db, order.id)
+
+    paid = run(pay)
+    assert paid.status == OrderStatus.PAID
+    assert [entry.amount for entry in paid.billing_history] == [100.0]
+
+    statistics = run(async_order_service.get_orders_statistics)
+    assert statistics["total_orders"] == 2
+    assert statistics["total_paid"] == 100.0
+    assert statistics["status_counts"]["paid"] == 1
+    assert [order.order_number for order in run(lambda db: async_order_service.search_orders(db, "ana"))] == ["A-1", "A-2"]
+
+def test_payments_are_idempotent(run):
+    async def pay(db):
+        order = await async_order_service.get_order_by_number(db, "A-1")
+        billing = BillingHistoryCreate(order_id=order.id, amount=40.0, idempotency_key="pay-1")
+        first = await async_order_service.add_billing_history(db, billing, created_by=order.seller_id)
+        retry = await async_order_service.add_billing_history(db, billing, created_by=order.seller_id)
+        assert retry.id == first.id
+        # The order loaded before paying reflects the payment
+        assert order.paid_amount == 40.0
+        assert order.status == OrderStatus.PARTIALLY_PAID
+
+        with pytest.raises(IdempotencyConflict):
+            await async_order_service.add_billing_history(
+                db, BillingHistoryCreate(order_id=order.id, amount=50.0, idempotency_key="pay-1"), created_by=order.seller_id
+            )
+        missing = BillingHistoryCreate(order_id=999, amount=10.0)
+        assert await async_order_service.add_billing_history(db, missing, created_by=order.seller_id) is None
+        return await async_order_service.get_order(db, order.id)
+
+    order = run(pay)
+    assert order.paid_amount == 40.0
+    assert len(order.billing_history) == 1
+
+def test_tracking_history(run):
+    async def record(db):
+        for code in ("AA1", "AA2"):
+            await async_tracking_history_service.add_history(db, code, "Objeto postado", user_id=1)
+        await async_tracking_history_service.add_history(db, "BB1", "Objeto postado", user_id=2)
+
+    run(record)
+    assert len(run(lambda db: async_tracking_history_service.get_history(db, user_id=1))) == 2
+    assert run(lambda db: async_tracking_history_service.clear_history(db, user_id=1)) == 2
+    assert [entry.tracking_code for entry in run(async_tracking_history_service.get_history)] == ["BB1"]
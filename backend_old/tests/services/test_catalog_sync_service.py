@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy.orm import Session
+from app.services.catalog_sync import catalog_sync_service
+from app.models.nutra_product import NutraProduct, ProductVariation, StockHistory, ProductType
+from app.schemas.nutra import CatalogItem
+
+def catalog():
+    return [
+        CatalogItem(product_name="Omega 3", sku="OMG-CAP", type=ProductType.CAPSULAS, cost=10.0, sale_price=30.0, current_stock=50),
+        CatalogItem(product_name="Omega 3", sku="OMG-GEL", type=ProductType.GEL, cost=12.0, sale_price=35.0),
+        CatalogItem(product_name="Vitamina D", sku="VTD-GOT", type=ProductType.GOTAS, cost=5.0, sale_price=15.0, current_stock=20),
+    ]
+
+def test_sync_creates_catalog(db: Session):
+    summary = catalog_sync_service.sync(db, catalog(), user_id=1)
+    assert summary.products_created == 2
+    assert summary.variations_created == 3
+    assert summary.variations_updated == 0
+    assert summary.stock_entries == 2
+
+    variation = db.query(ProductVariation).filter(ProductVariation.sku == "OMG-CAP").one()
+    assert variation.product.name == "Omega 3"
+    assert variation.current_stock == 50
+    assert db.query(StockHistory).filter(StockHistory.variation_id == variation.id).one().change_amount == 50
+
+def test_sync_updates_changed_variations_only(db: Session):
+    catalog_sync_service.sync(db, catalog(), user_id=1)
+
+    items = catalog()
+    items[0] = CatalogItem(product_name="Omega 3", sku="OMG-CAP", type=ProductType.CAPSULAS, cost=11.0, sale_price=32.0, current_stock=999)
+    summary = catalog_sync_service.sync(db, items, user_id=1)
+    assert summary.products_created == 0
+    assert summary.variations_created == 0
+    assert summary.updated_skus == ["OMG-CAP"]
+    assert summary.variations_unchanged == 2
+    assert summary.stock_entries == 0
+
+    variation = db.query(ProductVariation).filter(ProductVariation.sku == "OMG-CAP").one()
+    assert variation.sale_price == 32.0
+    assert variation.current_stock == 50  # Stock is only set on creation
+    assert db.query(NutraProduct).count() == 2
+
+def test_sync_updates_existing_products(db: Session):
+    db.add(NutraProduct(name="Omega 3", description="Old description"))
+    db.commit()
+
+    items = catalog()
+    items[0] = CatalogItem(product_name="Omega 3", sku="OMG-CAP", type=ProductType.CAPSULAS, cost=10.0,
+                           sale_price=30.0, description="Ômega 3 de óleo de peixe")
+    summary = catalog_sync_service.sync(db, items, user_id=1)
+
+    assert summary.products_created == 1
+    product = db.query(NutraProduct).filter(NutraProduct.name == "Omega 3").one()
+    assert product.description == "Ômega 3 de óleo de peixe"
+    assert {variation.sku for variation in product.variations} == {"OMG-CAP", "OMG-GEL"}
+
+    # A catalog without a description keeps the stored one
+    catalog_sync_service.sync(db, catalog(), user_id=1)
+    db.refresh(product)
+    assert product.description == "Ômega 3 de óleo de peixe"
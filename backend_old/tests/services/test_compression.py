@@ -0,0 +1,72 @@
+import gzip
+import zlib
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from app.core import compression
+from app.core.compression import CompressionMiddleware, choose_encoding
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/large")
+    def large():
+        return [{"order": n, "status": "pending"} for n in range(200)]
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((f'{{"n": {n}}}\n' for n in range(50)), media_type="application/x-ndjson")
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse(iter(["data: x\n\n"] * 50), media_type="text/event-stream")
+
+    @app.get("/binary")
+    def binary():
+        return PlainTextResponse(b"\x00" * 500, media_type="image/png")
+
+    return TestClient(app)
+
+def _raw_get(client: TestClient, path: str, encoding: str = "gzip"):
+    with client.stream("GET", path, headers={"Accept-Encoding": encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+def test_large_responses_are_gzipped():
+    response, body = _raw_get(_client(), "/large")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(body)
+    assert gzip.decompress(body).startswith(b'[{"order":0')
+
+def test_small_and_incompressible_responses_pass_through():
+    client = _client()
+    for path in ("/small", "/binary", "/events"):
+        response, _ = _raw_get(client, path)
+        assert "content-encoding" not in response.headers
+
+    response, body = _raw_get(client, "/large", encoding="identity")
+    assert "content-encoding" not in response.headers
+
+def test_streams_are_compressed_chunk_by_chunk():
+    response, body = _raw_get(_client(), "/stream")
+
+    assert response.headers["content-encoding"] == "gzip"
+    lines = zlib.decompress(body, 16 + zlib.MAX_WBITS).decode().splitlines()
+    assert lines[0] == '{"n": 0}' and len(lines) == 50
+
+def test_choose_encoding(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert choose_encoding("gzip, deflate, br") == "gzip"
+    assert choose_encoding("gzip;q=0, identity") is None
+    assert choose_encoding("*") == "gzip"
+    assert choose_encoding("") is None
+
+    monkeypatch.setattr(compression, "brotli", object())
+    assert choose_encoding("gzip, br") == "br"
+    assert choose_encoding("gzip, br;q=0") == "gzip"
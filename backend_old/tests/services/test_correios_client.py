@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from app.services.correios_client import CorreiosClient
+from app.models.setting import Setting
+
+class FakeResponse:
+    def __init__(self, status_code=200, data=None):
+        self.status_code = status_code
+        self.data = data or {}
+
+    def json(self):
+        return self.data
+
+    def raise_for_status(self):
+        pass
+
+class FakeHttp:
+    """Stands in for the pooled requests.Session"""
+
+    def __init__(self, token_lifetime: timedelta):
+        self.token_lifetime = token_lifetime
+        self.token_requests = 0
+        self.calls = []
+
+    def post(self, url, auth=None, timeout=None):
+        self.token_requests += 1
+        expires = datetime.now(timezone.utc) + self.token_lifetime
+        return FakeResponse(data={"token": f"token-{self.token_requests}", "expiraEm": expires.isoformat()})
+
+    def get(self, url, headers=None, **kwargs):
+        self.calls.append((url, headers))
+        return FakeResponse()
+
+def test_settings_are_hot_reloaded(db: Session, session_factory):
+    Setting.set_setting(db, "correios_api_url", "https://api.example.com/")
+    Setting.set_setting(db, "correios_api_key", "static-key")
+    client = CorreiosClient(session_factory=session_factory, reload_interval=60)
+    client._http = FakeHttp(token_lifetime=timedelta(hours=1))
+
+    client.get("/v1/sro-rastro/AA123456789BR")
+    assert client.http.calls[-1] == (
+        "https://api.example.com/v1/sro-rastro/AA123456789BR",
+        {"Authorization": "Bearer static-key"}
+    )
+
+    # Cached until the reload interval passes or the client is invalidated
+    Setting.set_setting(db, "correios_use_mock", "true")
+    assert client.get_config().use_mock is False
+    client.invalidate()
+    assert client.get_config().use_mock is True
+
+def test_token_is_exchanged_and_reused(db: Session, session_factory):
+    Setting.set_setting(db, "correios_api_key", "user:access-code")
+    client = CorreiosClient(session_factory=session_factory, reload_interval=60)
+    client._http = FakeHttp(token_lifetime=timedelta(hours=1))
+
+    client.get("/v1/sro-rastro/AA123456789BR")
+    client.get("/v1/sro-rastro/BB123456789BR")
+
+    assert client.http.token_requests == 1
+    assert client.http.calls[-1][1] == {"Authorization": "Bearer token-1"}
+
+def test_token_is_refreshed_before_expiry(db: Session, session_factory):
+    Setting.set_setting(db, "correios_api_key", "user:access-code")
+    client = CorreiosClient(session_factory=session_factory, reload_interval=60, token_refresh_margin=300)
+    client._http = FakeHttp(token_lifetime=timedelta(minutes=2))
+
+    client.get("/v1/sro-rastro/AA123456789BR")
+    client.get("/v1/sro-rastro/BB123456789BR")
+
+    # The token expires within the refresh margin, so every call renews it
+    assert client.http.token_requests == 2
+    assert client.http.calls[-1][1] == {"Authorization": "Bearer token-2"}
+
+def test_key_change_drops_token(db: Session, session_factory):
+    Setting.set_setting(db, "correios_api_key", "user:access-code")
+    client = CorreiosClient(session_factory=session_factory, reload_interval=60)
+    client._http = FakeHttp(token_lifetime=timedelta(hours=1))
+    client.get("/v1/sro-rastro/AA123456789BR")
+
+    Setting.set_setting(db, "correios_api_key", "other-key")
+    client.invalidate()
+    client.get("/v1/sro-rastro/AA123456789BR")
+
+    assert client.http.calls[-1][1] == {"Authorization": "Bearer other-key"}
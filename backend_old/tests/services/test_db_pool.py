@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.db.session import MeteredQueuePool, engine_options, pool_status
+
+@pytest.fixture
+def small_pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 1)
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT", 0.05)
+    uri = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = create_engine(uri, **engine_options(uri))
+    yield engine
+    engine.dispose()
+
+def test_options_follow_settings(small_pool):
+    assert isinstance(small_pool.pool, MeteredQueuePool)
+    assert pool_status(small_pool)["size"] == 1
+    assert pool_status(small_pool)["max_overflow"] == 1
+
+def test_postgres_gets_statement_timeout():
+    options = engine_options("postgresql://user:pass@db/billing")
+    assert options["connect_args"]["options"] == f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+    assert options["pool_pre_ping"] is False
+
+def test_in_memory_sqlite_keeps_default_pool():
+    assert "poolclass" not in engine_options("sqlite://")
+
+def test_session_checks_out_only_when_used(small_pool):
+    SessionLocal = sessionmaker(bind=small_pool)
+
+    idle = SessionLocal()
+    assert pool_status(small_pool)["checked_out"] == 0
+    idle.close()
+
+    busy = SessionLocal()
+    busy.execute(text("select 1"))
+    assert pool_status(small_pool)["checked_out"] == 1
+    busy.close()
+
+    assert pool_status(small_pool)["checked_out"] == 0
+    assert pool_status(small_pool)["checkouts"] == 1
+
+def test_overflow_and_timeouts_are_reported(small_pool):
+    first = small_pool.connect()
+    second = small_pool.connect()
+    assert pool_status(small_pool)["overflow"] == 1
+
+    with pytest.raises(exc.TimeoutError):
+        small_pool.connect()
+
+    status = pool_status(small_pool)
+    assert status["checked_out"] == 2
+    assert status["timeouts"] == 1
+    assert status["max_wait"] >= 0
+
+    first.close()
+    second.close()
@@ -0,0 +1,57 @@
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.core.etag import conditional_response, etag_matches, weak_etag
+from app.models.order import Order, OrderStatus
+from app.services.order import order_service
+from app.services.payments import payment_service
+
+def test_etag_matching():
+    etag = weak_etag("orders", 3)
+
+    assert etag.startswith('W/"')
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", {etag[2:]}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(weak_etag("orders", 4), etag)
+    assert not etag_matches(None, etag)
+
+def test_conditional_get_skips_serialization():
+    app = FastAPI()
+    calls = []
+
+    @app.get("/items")
+    def items(request: Request, response: Response, version: int = 1):
+        not_modified = conditional_response(request, response, "items", version)
+        if not_modified:
+            return not_modified
+        calls.append(version)
+        return [1, 2, 3]
+
+    client = TestClient(app)
+    first = client.get("/items")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    cached = client.get("/items", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert cached.content == b""
+
+    changed = client.get("/items?version=2", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert calls == [1, 2]
+
+def test_orders_version_changes_with_the_list(db: Session):
+    everything = order_service.get_orders_version(db)
+    pending = order_service.get_orders_version(db, status=OrderStatus.PENDING)
+    assert everything[0] == 4 and pending[0] == 2
+
+    payment_service.post_payment(db, order_id=3, amount=10)
+    assert order_service.get_orders_version(db) != everything
+    # Order 3 is now partially paid: it left the pending list
+    assert order_service.get_orders_version(db, status=OrderStatus.PENDING)[0] == 1
+
+    db.delete(db.get(Order, 4))
+    db.commit()
+    assert order_service.get_orders_version(db)[0] == 3
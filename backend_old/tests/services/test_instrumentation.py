@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from app.core import instrumentation
+from app.core.instrumentation import (
+    InstrumentationMiddleware, MetricsRegistry, SamplingProfiler, current_request_stats, upstream_timer
+)
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+@pytest.fixture
+def app(registry):
+    engine = create_engine("sqlite://")
+    app = FastAPI()
+    app.add_middleware(InstrumentationMiddleware, registry=registry)
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        # One query per "row", as a lazy-loaded relationship would do
+        with engine.connect() as conn:
+            for _ in range(item_id):
+                conn.execute(text("SELECT 1"))
+        with upstream_timer("correios", "get"):
+            pass
+        return {"queries": current_request_stats().queries}
+
+    @app.get("/slow")
+    def slow():
+        time.sleep(0.05)
+        return {}
+
+    return app
+
+def test_requests_are_measured_per_route(app, registry):
+    client = TestClient(app)
+    assert client.get("/items/3").json() == {"queries": 3}
+    client.get("/items/2")
+    client.get("/missing")
+
+    output = registry.render()
+    assert 'http_request_duration_seconds_count{method="GET",route="/items/{item_id}",status="200"} 2' in output
+    assert 'http_request_duration_seconds_count{method="GET",route="unmatched",status="404"} 1' in output
+    assert 'http_request_queries_sum{method="GET",route="/items/{item_id}"} 5' in output
+    assert 'http_request_upstream_duration_seconds_count{method="GET",route="/items/{item_id}",service="correios"} 2' in output
+    assert "http_request_n_plus_one_total{" not in output
+
+def test_repeated_statements_are_flagged(app, registry, monkeypatch, caplog):
+    monkeypatch.setattr(instrumentation.settings, "N_PLUS_ONE_THRESHOLD", 5)
+    TestClient(app).get("/items/6")
+
+    assert 'http_request_n_plus_one_total{method="GET",route="/items/{item_id}"} 1' in registry.render()
+    assert "Possible N+1 query in GET /items/{item_id}: 6 executions of SELECT 1" in caplog.text
+
+def test_slow_requests_are_profiled(app, monkeypatch, tmp_path):
+    monkeypatch.setattr(instrumentation.settings, "SLOW_REQUEST_MS", 10)
+    monkeypatch.setattr(instrumentation.settings, "PROFILER_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(instrumentation.settings, "PROFILER_INTERVAL_MS", 1)
+    monkeypatch.setattr(instrumentation.settings, "PROFILER_OUTPUT_DIR", str(tmp_path))
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/slow")
+
+    [profile] = os.listdir(tmp_path)
+    assert "-GET-slow-" in profile
+    with open(tmp_path / profile) as folded:
+        assert any(";slow (test_instrumentation.py:" in line for line in folded)
+
+def test_profiler_folds_busy_stacks():
+    stop = threading.Event()
+
+    def busy_loop():
+        while not stop.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy_loop)
+    worker.start()
+    profiler = SamplingProfiler(0.001)
+    profiler.start()
+    try:
+        while not any("busy_loop" in stack for stack in profiler.samples):
+            stop.wait(0.01)
+    finally:
+        samples = profiler.stop()
+        stop.set()
+        worker.join()
+
+    stack = next(stack for stack in samples if "busy_loop" in stack)
+    assert stack.split(";")[-1].startswith("busy_loop (test_instrumentation.py:")
+
+def test_metrics_endpoint_is_off_unless_enabled(client, monkeypatch):
+    assert client.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(instrumentation.settings, "METRICS_ENABLED", True)
+    monkeypatch.setattr(instrumentation.settings, "METRICS_TOKEN", "scrape-token")
+    assert client.get("/metrics").status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-token"})
+    assert response.status_code == 200
+    assert "http_request_duration_seconds" in response.text
@@ -0,0 +1,113 @@
+import pytest
+from sqlalchemy.orm import Session
+from app.services.inventory import inventory_service
+from app.models.nutra_product import (
+    NutraProduct, ProductVariation, Distributor, DistributorOrder, DistributorOrderItem,
+    StockHistory, StockChangeReason, ProductType, OrderStatus
+)
+
+@pytest.fixture
+def distributor_order(db: Session):
+    product = NutraProduct(name="Test Product")
+    db.add(product)
+    db.flush()
+
+    capsules = ProductVariation(product_id=product.id, type=ProductType.CAPSULAS, cost=10.0, sale_price=25.0, current_stock=5)
+    drops = ProductVariation(product_id=product.id, type=ProductType.GOTAS, cost=8.0, sale_price=20.0, current_stock=0)
+    distributor = Distributor(name="Test Distributor")
+    db.add_all([capsules, drops, distributor])
+    db.flush()
+
+    order = DistributorOrder(distributor_id=distributor.id, user_id=1, status=OrderStatus.PENDENTE)
+    db.add(order)
+    db.flush()
+
+    db.add_all([
+        DistributorOrderItem(order_id=order.id, variation_id=capsules.id, quantity=10),
+        DistributorOrderItem(order_id=order.id, variation_id=capsules.id, quantity=3),
+        DistributorOrderItem(order_id=order.id, variation_id=drops.id, quantity=7),
+    ])
+    db.commit()
+    return order
+
+def test_receive_distributor_order(db: Session, distributor_order: DistributorOrder):
+    received = inventory_service.receive_distributor_order(db, distributor_order, user_id=1)
+    assert received is True
+
+    db.refresh(distributor_order)
+    assert distributor_order.status == OrderStatus.COMPLETO
+
+    stock = {v.type: v.current_stock for v in db.query(ProductVariation).all()}
+    assert stock[ProductType.CAPSULAS] == 18  # 5 + 10 + 3
+    assert stock[ProductType.GOTAS] == 7
+
+    # One ledger entry per variation
+    history = db.query(StockHistory).filter(StockHistory.reference_id == distributor_order.id).all()
+    assert sorted(h.change_amount for h in history) == [7, 13]
+    assert all(h.reason == StockChangeReason.ORDER_RECEIVED for h in history)
+    assert all(h.reference_type == "order" for h in history)
+
+def test_receive_distributor_order_is_idempotent(db: Session, distributor_order: DistributorOrder):
+    inventory_service.receive_distributor_order(db, distributor_order, user_id=1)
+    received = inventory_service.receive_distributor_order(db, distributor_order, user_id=1)
+    assert received is False
+
+    stock = {v.type: v.current_stock for v in db.query(ProductVariation).all()}
+    assert stock[ProductType.CAPSULAS] == 18
+    assert db.query(StockHistory).filter(StockHistory.reference_id == distributor_order.id).count() == 2
+
+def test_reopened_order_is_not_booked_twice(db: Session, distributor_order: DistributorOrder):
+    inventory_service.receive_distributor_order(db, distributor_order, user_id=1)
+    distributor_order.status = OrderStatus.PENDENTE
+    db.commit()
+
+    received = inventory_service.receive_distributor_order(db, distributor_order, user_id=1)
+    assert received is False
+    db.refresh(distributor_order)
+    assert distributor_order.status == OrderStatus.COMPLETO
+    assert db.query(StockHistory).filter(StockHistory.reference_id == distributor_order.id).count() == 2
+
+@pytest.fixture
+def stock_history(db: Session, distributor_order: DistributorOrder):
+    variation = db.query(ProductVariation).filter(ProductVariation.type == ProductType.CAPSULAS).one()
+    entries = []
+    for i in range(5):
+        entry = StockHistory(
+            variation_id=variation.id,
+            user_id=1,
+            change_amount=-(i + 1),
+            reason=StockChangeReason.KIT_SALE if i % 2 else StockChangeReason.MANUAL,
+            reference_type="kit_sale" if i % 2 else None,
+            reference_id=i if i % 2 else None
+        )
+        db.add(entry)
+        entries.append(entry)
+    db.commit()
+    return variation, entries
+
+def test_stock_history_keyset_pagination(db: Session, stock_history):
+    variation, entries = stock_history
+
+    first, cursor = inventory_service.get_stock_history_page(db, limit=2, variation_id=variation.id)
+    assert [e.id for e in first] == [entries[4].id, entries[3].id]
+    assert cursor is not None
+
+    second, cursor = inventory_service.get_stock_history_page(db, cursor=cursor, limit=2, variation_id=variation.id)
+    assert [e.id for e in second] == [entries[2].id, entries[1].id]
+
+    last, cursor = inventory_service.get_stock_history_page(db, cursor=cursor, limit=2, variation_id=variation.id)
+    assert [e.id for e in last] == [entries[0].id]
+    assert cursor is None
+
+def test_stock_history_filters(db: Session, stock_history):
+    variation, entries = stock_history
+
+    sales, _ = inventory_service.get_stock_history_page(db, reason=StockChangeReason.KIT_SALE)
+    assert {e.id for e in sales} == {entries[1].id, entries[3].id}
+
+    referenced, _ = inventory_service.get_stock_history_page(db, reference_type="kit_sale", reference_id=3)
+    assert [e.id for e in referenced] == [entries[3].id]
+
+def test_stock_history_invalid_cursor(db: Session):
+    with pytest.raises(ValueError):
+        inventory_service.get_stock_history_page(db, cursor="not-a-cursor")
@@ -0,0 +1,111 @@
+import pytest
+from sqlalchemy.orm import Session
+from app.services.catalog_sync import catalog_sync_service
+from app.services.kit_catalog import kit_catalog
+from app.models.nutra_product import NutraProduct, ProductVariation, Kit, KitProduct, ProductType
+from app.schemas.nutra import CatalogItem
+
+@pytest.fixture
+def kit(db: Session):
+    product = NutraProduct(name="Test Product")
+    db.add(product)
+    db.flush()
+
+    variation = ProductVariation(
+        product_id=product.id,
+        type=ProductType.CAPSULAS,
+        cost=10.0,
+        sale_price=25.0,
+        current_stock=50
+    )
+    db.add(variation)
+    db.flush()
+
+    kit = Kit(name="Test Kit")
+    db.add(kit)
+    db.flush()
+
+    db.add(KitProduct(kit_id=kit.id, variation_id=variation.id, quantity=2))
+    db.commit()
+    kit_catalog.invalidate()
+    return kit
+
+def test_get_kit_resolves_composition(db: Session, kit: Kit):
+    cached = kit_catalog.get_kit(db, kit.id)
+    assert cached is not None
+    assert cached.name == "Test Kit"
+    assert len(cached.kit_products) == 1
+    assert cached.kit_products[0].quantity == 2
+    assert cached.kit_products[0].variation.product.name == "Test Product"
+
+    composition = kit_catalog.get_composition(db, kit.id)
+    assert composition == {cached.kit_products[0].variation_id: 2}
+
+def test_catalog_is_reused_until_changed(db: Session, kit: Kit):
+    catalog = kit_catalog.get_catalog(db)
+    assert kit_catalog.get_catalog(db) is catalog
+
+    # A composition change made elsewhere is picked up through the version stamp
+    variation_id = catalog.kits[kit.id].kit_products[0].variation_id
+    db.add(KitProduct(kit_id=kit.id, variation_id=variation_id, quantity=1))
+    db.commit()
+
+    reloaded = kit_catalog.get_catalog(db)
+    assert reloaded is not catalog
+    assert reloaded.compositions[kit.id] == {variation_id: 3}
+
+def test_invalidate_drops_cached_catalog(db: Session, kit: Kit):
+    catalog = kit_catalog.get_catalog(db)
+    kit_catalog.invalidate()
+    assert kit_catalog.get_catalog(db) is not catalog
+
+def test_list_kits_filters_inactive(db: Session, kit: Kit):
+    db.add(Kit(name="Inactive Kit", active=False))
+    db.commit()
+    kit_catalog.invalidate()
+
+    active = kit_catalog.list_kits(db)
+    assert [k.name for k in active] == ["Test Kit"]
+    assert len(kit_catalog.list_kits(db, active_only=False)) == 2
+
+def test_stock_changes_are_served_without_reloading(db: Session, kit: Kit):
+    catalog = kit_catalog.get_catalog(db)
+
+    variation = db.query(ProductVariation).one()
+    variation.current_stock -= 2
+    db.commit()
+
+    assert kit_catalog.get_catalog(db) is catalog
+    assert kit_catalog.get_kit(db, kit.id).kit_products[0].variation.current_stock == 48
+    # The cached snapshot itself isn't changed
+    assert catalog.kits[kit.id].kit_products[0].variation.current_stock == 50
+
+def test_price_change_from_catalog_sync_reloads(db: Session, kit: Kit):
+    variation = db.query(ProductVariation).one()
+    variation.sku = "TST-CAP"
+    db.commit()
+    catalog = kit_catalog.get_catalog(db)
+
+    # Another worker syncs a new price; this process' generation doesn't move
+    item = CatalogItem(product_name="Test Product", sku="TST-CAP", type=ProductType.CAPSULAS, cost=10.0, sale_price=30.0)
+    catalog_sync_service.sync(db, [item], user_id=1)
+
+    reloaded = kit_catalog.get_catalog(db)
+    assert reloaded is not catalog
+    assert reloaded.kits[kit.id].kit_products[0].variation.sale_price == 30.0
+
+def test_kits_version_tracks_page_stock_without_loading(db: Session, kit: Kit):
+    version = kit_catalog.get_kits_version(db)
+    assert kit_catalog._catalog is None
+    assert kit_catalog.get_kits_version(db) == version
+
+    variation = db.query(ProductVariation).one()
+    variation.current_stock -= 2
+    db.commit()
+    assert kit_catalog.get_kits_version(db) != version
+
+    # Kits outside the page don't count
+    version = kit_catalog.get_kits_version(db, skip=1)
+    variation.current_stock -= 2
+    db.commit()
+    assert kit_catalog.get_kits_version(db, skip=1) == version
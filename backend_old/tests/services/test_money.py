@@ -0,0 +1,50 @@
+from decimal import Decimal
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.money import from_cents, to_cents, to_money
+from app.models.order import Order, OrderStatus
+from app.schemas.order import BillingHistoryCreate
+from app.services.order import order_service
+
+def test_conversions():
+    assert to_money(0.1) == Decimal("0.10")
+    assert to_money("19.995") == Decimal("20.00")
+    assert to_money(3) == Decimal("3.00")
+    assert to_cents(0.29) == 29
+    assert from_cents(1999) == Decimal("19.99")
+
+def test_schema_amounts_are_exact():
+    billing = BillingHistoryCreate(order_id=1, amount=0.1)
+    assert billing.amount == Decimal("0.10")
+    assert billing.model_dump(mode="json")["amount"] == 0.1
+
+    with pytest.raises(ValidationError):
+        BillingHistoryCreate(order_id=1, amount="ten")
+
+def test_many_small_payments_settle_an_order(db: Session):
+    order = db.query(Order).filter(Order.order_number == "TEST-003").one()
+    order.total_amount = Decimal("1.00")
+    order.paid_amount = Decimal("0")
+    db.commit()
+
+    # Ten float payments of 0.1 add up to 0.9999999999999999
+    for _ in range(10):
+        order_service.add_billing_history(db, BillingHistoryCreate(order_id=order.id, amount=0.1), created_by=1)
+
+    db.refresh(order)
+    assert order.paid_amount == Decimal("1.00")
+    assert order.status == OrderStatus.PAID
+
+def test_database_sums_are_exact(db: Session):
+    order = db.query(Order).filter(Order.order_number == "TEST-003").one()
+    order.total_amount = 0.1
+    order.paid_amount = 0.2
+    db.commit()
+
+    total_amount, total_paid = db.query(func.sum(Order.total_amount), func.sum(Order.paid_amount)).one()
+    expected = db.query(Order).all()
+    assert isinstance(total_amount, Decimal)
+    assert total_amount == sum(o.total_amount for o in expected)
+    assert total_paid == sum(o.paid_amount for o in expected)
@@ -0,0 +1,45 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models.order import OrderStatus
+from app.services.order import order_service
+
+def query_plans(db: Session, call):
+    """Run a service call and return the SQLite query plan of each SELECT it issued"""
+    connection = db.connection()
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", before_execute)
+    try:
+        call()
+    finally:
+        event.remove(connection, "before_cursor_execute", before_execute)
+
+    return [
+        " | ".join(row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters))
+        for statement, parameters in statements
+    ]
+
+now = datetime.utcnow()
+
+@pytest.mark.parametrize("call, index", [
+    (lambda db: order_service.get_orders_by_collector(db, 1), "ix_orders_collector_status_created"),
+    (lambda db: order_service.get_orders_by_seller(db, 1), "ix_orders_seller_created"),
+    (lambda db: order_service.get_orders_by_status(db, OrderStatus.PAID), "ix_orders_status_created"),
+    (lambda db: order_service.get_orders_by_date_range(db, now - timedelta(days=7), now), "ix_orders_created_at"),
+    (lambda db: order_service.get_duplicate_orders(db), "ix_orders_duplicates"),
+    (lambda db: order_service.get_order_by_number(db, "TEST-001"), "ix_orders_order_number"),
+])
+def test_service_queries_use_an_index(db: Session, call, index):
+    plans = query_plans(db, lambda: call(db))
+
+    assert plans
+    for plan in plans:
+        assert index in plan, plan
+        # Scanning a partial index is fine, a full table scan isn't
+        assert "SCAN orders |" not in plan + " |", plan
@@ -0,0 +1,90 @@
+import threading
+from decimal import Decimal
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from app.db.base import Base
+from app.models.order import BillingHistory, Order, OrderStatus
+from app.services.payments import IdempotencyConflict, payment_service
+
+def test_payment_updates_order_in_one_statement(db: Session):
+    result = payment_service.post_payment(db, order_id=2, amount=50, created_by=1, notes="pix")
+
+    assert result.paid_amount == Decimal("150.00")
+    assert result.status == OrderStatus.PARTIALLY_PAID
+    assert result.billing.amount == Decimal("50.00")
+    assert result.billing.notes == "pix"
+
+    result = payment_service.post_payment(db, order_id=2, amount=50, created_by=1)
+    assert result.status == OrderStatus.PAID
+    assert db.get(Order, 2).paid_amount == Decimal("200.00")
+
+def test_missing_order(db: Session):
+    assert payment_service.post_payment(db, order_id=999, amount=10) is None
+    assert db.query(BillingHistory).count() == 0
+
+def test_retries_with_the_same_key_apply_once(db: Session):
+    first = payment_service.post_payment(db, order_id=2, amount=25, idempotency_key="pay-1")
+    retry = payment_service.post_payment(db, order_id=2, amount=25, idempotency_key="pay-1")
+
+    assert retry.replayed is True
+    assert retry.billing.id == first.billing.id
+    assert db.get(Order, 2).paid_amount == Decimal("125.00")
+    assert db.query(BillingHistory).filter(BillingHistory.order_id == 2).count() == 1
+
+    with pytest.raises(IdempotencyConflict):
+        payment_service.post_payment(db, order_id=2, amount=30, idempotency_key="pay-1")
+
+def test_concurrent_key_race_keeps_one_payment(db: Session, monkeypatch):
+    # The second call misses the first one's row in its pre-check, as a
+    # concurrent retry would, and then hits the unique key on insert
+    payment_service.post_payment(db, order_id=2, amount=25, idempotency_key="pay-2")
+    original_replay = payment_service._replay
+    calls = []
+
+    def replay_after_insert(*args):
+        calls.append(args)
+        return None if len(calls) == 1 else original_replay(*args)
+
+    monkeypatch.setattr(payment_service, "_replay", replay_after_insert)
+    retry = payment_service.post_payment(db, order_id=2, amount=25, idempotency_key="pay-2")
+
+    assert retry.replayed is True
+    assert db.get(Order, 2).paid_amount == Decimal("125.00")
+
+def test_concurrent_payments_are_all_applied(tmp_path):
+    # Separate sessions on a file database, so the payments really overlap
+    engine = create_engine(f"sqlite:///{tmp_path / 'payments.db'}", connect_args={"timeout": 30})
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine)
+    with SessionLocal() as db:
+        order = Order(order_number="P-1", customer_name="Ana", customer_phone="11999990000",
+                      customer_address="Rua A", total_amount=100, paid_amount=0, seller_id=1)
+        db.add(order)
+        db.commit()
+        order_id = order.id
+
+    start = threading.Barrier(8)
+    errors = []
+
+    def pay(number):
+        try:
+            with SessionLocal() as db:
+                start.wait()
+                payment_service.post_payment(db, order_id=order_id, amount=10, idempotency_key=f"pay-{number}")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=pay, args=(number,)) for number in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with SessionLocal() as db:
+        order = db.get(Order, order_id)
+        assert errors == []
+        assert order.paid_amount == Decimal("80.00")
+        assert order.status == OrderStatus.PARTIALLY_PAID
+        assert db.query(BillingHistory).filter(BillingHistory.order_id == order_id).count() == 8
+    engine.dispose()
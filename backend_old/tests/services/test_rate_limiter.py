@@ -0,0 +1,43 @@
+import pytest
+from sqlalchemy.orm import Session
+from app.services.rate_limiter import RateLimiter, RateLimitTimeout, DatabaseBucketBackend
+from app.models.rate_limit import RateLimitBucket
+from tests.conftest import TestingSessionLocal
+
+def test_burst_passes_then_callers_queue():
+    limiter = RateLimiter(rate=50, burst=3)
+
+    waits = [limiter.acquire() for _ in range(5)]
+
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert all(0 < wait <= 0.05 for wait in waits[3:])
+    stats = limiter.stats()
+    assert stats["calls"] == 5
+    assert stats["max_wait"] > 0
+
+def test_deadline_fails_fast_without_taking_a_token():
+    limiter = RateLimiter(rate=1, burst=1, max_wait=0.1)
+    limiter.acquire()
+
+    with pytest.raises(RateLimitTimeout) as error:
+        limiter.acquire()
+    assert limiter.stats()["timeouts"] == 1
+    # The time until the next token, not the deadline
+    assert 0.9 < error.value.retry_after <= 1.0
+
+def test_disabled_limiter_never_waits():
+    limiter = RateLimiter(rate=0, burst=1)
+    assert all(limiter.acquire() == 0.0 for _ in range(100))
+
+def test_database_backend_is_shared(db: Session):
+    session_factory = lambda: TestingSessionLocal(bind=db.get_bind())
+    # Two workers sharing the same bucket row
+    first = RateLimiter(rate=1, burst=2, backend=DatabaseBucketBackend("correios", session_factory), max_wait=0.1)
+    second = RateLimiter(rate=1, burst=2, backend=DatabaseBucketBackend("correios", session_factory), max_wait=0.1)
+
+    assert first.acquire() == 0.0
+    assert second.acquire() == 0.0
+    with pytest.raises(RateLimitTimeout):
+        first.acquire()
+
+    assert db.query(RateLimitBucket).filter(RateLimitBucket.name == "correios").count() == 1
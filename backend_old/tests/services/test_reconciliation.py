@@ -0,0 +1,112 @@
+import io
+from decimal import Decimal
+import pytest
+from sqlalchemy.orm import Session
+from app.models.order import BillingHistory, Order, OrderStatus
+from app.models.reconciliation import ReconciliationItem, ReconciliationItemStatus
+from app.services.reconciliation import (
+    ItemAlreadyReviewed, parse_amount, read_statement, reconciliation_service
+)
+
+STATEMENT = """Data;Valor;Nome;Telefone;Descrição;Identificador
+01/10/2026;R$ 50,00;Fulano;;Pedido TEST-003;E2E-1
+01/10/2026;100,00;Test Customer 2;;Pix recebido;E2E-2
+02/10/2026;30,00;Someone;+55 (11) 2233-4455;Pix recebido;E2E-3
+02/10/2026;-20,00;Tarifa;;Tarifa bancaria;E2E-4
+03/10/2026;75,00;Unknown Payer;;Pix recebido;E2E-5
+"""
+
+OFX = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20261001120000[-3:BRT]
+<TRNAMT>12.34
+<FITID>ABC1
+<MEMO>PIX TEST-002 &amp; more
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+def _import(db: Session, text: str = STATEMENT, fmt: str = "csv"):
+    return reconciliation_service.import_statement(db, io.StringIO(text), fmt, "statement." + fmt, user_id=1)
+
+@pytest.mark.parametrize("value, expected", [
+    ("R$ 1.234,56", "1234.56"),
+    ("1,234.56", "1234.56"),
+    ("-10,00", "-10.00"),
+    ("99.9", "99.90"),
+])
+def test_parse_amount(value, expected):
+    assert parse_amount(value) == Decimal(expected)
+
+def test_ofx_transactions():
+    lines = list(read_statement(io.StringIO(OFX), "ofx"))
+
+    assert len(lines) == 1
+    assert lines[0].transaction_id == "ABC1"
+    assert lines[0].amount == Decimal("12.34")
+    assert lines[0].description == "PIX TEST-002 & more"
+    assert lines[0].posted_at.day == 1
+
+def test_lines_without_id_get_stable_ids():
+    text = "date,amount,name\n2026-10-01,10.00,Ana\n2026-10-01,10.00,Ana\n"
+    first = [line.transaction_id for line in read_statement(io.StringIO(text), "csv")]
+    second = [line.transaction_id for line in read_statement(io.StringIO(text), "csv")]
+
+    assert first == second
+    assert len(set(first)) == 2
+
+def test_import_posts_matches_and_queues_the_rest(db: Session):
+    batch = _import(db)
+
+    assert (batch.lines, batch.matched, batch.unmatched, batch.skipped) == (5, 3, 1, 1)
+    assert batch.posted_amount == Decimal("180.00")
+
+    # Order number, then name with the amount due breaking the tie with
+    # order 4, then phone
+    assert db.get(Order, 3).paid_amount == Decimal("80.00")
+    assert db.get(Order, 2).paid_amount == Decimal("200.00")
+    assert db.get(Order, 2).status == OrderStatus.PAID
+    assert db.get(Order, 4).paid_amount == Decimal("0.00")
+
+    queue = reconciliation_service.get_review_queue(db)
+    assert [item.transaction_id for item in queue] == ["E2E-5"]
+    assert queue[0].amount == Decimal("75.00")
+
+def test_reimport_posts_nothing_twice(db: Session):
+    _import(db)
+    batch = _import(db)
+
+    assert (batch.matched, batch.already_posted, batch.unmatched) == (0, 3, 1)
+    assert db.get(Order, 3).paid_amount == Decimal("80.00")
+    assert db.query(BillingHistory).count() == 3
+    assert db.query(ReconciliationItem).count() == 1
+
+def test_chunks_post_each_order_once(db: Session, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.RECONCILIATION_BATCH_SIZE", 2)
+    text = "id,amount,description\n" + "".join(f"t{n},10.00,TEST-004\n" for n in range(5))
+    batch = _import(db, text)
+
+    assert batch.matched == 5
+    assert db.get(Order, 4).paid_amount == Decimal("50.00")
+    assert db.get(Order, 4).status == OrderStatus.PARTIALLY_PAID
+
+def test_resolve_and_ignore_review_items(db: Session):
+    _import(db)
+    item = reconciliation_service.get_review_queue(db)[0]
+
+    resolved = reconciliation_service.resolve_item(db, item, order_id=4, user_id=1)
+    assert resolved.status == ReconciliationItemStatus.RESOLVED
+    assert db.get(Order, 4).paid_amount == Decimal("75.00")
+
+    with pytest.raises(ItemAlreadyReviewed):
+        reconciliation_service.ignore_item(db, item, user_id=1)
+
+    # The line was posted under its statement key: a re-import skips it
+    batch = _import(db)
+    assert (batch.already_posted, batch.unmatched) == (4, 0)
+
+def test_unsupported_format(db: Session):
+    with pytest.raises(ValueError):
+        _import(db, fmt="xls")
@@ -0,0 +1,90 @@
+import pytest
+from datetime import date, datetime, timedelta
+from sqlalchemy.orm import Session
+from app.services.replenishment import replenishment_service
+from app.models.nutra_product import (
+    NutraProduct, ProductVariation, StockHistory, StockChangeReason,
+    StockConsumptionDaily, ProductType
+)
+
+AS_OF = date(2024, 3, 1)
+
+def record_sales(db: Session, variation_id: int, per_day: int, days: int):
+    for offset in range(1, days + 1):
+        db.add(StockHistory(
+            variation_id=variation_id,
+            user_id=1,
+            change_amount=-per_day,
+            reason=StockChangeReason.KIT_SALE,
+            reference_type="kit_sale",
+            created_at=datetime.combine(AS_OF - timedelta(days=offset), datetime.min.time()) + timedelta(hours=12)
+        ))
+    db.commit()
+
+@pytest.fixture
+def variations(db: Session):
+    product = NutraProduct(name="Test Product")
+    db.add(product)
+    db.flush()
+
+    selling = ProductVariation(product_id=product.id, type=ProductType.CAPSULAS, cost=10.0, sale_price=25.0, current_stock=100, minimum_stock=10)
+    idle = ProductVariation(product_id=product.id, type=ProductType.GOTAS, cost=8.0, sale_price=20.0, current_stock=4, minimum_stock=10)
+    db.add_all([selling, idle])
+    db.commit()
+    return selling, idle
+
+def test_refresh_forecasts(db: Session, variations):
+    selling, idle = variations
+    record_sales(db, selling.id, per_day=5, days=28)
+
+    count = replenishment_service.refresh(db, as_of=AS_OF)
+    assert count == 2
+
+    forecasts = {f.variation_id: f for f in replenishment_service.get_forecasts(db)}
+    assert forecasts[selling.id].daily_velocity == pytest.approx(5.0)
+    assert forecasts[selling.id].days_until_stockout == pytest.approx(20.0)
+    assert forecasts[selling.id].suggested_quantity == 95  # 5 * (7 + 30) + 10 - 100
+
+    # Without sales only the minimum stock is topped up
+    assert forecasts[idle.id].daily_velocity == 0
+    assert forecasts[idle.id].days_until_stockout is None
+    assert forecasts[idle.id].suggested_quantity == 6
+
+def test_refresh_is_incremental(db: Session, variations):
+    selling, _ = variations
+    record_sales(db, selling.id, per_day=5, days=2)
+    replenishment_service.refresh(db, as_of=AS_OF)
+
+    # Only sales recorded after the previous run are added to the rollup
+    record_sales(db, selling.id, per_day=1, days=1)
+    replenishment_service.refresh(db, as_of=AS_OF)
+
+    rows = db.query(StockConsumptionDaily).filter(StockConsumptionDaily.variation_id == selling.id).all()
+    assert sorted(row.quantity for row in rows) == [5, 6]
+
+def test_sale_committed_after_a_run_is_counted(db: Session, variations):
+    selling, _ = variations
+    now = datetime.utcnow()
+    db.add(StockHistory(id=1000, variation_id=selling.id, user_id=1, change_amount=-3,
+                        reason=StockChangeReason.KIT_SALE, created_at=now))
+    db.commit()
+    replenishment_service.refresh(db)
+
+    # Got its id before the run's sale but committed after the run
+    db.add(StockHistory(id=999, variation_id=selling.id, user_id=1, change_amount=-2,
+                        reason=StockChangeReason.KIT_SALE, created_at=now))
+    db.commit()
+    replenishment_service.refresh(db)
+    # Re-scanning a day doesn't count its sales twice
+    replenishment_service.refresh(db)
+
+    row = db.query(StockConsumptionDaily).filter(StockConsumptionDaily.variation_id == selling.id).one()
+    assert row.quantity == 5
+
+def test_daily_velocity_weights_recent_days():
+    import numpy as np
+    usage = np.zeros((1, 14))
+    usage[0, 7:] = 7  # Sales only in the second week
+    velocity = replenishment_service._daily_velocity(usage, smoothing=7)
+    assert 0 < velocity[0] < 7
+    assert velocity[0] > usage.mean()
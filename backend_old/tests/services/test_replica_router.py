@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import column, create_engine, table, text
+from sqlalchemy.orm import sessionmaker
+from app.db.replicas import ReplicaRouter, track_writes
+
+def make_engine(path, label):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        connection.execute(text("create table source (name text)"))
+        connection.execute(text("insert into source values (:name)"), {"name": label})
+    return engine
+
+@pytest.fixture
+def databases(tmp_path):
+    engines = [make_engine(tmp_path / f"{label}.db", label) for label in ("primary", "replica1", "replica2")]
+    yield engines
+    for engine in engines:
+        engine.dispose()
+
+@pytest.fixture
+def lags():
+    return {}
+
+def make_router(databases, lags, **options):
+    primary, *replicas = databases
+    probe = lambda engine: lags.get(engine.url.database.rsplit("/", 1)[-1], 0.0)
+    return ReplicaRouter(primary, replicas, max_lag=5.0, check_interval=0, lag_probe=probe, **options)
+
+def source(engine):
+    with engine.connect() as connection:
+        return connection.execute(text("select name from source")).scalar()
+
+def test_reads_rotate_over_replicas(databases, lags):
+    router = make_router(databases, lags)
+    assert [source(router.read_engine()) for _ in range(4)] == ["replica1", "replica2", "replica1", "replica2"]
+
+def test_lagging_or_unreachable_replicas_are_skipped(databases, lags):
+    lags["replica1.db"] = 30.0
+    router = make_router(databases, lags)
+    assert {source(router.read_engine()) for _ in range(4)} == {"replica2"}
+
+    def broken(engine):
+        raise ConnectionError("replica down")
+    router.lag_probe = broken
+    assert source(router.read_engine()) == "primary"
+
+def test_users_read_their_own_writes(databases, lags):
+    router = make_router(databases, lags, sticky_seconds=60)
+    SessionLocal = sessionmaker(bind=databases[0])
+    track_writes(SessionLocal, router)
+
+    db = SessionLocal()
+    db.info["user_id"] = 7
+    db.execute(text("select 1"))
+    db.commit()
+    # Reading doesn't count as a write
+    assert source(router.read_engine(7)) != "primary"
+
+    db.execute(table("source", column("name")).insert().values(name="new"))
+    db.commit()
+    db.close()
+    assert source(router.read_engine(7)) == "primary"
+    assert source(router.read_engine(8)) != "primary"
+
+def test_without_replicas_everything_reads_from_primary(databases):
+    router = ReplicaRouter(databases[0], [])
+    router.note_write(1)
+    assert router.replica_for(1) is None
+    assert router.read_engine() is databases[0]
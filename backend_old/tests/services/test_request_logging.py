@@ -0,0 +1,94 @@
+import logging
+import queue
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+from app.core.instrumentation import InstrumentationMiddleware, MetricsRegistry, upstream_timer
+from app.core.logging_config import DeferredQueueHandler, JsonFormatter
+from app.core.middleware import RequestLoggingMiddleware
+
+def _app(sample_rate: float) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestLoggingMiddleware, sample_rate=sample_rate)
+
+    @app.get("/ok")
+    def ok():
+        return {"ok": True}
+
+    @app.get("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((f"{n}\n" for n in range(3)), media_type="text/plain")
+
+    return app
+
+def _access_records(caplog):
+    return [record for record in caplog.records if record.name == "app.access"]
+
+def test_requests_are_timed_and_logged(caplog):
+    caplog.set_level(logging.INFO)
+    response = TestClient(_app(1.0)).get("/ok")
+
+    assert response.json() == {"ok": True}
+    assert float(response.headers["X-Process-Time"]) >= 0
+    [record] = _access_records(caplog)
+    assert record.getMessage().startswith("GET /ok 200 ")
+    assert record.fields["status"] == 200
+    assert record.fields["sampled"] is True
+
+def test_errors_are_captured_and_always_logged(caplog):
+    caplog.set_level(logging.INFO)
+    client = TestClient(_app(0.0))
+    client.get("/ok")
+    response = client.get("/boom")
+
+    assert response.status_code == 500
+    assert response.json() == {"detail": "Internal server error", "error_code": "server_error"}
+    [record] = _access_records(caplog)
+    assert record.levelno == logging.ERROR
+    assert record.fields["path"] == "/boom"
+    assert any(record.exc_info and record.exc_info[0] is RuntimeError for record in caplog.records)
+
+def test_streaming_responses_pass_through():
+    response = TestClient(_app(1.0)).get("/stream")
+
+    assert response.text == "0\n1\n2\n"
+    assert "X-Process-Time" in response.headers
+
+def test_queue_handler_defers_formatting():
+    records = queue.Queue()
+    handler = DeferredQueueHandler(records)
+    record = logging.LogRecord("app.access", logging.INFO, __file__, 1, "%s %d", ("GET /ok", 200), None)
+    record.fields = {"status": 200}
+    handler.emit(record)
+
+    queued = records.get_nowait()
+    assert queued.msg == "%s %d" and queued.args == ("GET /ok", 200)
+    assert '"status": 200' in JsonFormatter().format(queued)
+    assert '"message": "GET /ok 200"' in JsonFormatter().format(queued)
+
+def test_slow_request_is_one_record_with_its_breakdown(caplog, monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_REQUEST_MS", 0)
+    engine = create_engine("sqlite://")
+    app = _app(0.0)
+    app.add_middleware(InstrumentationMiddleware, registry=MetricsRegistry())
+
+    @app.get("/query")
+    def query():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        with upstream_timer("correios", "get"):
+            pass
+        return {}
+
+    TestClient(app).get("/query")
+
+    [record] = [record for record in caplog.records if record.levelno >= logging.WARNING]
+    assert record.name == "app.access"
+    assert record.fields["sql_queries"] == 1
+    assert set(record.fields["upstream_ms"]) == {"correios"}
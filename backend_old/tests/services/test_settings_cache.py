@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models.setting import Setting, SettingsCache, VERSION_KEY, settings_cache
+
+@pytest.fixture
+def count_queries(db: Session):
+    statements = []
+    engine = db.get_bind().engine
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_execute)
+
+def test_cached_lookups_hit_the_database_once(db: Session, count_queries):
+    Setting.set_settings(db, {"correios_api_url": "https://api.example.com", "correios_use_mock": "true"})
+    settings_cache.invalidate()
+    count_queries.clear()
+
+    assert Setting.get_setting(db, "correios_api_url") == "https://api.example.com"
+    assert Setting.get_setting(db, "correios_use_mock") == "true"
+    assert Setting.get_setting(db, "missing", "default") == "default"
+
+    # One version check and one load of the whole table
+    assert len(count_queries) == 2
+
+def test_set_settings_writes_in_one_transaction(db: Session):
+    written = Setting.set_settings(db, {"a": "1", "b": "2"})
+    assert {key: setting.value for key, setting in written.items()} == {"a": "1", "b": "2"}
+
+    # The local cache sees the new values right away
+    assert Setting.get_setting(db, "a") == "1"
+    assert db.query(Setting).filter(Setting.key == VERSION_KEY).count() == 1
+
+def test_writes_from_other_workers_are_picked_up(db: Session):
+    Setting.set_setting(db, "correios_use_mock", "false")
+    other_worker = SettingsCache(ttl=0)
+    assert other_worker.get(db, "correios_use_mock") == "false"
+
+    Setting.set_setting(db, "correios_use_mock", "true")
+    assert other_worker.get(db, "correios_use_mock") == "true"
+
+def test_uncached_lookup_reads_the_database(db: Session):
+    Setting.set_setting(db, "watermark", "10")
+    assert Setting.get_setting(db, "watermark") == "10"
+
+    # Written behind the cache's back, without changing the version row
+    db.query(Setting).filter(Setting.key == "watermark").update({"value": "20"})
+
+    assert Setting.get_setting(db, "watermark") == "10"
+    assert Setting.get_setting(db, "watermark", cached=False) == "20"
@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy.orm import Session
+from app.services.correios_service import CorreiosService
+from app.services.status_classifier import (
+    StatusClassifier, DEFAULT_PHRASES, DELIVERED, CRITICAL, RETURNED, IN_TRANSIT, UNKNOWN
+)
+
+@pytest.fixture
+def classifier():
+    return StatusClassifier()
+
+@pytest.mark.parametrize("status,category", [
+    ("Objeto entregue ao destinatário", DELIVERED),
+    ("Objeto entregue ao remetente", RETURNED),
+    ("Objeto devolvido ao remetente", RETURNED),
+    ("Tentativa de entrega não efetuada", CRITICAL),
+    ("OBJETO AGUARDANDO RETIRADA no endereço indicado", CRITICAL),
+    ("Endereco incorreto", CRITICAL),
+    ("Objeto em trânsito - por favor aguarde", IN_TRANSIT),
+    ("Objeto não entregue - carteiro não atendido", CRITICAL),
+    ("", UNKNOWN),
+])
+def test_classify(classifier: StatusClassifier, status: str, category: str):
+    assert classifier.classify(status) == category
+
+def test_is_critical_includes_returned(classifier: StatusClassifier):
+    assert classifier.is_critical("Objeto devolvido ao remetente")
+    assert classifier.is_critical("Objeto extraviado")
+    assert not classifier.is_critical("Objeto entregue ao destinatário")
+    assert not classifier.is_critical(None)
+
+def test_edited_phrases_are_loaded(db: Session, classifier: StatusClassifier):
+    assert classifier.classify("Objeto retido pela fiscalização") == IN_TRANSIT
+
+    classifier.save(db, {**DEFAULT_PHRASES, CRITICAL: ["retido pela fiscalizacao"]})
+    assert classifier.classify("Objeto retido pela fiscalização") == CRITICAL
+    assert classifier.classify("Objeto extraviado") == IN_TRANSIT
+    # Without the critical phrase a negated delivery still isn't delivered
+    assert classifier.classify("Objeto não entregue") == IN_TRANSIT
+
+    # Another worker picks the change up from the settings table
+    other = StatusClassifier()
+    other.load(db)
+    assert other.is_critical("Objeto retido pela fiscalização")
+
+@pytest.mark.parametrize("status,entregue", [
+    ("Objeto entregue ao destinatário", True),
+    ("Objeto não entregue - endereço incorreto", False),
+    ("Objeto entregue ao remetente", False),
+])
+def test_service_delivered_flag_follows_classifier(status: str, entregue: bool):
+    data = {"objetos": [{"codObjeto": "AA123456789BR", "eventos": [{"descricao": status}]}]}
+
+    result = CorreiosService()._format_correios_response(data, "AA123456789BR")
+
+    assert result["entregue"] is entregue
@@ -0,0 +1,60 @@
+import pytest
+from datetime import datetime
+from app.services.correios_service import CorreiosService
+from app.services.rate_limiter import RateLimiter
+from app.services.tracking_backends import SimulatedTrackingBackend, TrackingBackend, TrackingBackendError
+
+BASE_TIME = datetime(2024, 6, 1)
+
+def test_same_code_gets_same_result():
+    first = SimulatedTrackingBackend(base_time=BASE_TIME).track("AA123456789BR")
+    second = SimulatedTrackingBackend(base_time=BASE_TIME).track("AA123456789BR")
+
+    assert first == second
+    assert first["simulado"] is True
+    assert first["eventos"][-1]["status"] == "Objeto postado"
+    assert first["eventos"][0]["dataHora"] > first["eventos"][1]["dataHora"]
+
+def test_outcomes_vary_across_codes_and_seeds():
+    backend = SimulatedTrackingBackend(base_time=BASE_TIME)
+    statuses = {backend.track(f"AA{i:09d}BR")["eventos"][0]["status"] for i in range(200)}
+    assert len(statuses) == 8
+
+    reseeded = SimulatedTrackingBackend(base_time=BASE_TIME, seed="other")
+    codes = [f"AA{i:09d}BR" for i in range(20)]
+    assert [backend.track(c) for c in codes] != [reseeded.track(c) for c in codes]
+
+def test_latency_and_errors_are_reproducible():
+    def run():
+        sleeps = []
+        backend = SimulatedTrackingBackend(latency_ms=100, latency_sigma=0.5, error_rate=0.3, seed="load", sleep=sleeps.append)
+        failures = []
+        for i in range(50):
+            try:
+                backend.track(f"AA{i:09d}BR")
+            except TrackingBackendError:
+                failures.append(i)
+        return sleeps, failures
+
+    sleeps, failures = run()
+    assert (sleeps, failures) == run()
+    assert len(sleeps) == 50
+    assert 0.05 < sorted(sleeps)[25] < 0.2
+    assert 5 < len(failures) < 25
+
+def test_service_uses_pluggable_backend():
+    service = CorreiosService(
+        rate_limiter=RateLimiter(rate=0, burst=1),
+        backend=SimulatedTrackingBackend(base_time=BASE_TIME, error_rate=1.0)
+    )
+
+    results = service.track_multiple_packages(["AA123456789BR"])
+
+    assert "Simulated upstream failure" in results["AA123456789BR"]["error"]
+
+def test_incomplete_backend_fails_on_instantiation():
+    class Incomplete(TrackingBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,55 @@
+from sqlalchemy.orm import Session
+from app.services.tracking_recorder import TrackingHistoryRecorder
+from app.models.tracking_history import TrackingHistory
+
+def test_flush_writes_queued_entries(db: Session, session_factory):
+    recorder = TrackingHistoryRecorder(session_factory=session_factory, batch_size=100, flush_interval=60)
+    assert recorder.record("AA123456789BR", "Objeto entregue", user_id=1)
+    assert recorder.record("BB123456789BR", "Erro: timeout", success=False, user_id=1, details="timeout")
+
+    # Nothing is written until the recorder flushes
+    assert db.query(TrackingHistory).count() == 0
+    assert recorder.pending() == 2
+
+    assert recorder.flush() == 2
+    assert recorder.pending() == 0
+
+    entries = {h.tracking_code: h for h in db.query(TrackingHistory).all()}
+    assert entries["AA123456789BR"].success is True
+    assert entries["BB123456789BR"].success is False
+    assert entries["BB123456789BR"].details == "timeout"
+
+def test_stop_flushes_in_batches(db: Session, session_factory):
+    recorder = TrackingHistoryRecorder(session_factory=session_factory, batch_size=2, flush_interval=60)
+    for i in range(5):
+        recorder.record(f"AA{i:09d}BR", "Objeto postado", user_id=1)
+
+    recorder.stop()
+
+    assert recorder.pending() == 0
+    assert db.query(TrackingHistory).count() == 5
+
+def test_full_queue_drops_entries(db: Session, session_factory):
+    recorder = TrackingHistoryRecorder(
+        session_factory=session_factory, batch_size=100, flush_interval=60, max_queue_size=2, enqueue_timeout=0
+    )
+    assert recorder.record("AA000000001BR", "Objeto postado")
+    assert recorder.record("AA000000002BR", "Objeto postado")
+    assert not recorder.record("AA000000003BR", "Objeto postado")
+    assert recorder.dropped == 1
+
+    assert recorder.flush() == 2
+
+def test_failed_batch_is_retried_once_then_dropped(db: Session, session_factory, monkeypatch):
+    recorder = TrackingHistoryRecorder(session_factory=session_factory, batch_size=2, flush_interval=60)
+    for i in range(4):
+        recorder.record(f"AA{i:09d}BR", "Objeto postado", user_id=1)
+
+    write = recorder._write
+    outcomes = iter([False, True, False, False])
+    monkeypatch.setattr(recorder, "_write", lambda batch: next(outcomes) and write(batch))
+
+    # The first batch goes through on its retry, the second fails twice
+    assert recorder.flush() == 2
+    assert recorder.dropped == 2
+    assert db.query(TrackingHistory).count() == 2
@@ -0,0 +1,61 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.services.tracking_retention import tracking_retention_service
+from app.models.tracking_history import TrackingHistory, TrackingDailySummary
+
+NOW = datetime(2024, 6, 30, 12, 0)
+
+@pytest.fixture(autouse=True)
+def retention_settings(monkeypatch):
+    monkeypatch.setattr(settings, "TRACKING_HISTORY_RETENTION_DAYS", 30)
+    monkeypatch.setattr(settings, "TRACKING_HISTORY_MAX_PER_USER", 0)
+    monkeypatch.setattr(settings, "TRACKING_HISTORY_PURGE_CHUNK_SIZE", 2)
+
+def add_entry(db: Session, code: str, timestamp: datetime, status: str = "Objeto postado", success: bool = True, user_id: int = 1):
+    db.add(TrackingHistory(tracking_code=code, timestamp=timestamp, status=status, success=success, user_id=user_id))
+
+def test_purge_compacts_expired_entries(db: Session):
+    old_day = NOW - timedelta(days=40)
+    add_entry(db, "AA123456789BR", old_day.replace(hour=8), "Objeto postado")
+    add_entry(db, "AA123456789BR", old_day.replace(hour=9), "Erro: timeout", success=False)
+    add_entry(db, "AA123456789BR", old_day.replace(hour=10), "Objeto em trânsito")
+    add_entry(db, "AA123456789BR", NOW - timedelta(days=1), "Objeto entregue")
+    db.commit()
+
+    summary = tracking_retention_service.purge(db, now=NOW)
+
+    assert summary.expired == 3
+    assert summary.over_cap == 0
+    assert [h.status for h in db.query(TrackingHistory).all()] == ["Objeto entregue"]
+
+    daily = db.query(TrackingDailySummary).one()
+    assert daily.tracking_code == "AA123456789BR"
+    assert daily.day == old_day.date()
+    assert daily.lookups == 3
+    assert daily.failures == 1
+    assert daily.last_status == "Objeto em trânsito"
+
+def test_purge_enforces_per_user_cap(db: Session, monkeypatch):
+    monkeypatch.setattr(settings, "TRACKING_HISTORY_MAX_PER_USER", 2)
+    for hours in range(5):
+        add_entry(db, f"AA{hours:09d}BR", NOW - timedelta(hours=hours), user_id=1)
+    add_entry(db, "BB000000000BR", NOW - timedelta(hours=10), user_id=2)
+    db.commit()
+
+    summary = tracking_retention_service.purge(db, now=NOW)
+
+    assert summary.over_cap == 3
+    remaining = db.query(TrackingHistory).filter(TrackingHistory.user_id == 1).all()
+    assert sorted(h.tracking_code for h in remaining) == ["AA000000000BR", "AA000000001BR"]
+    assert db.query(TrackingHistory).filter(TrackingHistory.user_id == 2).count() == 1
+    assert db.query(TrackingDailySummary).count() == 3
+
+def test_clear_history_returns_deleted_count(db: Session):
+    add_entry(db, "AA123456789BR", NOW, user_id=1)
+    add_entry(db, "BB123456789BR", NOW, user_id=2)
+    db.commit()
+
+    assert TrackingHistory.clear_history(db, user_id=1) == 1
+    assert db.query(TrackingHistory).count() == 1
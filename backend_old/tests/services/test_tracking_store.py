@@ -0,0 +1,100 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.services.tracking_store import tracking_store
+from app.models.tracking_event import TrackingEvent, TrackedObject
+
+CODE = "AA123456789BR"
+
+def make_result(*events, entregue=False):
+    return {
+        "codigo": CODE,
+        "eventos": [
+            {"data": data, "hora": hora, "local": "São Paulo/SP", "status": status, "subStatus": ""}
+            for data, hora, status in events
+        ],
+        "entregue": entregue,
+        "servico": "SEDEX"
+    }
+
+POSTED = ("01/06/2024", "09:00", "Objeto postado")
+IN_TRANSIT = ("02/06/2024", "14:30", "Objeto em trânsito - por favor aguarde")
+DELIVERED = ("03/06/2024", "10:15", "Objeto entregue ao destinatário")
+
+@pytest.fixture
+def notifications():
+    received = []
+    listener = lambda code, events: received.append((code, [event.status for event in events]))
+    tracking_store.add_listener(listener)
+    yield received
+    tracking_store.remove_listener(listener)
+
+def test_only_new_events_are_stored_and_notified(db: Session, notifications):
+    new = tracking_store.record_results(db, {CODE: make_result(IN_TRANSIT, POSTED)})
+    assert [event.status for event in new[CODE]] == [IN_TRANSIT[2], POSTED[2]]
+
+    # A refresh without changes stores nothing and notifies nobody
+    assert tracking_store.record_results(db, {CODE: make_result(IN_TRANSIT, POSTED)}) == {}
+
+    new = tracking_store.record_results(db, {CODE: make_result(DELIVERED, IN_TRANSIT, POSTED, entregue=True)})
+    assert [event.status for event in new[CODE]] == [DELIVERED[2]]
+
+    assert db.query(TrackingEvent).count() == 3
+    assert notifications == [
+        (CODE, [IN_TRANSIT[2], POSTED[2]]),
+        (CODE, [DELIVERED[2]])
+    ]
+
+def test_pointer_tracks_latest_event(db: Session):
+    tracking_store.record_results(db, {CODE: make_result(DELIVERED, POSTED, entregue=True)})
+    # An older event showing up late must not move the pointer back
+    tracking_store.record_results(db, {CODE: make_result(DELIVERED, IN_TRANSIT, POSTED, entregue=True)})
+
+    tracked = db.query(TrackedObject).filter(TrackedObject.tracking_code == CODE).one()
+    assert tracked.last_status == DELIVERED[2]
+    assert tracked.last_event_at == datetime(2024, 6, 3, 10, 15)
+    assert tracked.last_event.status == DELIVERED[2]
+    assert tracked.entregue is True
+
+def test_get_tracking_serves_stored_events(db: Session):
+    assert tracking_store.get_tracking(db, CODE) is None
+
+    tracking_store.record_results(db, {CODE: make_result(IN_TRANSIT, POSTED)})
+    result = tracking_store.get_tracking(db, CODE)
+
+    assert result["servico"] == "SEDEX"
+    assert [event["status"] for event in result["eventos"]] == [IN_TRANSIT[2], POSTED[2]]
+    assert result["eventos"][0]["dataHora"] == datetime(2024, 6, 2, 14, 30)
+
+def test_mock_and_failed_results_are_not_stored(db: Session):
+    results = {
+        CODE: {**make_result(POSTED), "simulado": True},
+        "BB123456789BR": {"codigo": "BB123456789BR", "eventos": [], "entregue": False, "error": "timeout"}
+    }
+    assert tracking_store.record_results(db, results) == {}
+    assert db.query(TrackedObject).count() == 0
+
+def test_full_batch_is_stored_in_chunks(db: Session):
+    # 1000 codes with 5 events each is more bind parameters than one INSERT takes
+    results = {}
+    for number in range(1000):
+        code = f"AA{number:09d}BR"
+        results[code] = {
+            **make_result(*[(f"0{day}/06/2024", "09:00", f"Evento {day}") for day in range(1, 6)]),
+            "codigo": code
+        }
+
+    inserts = []
+    count_inserts = lambda conn, cursor, statement, *args: inserts.append(statement) if statement.startswith("INSERT INTO trackingevent ") else None
+    engine = db.get_bind().engine
+    event.listen(engine, "before_cursor_execute", count_inserts)
+    try:
+        new = tracking_store.record_results(db, results)
+    finally:
+        event.remove(engine, "before_cursor_execute", count_inserts)
+
+    assert len(inserts) == 10
+    assert len(new) == 1000
+    assert db.query(TrackingEvent).count() == 5000
+    assert db.query(TrackedObject).filter(TrackedObject.last_status == "Evento 5").count() == 1000